@@ -0,0 +1,166 @@
+import os
+import io
+import csv
+import json
+import asyncio
+from datetime import datetime
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional, Tuple
+
+from pydantic import ValidationError
+
+from models.user import UserCreate
+from auth.security import get_password_hash
+from repositories.base import UserRepository
+
+# Processes hashing passwords during bulk provisioning (defaults to one per CPU)
+BULK_HASH_WORKERS = int(os.getenv("BULK_HASH_WORKERS", os.cpu_count() or 1))
+
+# Users per insert_many call
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", 1000))
+
+# Most users accepted in one upload to the bulk endpoint
+BULK_MAX_USERS = int(os.getenv("BULK_MAX_USERS", 10000))
+
+FORMATS = ("csv", "ndjson")
+
+# CSV cells holding several values separate them with semicolons
+LIST_FIELDS = ("cognitiveConditions", "goals", "cognitiveAreas")
+
+_hash_pool: Optional[Executor] = None
+
+def new_user_document(user_data: UserCreate, hashed_password: str) -> Dict[str, Any]:
+    """The document stored for a newly registered user"""
+    return {
+        "name": user_data.name,
+        "email": user_data.email,
+        "hashed_password": hashed_password,
+        "ageGroup": user_data.ageGroup,
+        "cognitiveConditions": user_data.cognitiveConditions,
+        "otherCondition": user_data.otherCondition,
+        "reminderTime": user_data.reminderTime,
+        "timePreference": user_data.timePreference,
+        "goals": user_data.goals,
+        "cognitiveAreas": user_data.cognitiveAreas,
+        "streak": 0,
+        "totalSessions": 0,
+        "lastActiveDay": None,
+        "createdAt": datetime.utcnow()
+    }
+
+def _failure(row: int, email: Optional[str], error: str) -> Dict[str, Any]:
+    return {"row": row, "email": email, "error": error}
+
+def _csv_records(content: str):
+    for row in csv.DictReader(io.StringIO(content)):
+        record = {}
+        for field, value in row.items():
+            if field is None or value is None or not value.strip():
+                continue  # Missing optional cells fall back to the model defaults
+            value = value.strip()
+            record[field.strip()] = [v.strip() for v in value.split(";") if v.strip()] if field.strip() in LIST_FIELDS else value
+        yield record
+
+def _ndjson_records(content: str):
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield ValueError(f"Invalid JSON: {e.msg}")
+
+def parse_users(content: str, format: str) -> Tuple[List[Tuple[int, UserCreate]], List[Dict[str, Any]]]:
+    """
+    Parse and validate an upload.
+
+    Returns the valid users with their 1-based row numbers, and a failure
+    entry for every row that could not be used.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported format: {format}")
+    records = _csv_records(content) if format == "csv" else _ndjson_records(content)
+
+    valid, failures = [], []
+    for row, record in enumerate(records, start=1):
+        if isinstance(record, Exception):
+            failures.append(_failure(row, None, str(record)))
+            continue
+        if not isinstance(record, dict):
+            failures.append(_failure(row, None, "Expected a JSON object"))
+            continue
+        try:
+            valid.append((row, UserCreate(**record)))
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            failures.append(_failure(row, record.get("email"), f"{field}: {error['msg']}"))
+    return valid, failures
+
+def get_hash_pool() -> Executor:
+    global _hash_pool
+    if _hash_pool is None:
+        # multiprocessing is only loaded once a bulk upload arrives
+        from concurrent.futures import ProcessPoolExecutor
+        _hash_pool = ProcessPoolExecutor(max_workers=BULK_HASH_WORKERS)
+    return _hash_pool
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+def _hash_chunk(passwords: List[str]) -> List[str]:
+    return [get_password_hash(password) for password in passwords]
+
+async def hash_passwords(passwords: List[str], executor: Optional[Executor] = None, workers: int = BULK_HASH_WORKERS) -> List[str]:
+    """
+    Hash passwords across a process pool without blocking the event loop.
+
+    Passwords are sent in a few chunks per worker, so pickling and IPC stay
+    negligible next to Argon2 while every worker stays busy.
+    """
+    if not passwords:
+        return []
+    executor = executor or get_hash_pool()
+    chunk_size = max(1, -(-len(passwords) // (workers * 4)))
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(*[
+        loop.run_in_executor(executor, _hash_chunk, passwords[start:start + chunk_size])
+        for start in range(0, len(passwords), chunk_size)
+    ])
+    return [hashed for chunk in chunks for hashed in chunk]
+
+async def provision_users(
+    users: UserRepository,
+    content: str,
+    format: str,
+    executor: Optional[Executor] = None,
+    batch_size: int = BULK_INSERT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """
+    Register every valid user in an upload.
+
+    Bad rows and already-registered emails are reported per row and never
+    stop the rest of the upload.
+    """
+    valid, failures = parse_users(content, format)
+    hashes = await hash_passwords([user_data.password for _, user_data in valid], executor)
+
+    created = 0
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        user_docs = [
+            new_user_document(user_data, hashed_password)
+            for (_, user_data), hashed_password in zip(batch, hashes[start:start + batch_size])
+        ]
+        user_ids = await users.create_many(user_docs)
+        for (row, user_data), user_id in zip(batch, user_ids):
+            if user_id is None:
+                failures.append(_failure(row, user_data.email, "Email already registered"))
+            else:
+                created += 1
+
+    failures.sort(key=lambda failure: failure["row"])
+    return {"total": created + len(failures), "created": created, "failed": failures}
@@ -0,0 +1,74 @@
+import os
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from repositories.base import RefreshTokenRepository
+
+# How long a refresh token stays valid if it is not used (each refresh issues a new one)
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Refresh tokens are stored as SHA-256 hashes. They are 256-bit random values,
+    so a fast hash is enough; a slow password hash would only cost CPU.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def issue_refresh_token(
+    tokens: RefreshTokenRepository,
+    user_id: str,
+    email: str,
+    family_id: Optional[str] = None
+) -> str:
+    """
+    Create a refresh token for a user and return it.
+
+    Tokens rotated from the same login share a family ID, so the whole chain can
+    be revoked at once.
+    """
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    await tokens.create({
+        "_id": hash_refresh_token(token),
+        "userId": user_id,
+        "email": email,
+        "familyId": family_id or uuid.uuid4().hex,
+        "createdAt": now,
+        "expiresAt": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        "usedAt": None,
+        "revokedAt": None
+    })
+    return token
+
+async def rotate_refresh_token(tokens: RefreshTokenRepository, token: str) -> Optional[Tuple[str, str]]:
+    """
+    Exchange a refresh token for a new one in the same family.
+
+    Returns (email, new refresh token), or None if the token is unknown,
+    expired, revoked or already used. Presenting an already-used token means
+    it was copied: the legitimate client and the copy both hold the same chain,
+    so the whole family is revoked and the user has to log in again.
+    """
+    token_hash = hash_refresh_token(token)
+    now = datetime.utcnow()
+    record = await tokens.consume(token_hash, now)
+    if record is None:
+        stale = await tokens.get(token_hash)
+        if stale and stale.get("usedAt") and not stale.get("revokedAt"):
+            revoked = await tokens.revoke_family(stale["familyId"], now)
+            print(f"Warning: Refresh token reuse for user {stale['userId']}; revoked {revoked} tokens")
+        return None
+
+    new_token = await issue_refresh_token(tokens, record["userId"], record["email"], record["familyId"])
+    return record["email"], new_token
+
+async def revoke_refresh_token(tokens: RefreshTokenRepository, token: str) -> bool:
+    """Revoke the family of a refresh token (logout). Returns whether the token was known"""
+    record = await tokens.get(hash_refresh_token(token))
+    if record is None:
+        return False
+    await tokens.revoke_family(record["familyId"], datetime.utcnow())
+    return True
@@ -1,30 +1,33 @@
+import os
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo.errors import DuplicateKeyError
 from typing import Optional
 
-from models.user import UserCreate, UserInDB, User, Token, UserLogin
+from models.user import UserCreate, UserInDB, User, Token, UserLogin, RefreshRequest
 from auth.security import (
     verify_password, 
+    verify_and_rehash,
     get_password_hash, 
     create_access_token, 
     verify_token,
     create_credentials_exception
 )
+from auth.bulk import new_user_document
+from auth.refresh import issue_refresh_token, rotate_refresh_token, revoke_refresh_token
+from repositories.base import UserRepository, RefreshTokenRepository, DuplicateError
+from repositories.dependencies import get_user_repository, get_refresh_token_repository
+from middleware.rate_limit import enforce_account_limit
 
 router = APIRouter()
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
-# Database dependency - will be injected from main.py
-async def get_database() -> AsyncIOMotorDatabase:
-    from main import db
-    return db
+# Comma-separated emails of the staff accounts allowed to use admin endpoints
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotorDatabase = Depends(get_database)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), users: UserRepository = Depends(get_user_repository)) -> User:
     """Get the current authenticated user from JWT token"""
     credentials_exception = create_credentials_exception()
     
@@ -32,7 +35,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotor
     if email is None:
         raise credentials_exception
     
-    user_doc = await db.users.find_one({"email": email})
+    user_doc = await users.get_by_email(email)
     if user_doc is None:
         raise credentials_exception
     
@@ -43,45 +46,42 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotor
     
     return User(**user_doc)
 
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """Get the current user, who must be listed in ADMIN_EMAILS"""
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
 @router.post("/signup", response_model=Token)
-async def signup(user_data: UserCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
+async def signup(
+    user_data: UserCreate,
+    users: UserRepository = Depends(get_user_repository),
+    refresh_tokens: RefreshTokenRepository = Depends(get_refresh_token_repository)
+):
     """Register a new user"""
     try:
         # Hash the password
         hashed_password = get_password_hash(user_data.password)
         
         # Create user document
-        user_doc = {
-            "name": user_data.name,
-            "email": user_data.email,
-            "hashed_password": hashed_password,
-            "ageGroup": user_data.ageGroup,
-            "cognitiveConditions": user_data.cognitiveConditions,
-            "otherCondition": user_data.otherCondition,
-            "reminderTime": user_data.reminderTime,
-            "timePreference": user_data.timePreference,
-            "goals": user_data.goals,
-            "cognitiveAreas": user_data.cognitiveAreas,
-            "streak": 0,
-            "totalSessions": 0,
-            "createdAt": datetime.utcnow()
-        }
+        user_doc = new_user_document(user_data, hashed_password)
         
-        # Create unique index on email if it doesn't exist
-        await db.users.create_index("email", unique=True)
-        
-        # Insert user into database
-        result = await db.users.insert_one(user_doc)
+        # Insert user into database (the unique email index is created at startup)
+        user_id = await users.create(user_doc)
         
         # Create access token
         access_token_expires = timedelta(minutes=60)  # 1 hour
         access_token = create_access_token(
             data={"sub": user_data.email}, expires_delta=access_token_expires
         )
+        refresh_token = await issue_refresh_token(refresh_tokens, user_id, user_data.email)
         
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
         
-    except DuplicateKeyError:
+    except DuplicateError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -93,25 +93,71 @@ async def signup(user_data: UserCreate, db: AsyncIOMotorDatabase = Depends(get_d
         )
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncIOMotorDatabase = Depends(get_database)):
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    users: UserRepository = Depends(get_user_repository),
+    refresh_tokens: RefreshTokenRepository = Depends(get_refresh_token_repository)
+):
     """Authenticate user and return access token"""
+    # Throttle password guessing against one account from many addresses
+    enforce_account_limit("login_account", form_data.username)
+    
     # Find user by email (username field contains email)
-    user_doc = await db.users.find_one({"email": form_data.username})
+    user_doc = await users.get_by_email(form_data.username)
     
-    if not user_doc or not verify_password(form_data.password, user_doc["hashed_password"]):
+    valid, new_hash = verify_and_rehash(form_data.password, user_doc["hashed_password"]) if user_doc else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Upgrade hashes made with outdated Argon2 parameters while we have the plain password
+    if new_hash:
+        try:
+            await users.update_fields(str(user_doc["_id"]), {"hashed_password": new_hash})
+        except Exception as e:
+            print(f"Warning: Failed to rehash password for {user_doc['email']}: {str(e)}")
+    
     # Create access token
     access_token_expires = timedelta(minutes=60)  # 1 hour
     access_token = create_access_token(
         data={"sub": user_doc["email"]}, expires_delta=access_token_expires
     )
+    refresh_token = await issue_refresh_token(refresh_tokens, str(user_doc["_id"]), user_doc["email"])
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    request: RefreshRequest,
+    refresh_tokens: RefreshTokenRepository = Depends(get_refresh_token_repository)
+):
+    """Exchange a refresh token for a new access token and refresh token, without a password check"""
+    rotated = await rotate_refresh_token(refresh_tokens, request.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    email, refresh_token = rotated
+    
+    access_token_expires = timedelta(minutes=60)  # 1 hour
+    access_token = create_access_token(
+        data={"sub": email}, expires_delta=access_token_expires
+    )
+    
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: RefreshRequest,
+    refresh_tokens: RefreshTokenRepository = Depends(get_refresh_token_repository)
+):
+    """Revoke a refresh token and every token rotated from the same login"""
+    await revoke_refresh_token(refresh_tokens, request.refresh_token)
 
 @router.get("/me", response_model=User)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
@@ -1,12 +1,32 @@
 import os
 from datetime import datetime, timedelta
-from typing import Optional
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
 
-# Password hashing context using Argon2
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Argon2 cost parameters, chosen for our hardware with calibrate_argon2.py. Hashes made
+# with other parameters are upgraded the next time their owner logs in.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """
+    Password hashing context using Argon2.
+
+    passlib and the Argon2 bindings are only needed to log in or sign up, so
+    they are loaded on first use (the app preloads them during startup).
+    """
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=ARGON2_TIME_COST,
+        argon2__memory_cost=ARGON2_MEMORY_COST,
+        argon2__parallelism=ARGON2_PARALLELISM
+    )
 
 # JWT settings
 SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-here")
@@ -15,11 +35,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRES_IN", 3600)) // 60  # Co
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if its hash uses outdated parameters, rehash it.
+
+    Returns (valid, new_hash); new_hash is None unless the stored hash should be replaced.
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password using Argon2"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Backfill the daily activity bitmap and streaks from existing training sessions.
+Safe to re-run: each user's activity, streak, longestStreak and lastActiveDay are rebuilt from scratch.
+"""
+
+import os
+import asyncio
+import certifi
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from repositories.base import activity_day
+from users.activity import mark_active
+from progress.compaction import iter_bucketed_sessions
+
+# Load environment variables
+load_dotenv()
+
+def rebuild_activity(active_days):
+    """Activity masks and streak fields for a set of active dates"""
+    activity = {}
+    streak = longest_streak = 0
+    previous_day = None
+    for day in sorted(active_days):
+        mark_active(activity, day)
+        streak = streak + 1 if previous_day == day - timedelta(days=1) else 1
+        longest_streak = max(longest_streak, streak)
+        previous_day = day
+    return {
+        "activity": activity,
+        "streak": streak,
+        "longestStreak": longest_streak,
+        "lastActiveDay": activity_day(datetime.combine(previous_day, datetime.min.time())) if previous_day else None
+    }
+
+async def backfill_activity():
+    mongodb_uri = os.getenv("MONGODB_URI")
+    if not mongodb_uri:
+        print("❌ Error: MONGODB_URI not found in environment variables")
+        return
+
+    client = AsyncIOMotorClient(mongodb_uri, tlsCAFile=certifi.where())
+    db = client.mindbloom
+
+    updated = 0
+    async for user in db.users.find({}, {"_id": 1}):
+        user_id = str(user["_id"])
+        active_days = set()
+
+        async for session in db.training_sessions.find(
+            {"userId": user_id, "isComplete": True},
+            {"completedAt": 1, "createdAt": 1}
+        ):
+            completed_at = session.get("completedAt") or session.get("createdAt")
+            if completed_at:
+                active_days.add(completed_at.date())
+
+        async for session in iter_bucketed_sessions(user_id, db):
+            completed_at = session.get("completedAt") or session.get("createdAt")
+            if completed_at:
+                active_days.add(completed_at.date())
+
+        await db.users.update_one({"_id": user["_id"]}, {"$set": rebuild_activity(active_days)})
+        updated += 1
+        print(f"✅ {user_id}: {len(active_days)} active days")
+
+    print(f"\n🎉 Backfilled activity for {updated} users")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(backfill_activity())
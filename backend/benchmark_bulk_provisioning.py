@@ -0,0 +1,65 @@
+import os
+import time
+import json
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from models.user import UserCreate
+from auth.bulk import provision_users, new_user_document
+from auth.security import get_password_hash, ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM
+from repositories.memory import InMemoryUserRepository
+
+# Users in the generated upload; hashing dominates, so lower ARGON2_* for a quick run
+USERS = int(os.getenv("BENCH_USERS", 10000))
+# Hashing processes for the bulk path
+WORKERS = int(os.getenv("BENCH_WORKERS", os.cpu_count() or 1))
+# Database round trip added to every insert call (seconds)
+SIMULATED_RTT = float(os.getenv("SIMULATED_RTT_MS", 2)) / 1000
+
+class SimulatedUserRepository(InMemoryUserRepository):
+    """Each insert call costs one network round trip, however many users it carries"""
+
+    async def create(self, user_doc):
+        await asyncio.sleep(SIMULATED_RTT)
+        return await super().create(user_doc)
+
+    async def create_many(self, user_docs):
+        await asyncio.sleep(SIMULATED_RTT)
+        return [await InMemoryUserRepository.create(self, doc) for doc in user_docs]
+
+def make_upload(count: int) -> str:
+    return "\n".join(json.dumps({
+        "name": f"Patient {i}",
+        "email": f"patient{i}@example.com",
+        "password": f"initial-password-{i}",
+        "ageGroup": "65-74",
+        "reminderTime": "09:00",
+        "cognitiveAreas": ["memory"]
+    }) for i in range(count))
+
+async def one_at_a_time(users, content: str):
+    """What POST /auth/signup does, once per user"""
+    for line in content.splitlines():
+        user_data = UserCreate(**json.loads(line))
+        await users.create(new_user_document(user_data, get_password_hash(user_data.password)))
+
+async def main():
+    content = make_upload(USERS)
+    print(f"{USERS} users, argon2id t={ARGON2_TIME_COST} m={ARGON2_MEMORY_COST} KiB p={ARGON2_PARALLELISM}, "
+          f"{WORKERS} hashing processes on {os.cpu_count()} CPUs, {SIMULATED_RTT * 1000:.0f} ms round trips\n")
+
+    started = time.perf_counter()
+    await one_at_a_time(SimulatedUserRepository(), content)
+    serial = time.perf_counter() - started
+    print(f"{'signup loop':<14}{USERS / serial:>10.1f} users/s")
+
+    users = SimulatedUserRepository()
+    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+        started = time.perf_counter()
+        report = await provision_users(users, content, "ndjson", executor)
+        bulk = time.perf_counter() - started
+    assert report["created"] == USERS
+    print(f"{'bulk':<14}{USERS / bulk:>10.1f} users/s ({serial / bulk:.1f}x)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
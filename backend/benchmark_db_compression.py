@@ -0,0 +1,127 @@
+import os
+import zlib
+import time
+import random
+import asyncio
+import statistics
+from datetime import datetime, timedelta
+
+import bson
+
+from repositories.mongo import ANALYTICS_PROJECTION
+from training.logic import get_exercise_catalog
+
+# Sessions in the simulated progress read (a heavy user's year of history)
+SESSIONS = int(os.getenv("BENCH_SESSIONS", 1000))
+# Link speeds the transfer time is estimated for when MONGODB_BENCH_URI is not set (Mbit/s)
+BANDWIDTHS_MBIT = [20, 100, 1000]
+ROUNDS = 5
+
+def make_sessions(count: int):
+    """Completed sessions shaped like the documents analytics reads"""
+    exercises = [exercise for area in get_exercise_catalog().values() for exercise in area]
+    started = datetime.utcnow() - timedelta(days=count)
+    sessions = []
+    for i in range(count):
+        chosen = random.sample(exercises, 4)
+        results = [
+            {"exerciseId": exercise["id"], "score": round(random.uniform(40, 100), 1), "timeSpent": random.randint(60, 400)}
+            for exercise in chosen
+        ]
+        sessions.append({
+            "_id": bson.ObjectId(),
+            "userId": "benchmark-user",
+            "createdAt": started + timedelta(days=i),
+            "mood": random.choice(["calm", "focused", "tired", "energetic"]),
+            "focusAreas": sorted({exercise["type"] for exercise in chosen}),
+            "averageScore": round(sum(r["score"] for r in results) / len(results), 1),
+            "isComplete": True,
+            "exerciseResults": results,
+            "exercises": chosen,
+        })
+    return sessions
+
+def codecs():
+    """(name, compress, decompress) for every wire compressor available here"""
+    available = [
+        ("zlib level 1", lambda data: zlib.compress(data, 1), zlib.decompress),
+        ("zlib level 6", lambda data: zlib.compress(data, 6), zlib.decompress),
+    ]
+    try:
+        from backports import zstd  # What pymongo[zstd] installs before Python 3.14
+        available.append(("zstd", zstd.compress, zstd.decompress))
+    except ImportError:
+        print("(zstd not installed: pip install 'pymongo[zstd]')")
+    try:
+        import snappy
+        available.append(("snappy", snappy.compress, snappy.uncompress))
+    except ImportError:
+        print("(snappy not installed: pip install python-snappy)")
+    return available
+
+def projected(session):
+    """The fields ANALYTICS_PROJECTION keeps, i.e. what the server actually sends"""
+    keep = {key for key in ANALYTICS_PROJECTION if "." not in key}
+    document = {key: value for key, value in session.items() if key in keep}
+    document["exerciseResults"] = [
+        {"exerciseId": r["exerciseId"], "score": r["score"], "timeSpent": r["timeSpent"]}
+        for r in session["exerciseResults"]
+    ]
+    return document
+
+def estimate(sessions):
+    payload = b"".join(bson.encode(projected(session)) for session in sessions)
+    available = codecs()
+    print(f"Progress read of {len(sessions)} sessions: {len(payload) / 1024:.0f} KiB of BSON on the wire uncompressed\n")
+    header = "".join(f"{f'{mbit} Mbit/s ms':>15}" for mbit in BANDWIDTHS_MBIT)
+    print(f"{'compressor':<16}{'KiB':>8}{'ratio':>8}{'cpu ms':>9}{header}")
+
+    rows = [("none", len(payload), 0.0)]
+    for name, compress, decompress in available:
+        timings = []
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            compressed = compress(payload)
+            decompress(compressed)
+            timings.append((time.perf_counter() - started) * 1000)
+        rows.append((name, len(compressed), statistics.median(timings)))
+
+    for name, size, cpu_ms in rows:
+        transfer = "".join(f"{size * 8 / (mbit * 1000) + cpu_ms:>15.1f}" for mbit in BANDWIDTHS_MBIT)
+        print(f"{name:<16}{size / 1024:>8.0f}{len(payload) / size:>8.1f}{cpu_ms:>9.2f}{transfer}")
+
+async def measure(uri: str, sessions):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    setup = AsyncIOMotorClient(uri)
+    collection = setup.mindbloom_bench.training_sessions
+    await collection.drop()
+    await collection.insert_many(sessions)
+    await collection.create_index([("userId", 1), ("createdAt", 1)])
+
+    print(f"Progress read of {len(sessions)} sessions from MongoDB at MONGODB_BENCH_URI\n")
+    print(f"{'compressors':<16}{'median ms':>11}{'p90 ms':>9}")
+    for compressors in ["", "snappy", "zlib", "zstd"]:
+        # The driver skips (with a warning) compressors whose module is not installed
+        options = {"compressors": compressors, "zlibCompressionLevel": 1} if compressors else {}
+        client = AsyncIOMotorClient(uri, **options)
+        reads = client.mindbloom_bench.training_sessions
+        timings = []
+        for _ in range(ROUNDS * 2):
+            started = time.perf_counter()
+            await reads.find({"userId": "benchmark-user"}, ANALYTICS_PROJECTION).sort("createdAt", 1).to_list(None)
+            timings.append((time.perf_counter() - started) * 1000)
+        client.close()
+        timings.sort()
+        print(f"{compressors or 'none':<16}{statistics.median(timings):>11.1f}{timings[int(len(timings) * 0.9)]:>9.1f}")
+
+    await setup.drop_database("mindbloom_bench")
+    setup.close()
+
+if __name__ == "__main__":
+    sessions = make_sessions(SESSIONS)
+    uri = os.getenv("MONGODB_BENCH_URI")
+    if uri:
+        asyncio.run(measure(uri, sessions))
+    else:
+        estimate(sessions)
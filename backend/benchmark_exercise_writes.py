@@ -0,0 +1,200 @@
+import os
+import time
+import asyncio
+import shutil
+import tempfile
+import statistics
+import contextlib
+from datetime import datetime
+from types import SimpleNamespace
+from bson import ObjectId
+
+# The route benchmark runs the API against the in-memory repositories
+os.environ.setdefault("REPOSITORY_BACKEND", "memory")
+
+import httpx
+
+from main import app
+from auth.security import create_access_token
+from repositories.dependencies import get_repositories
+from repositories.memory import InMemoryRepositories, InMemoryExerciseResultRepository
+from repositories.mongo import MongoExerciseResultRepository
+from repositories.write_behind import WriteBehindResultRepository, DURABILITY_MODES
+
+USERS = 200
+SAVES_PER_USER = 10
+# Round trip of the simulated database when MONGODB_BENCH_URI is not set (seconds)
+SIMULATED_RTT = float(os.getenv("SIMULATED_RTT_MS", 2)) / 1000
+# Connections available to the simulated database (Motor's default maxPoolSize is 100)
+SIMULATED_POOL_SIZE = int(os.getenv("SIMULATED_POOL_SIZE", 100))
+# Concurrent users for the route benchmark; below the load shedder's initial limit of 64
+ROUTE_USERS = int(os.getenv("BENCH_ROUTE_USERS", 32))
+
+class SimulatedSessionCollection:
+    """Every call costs one network round trip; documents are not actually stored"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.pool = asyncio.Semaphore(SIMULATED_POOL_SIZE)
+
+    async def _round_trip(self):
+        async with self.pool:
+            self.round_trips += 1
+            await asyncio.sleep(SIMULATED_RTT)
+
+    async def find_one_and_update(self, *args, **kwargs):
+        await self._round_trip()
+        return {"exerciseResults": []}
+
+    async def bulk_write(self, operations, ordered=True):
+        await self._round_trip()
+
+async def make_collection():
+    mongodb_uri = os.getenv("MONGODB_BENCH_URI")
+    if not mongodb_uri:
+        return SimulatedSessionCollection(), None
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(mongodb_uri)
+    collection = client.mindbloom_bench.training_sessions
+    await collection.drop()
+    return collection, client
+
+async def run_saves(results, collection, session_ids):
+    """Each user saves its exercises one after another, all users concurrently"""
+    async def user(session_id):
+        for i in range(SAVES_PER_USER):
+            await results.append(session_id, {
+                "exerciseId": f"exercise_{i}", "score": 75.0, "timeSpent": 60, "completedAt": datetime.utcnow()
+            }, persisted=[])
+
+    started = time.perf_counter()
+    await asyncio.gather(*[user(session_id) for session_id in session_ids])
+    acknowledged = time.perf_counter() - started
+    await results.flush()
+    return acknowledged, time.perf_counter() - started
+
+class SimulatedResultRepository(InMemoryExerciseResultRepository):
+    """Write-through saves: one round trip per result"""
+
+    async def append(self, session_id, result, persisted=None):
+        await asyncio.sleep(SIMULATED_RTT)
+        return await super().append(session_id, result, persisted)
+
+def simulate_round_trips(repository, *method_names):
+    """Make each named call of an in-memory repository cost one round trip"""
+    for name in method_names:
+        method = getattr(repository, name)
+        if name.startswith("iter_"):
+            async def wrapped(*args, _method=method, **kwargs):
+                await asyncio.sleep(SIMULATED_RTT)
+                async for item in _method(*args, **kwargs):
+                    yield item
+        else:
+            async def wrapped(*args, _method=method, **kwargs):
+                await asyncio.sleep(SIMULATED_RTT)
+                return await _method(*args, **kwargs)
+        setattr(repository, name, wrapped)
+
+async def run_route_saves(mode):
+    """
+    POST /training/session/{id}/exercise end to end: authentication, session
+    lookup, the save and the progress recalculation. Every repository call is
+    one simulated round trip.
+    """
+    repos = InMemoryRepositories()
+    simulate_round_trips(repos.users, "get_by_email", "get_by_id", "update_fields")
+    simulate_round_trips(repos.sessions, "get_for_user", "iter_for_analytics", "iter_compacted_months")
+    journal_dir = tempfile.mkdtemp()
+    if mode is None:
+        repos.results = SimulatedResultRepository(repos.sessions)
+    else:
+        repos.results = WriteBehindResultRepository(SimulatedSessionCollection(), mode, journal_dir)
+        await repos.results.start()
+    app.dependency_overrides[get_repositories] = lambda: repos
+
+    users = []
+    for i in range(ROUTE_USERS):
+        email = f"bench{i}@example.com"
+        user_id = await repos.users.create({
+            "name": "Bench", "email": email, "hashed_password": "-", "ageGroup": "65-74", "reminderTime": "09:00",
+            "streak": 0, "totalSessions": 0, "createdAt": datetime.utcnow()
+        })
+        session_id = await repos.sessions.create({
+            "userId": user_id, "mood": "focused", "focusAreas": ["memory"], "exercises": [],
+            "exerciseResults": [], "isComplete": False, "createdAt": datetime.utcnow()
+        })
+        users.append((session_id, {"Authorization": f"Bearer {create_access_token({'sub': email})}"}))
+
+    latencies, errors = [], 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        async def user(session_id, headers):
+            nonlocal errors
+            for i in range(SAVES_PER_USER):
+                started = time.perf_counter()
+                response = await http.post(f"/api/v1/training/session/{session_id}/exercise", headers=headers, json={
+                    "exerciseId": "memory_sequence", "score": 75.0, "timeSpent": 60
+                })
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += response.status_code != 200
+
+        # The route logs every save
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            started = time.perf_counter()
+            await asyncio.gather(*[user(session_id, headers) for session_id, headers in users])
+            elapsed = time.perf_counter() - started
+
+    if mode is not None:
+        await repos.results.stop()
+    shutil.rmtree(journal_dir)
+    app.dependency_overrides.clear()
+    latencies.sort()
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99)], errors
+
+async def main():
+    collection, client = await make_collection()
+    target = "MongoDB at MONGODB_BENCH_URI" if client else (
+        f"simulated database ({SIMULATED_RTT * 1000:.0f} ms round trip, {SIMULATED_POOL_SIZE} connections)"
+    )
+    print(f"{USERS} users x {SAVES_PER_USER} saves against {target}\n")
+    print(f"{'path':<22}{'acked saves/s':>16}{'durable saves/s':>18}{'round trips':>14}")
+
+    total = USERS * SAVES_PER_USER
+    configurations = [("write-through", None)] + [(f"write-behind/{mode}", mode) for mode in DURABILITY_MODES]
+    for name, mode in configurations:
+        session_ids = [ObjectId() for _ in range(USERS)]
+        if client:
+            await collection.insert_many([{"_id": sid, "exerciseResults": []} for sid in session_ids])
+        session_ids = [str(sid) for sid in session_ids]
+        round_trips_before = getattr(collection, "round_trips", 0)
+
+        journal_dir = tempfile.mkdtemp()
+        try:
+            if mode is None:
+                results = MongoExerciseResultRepository(SimpleNamespace(training_sessions=collection))
+            else:
+                results = WriteBehindResultRepository(collection, mode, journal_dir)
+                await results.start()
+
+            acknowledged, durable = await run_saves(results, collection, session_ids)
+            if mode is not None:
+                await results.stop()
+        finally:
+            shutil.rmtree(journal_dir)
+
+        round_trips = getattr(collection, "round_trips", 0) - round_trips_before
+        print(f"{name:<22}{total / acknowledged:>16.0f}{total / durable:>18.0f}{round_trips if not client else '-':>14}")
+
+    if client:
+        await client.mindbloom_bench.command("dropDatabase")
+        client.close()
+
+    print(f"\n{ROUTE_USERS} users x {SAVES_PER_USER} POST /training/session/{{id}}/exercise, "
+          f"simulated database ({SIMULATED_RTT * 1000:.0f} ms round trip)\n")
+    print(f"{'path':<22}{'saves/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, mode in configurations:
+        saves_per_second, p50, p99, errors = await run_route_saves(mode)
+        print(f"{name:<22}{saves_per_second:>10.0f}{p50:>10.1f}{p99:>10.1f}{errors:>8}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from models.training import TrainingSession, ExerciseResult
+from models.memory_note import MemoryNote
+from training.logic import select_exercises
+from training.router import _session_payload
+from memory_notes.router import _NOTE_SHAPE
+from responses import TrustedJSONResponse
+
+def make_session_docs(count):
+    """Session documents shaped like the ones start/save/complete write"""
+    now = datetime.utcnow()
+    exercises = select_exercises(["memory", "attention", "language"], "focused")
+    docs = []
+    for i in range(count):
+        docs.append({
+            "_id": ObjectId(),
+            "userId": "64b000000000000000000000",
+            "mood": "focused",
+            "focusAreas": ["memory", "attention", "language"],
+            "exercises": exercises,
+            "exerciseResults": [
+                {"exerciseId": "memory_sequence", "score": 80.0, "timeSpent": 120, "completedAt": now},
+                {"exerciseId": "divided_attention", "score": 72.5, "timeSpent": 95, "completedAt": now},
+                {"exerciseId": "word_finding", "score": 91.0, "timeSpent": 140, "completedAt": now}
+            ],
+            "averageScore": 81.2,
+            "isComplete": True,
+            "createdAt": now - timedelta(days=i),
+            "completedAt": now - timedelta(days=i)
+        })
+    return docs
+
+def make_note_docs(count):
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": str(uuid.uuid4()),
+            "userId": "64b000000000000000000000",
+            "title": f"Note {i}",
+            "content": "Remember to water the plants and call the pharmacy about the refill. " * 3,
+            "createdAt": now - timedelta(minutes=i),
+            "updatedAt": now - timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+
+_sessions_adapter = TypeAdapter(List[TrainingSession])
+_notes_adapter = TypeAdapter(List[MemoryNote])
+
+def legacy_sessions(docs):
+    """Previous path: build models per document, then FastAPI revalidates and serializes the list"""
+    sessions = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["id"] = str(doc.pop("_id"))
+        doc["exerciseResults"] = [ExerciseResult(**result) for result in doc["exerciseResults"]]
+        sessions.append(TrainingSession(**doc))
+    return _sessions_adapter.dump_json(_sessions_adapter.validate_python(sessions, from_attributes=True))
+
+def trusted_sessions(docs):
+    return TrustedJSONResponse(content=[_session_payload(dict(doc)) for doc in docs]).body
+
+def legacy_notes(docs):
+    notes = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["id"] = str(doc.pop("_id"))
+        notes.append(MemoryNote(**doc))
+    return _notes_adapter.dump_json(_notes_adapter.validate_python(notes, from_attributes=True))
+
+def trusted_notes(docs):
+    payload = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["id"] = str(doc["_id"])
+        payload.append(_NOTE_SHAPE.payload(doc))
+    return TrustedJSONResponse(content=payload).body
+
+def time_per_item(func, docs, repeat=50):
+    func(docs)  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(docs)
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat / len(docs) * 1e6  # microseconds per item
+
+def run_benchmarks():
+    print("⏱️  RESPONSE SERIALIZATION BENCHMARK (µs per item)")
+    print("=" * 60)
+    cases = [
+        ("GET /training/sessions (50 sessions)", make_session_docs(50), legacy_sessions, trusted_sessions),
+        ("GET /memory-notes (1,000 notes)", make_note_docs(1000), legacy_notes, trusted_notes),
+    ]
+    for name, docs, legacy, trusted in cases:
+        legacy_us = time_per_item(legacy, docs)
+        trusted_us = time_per_item(trusted, docs)
+        print(f"\n📊 {name}")
+        print(f"   Validated models + revalidation: {legacy_us:8.2f} µs/item")
+        print(f"   Trusted payload + orjson:        {trusted_us:8.2f} µs/item")
+        print(f"   Reduction:                       {100 * (1 - trusted_us / legacy_us):7.1f}%")
+
+if __name__ == "__main__":
+    run_benchmarks()
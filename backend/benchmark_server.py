@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import socket
+import asyncio
+import statistics
+import subprocess
+from itertools import product
+
+# Keep-alive connections driving each run, and how long each endpoint is driven
+CONNECTIONS = int(os.getenv("BENCH_CONNECTIONS", 32))
+DURATION = float(os.getenv("BENCH_DURATION_SECONDS", 5))
+
+# Stateless endpoints, so every worker answers the same way with the in-memory backend
+ENDPOINTS = [
+    "/healthz",
+    "/api/v1/check-user/nobody@example.com",
+    "/openapi.json",
+]
+
+def configurations():
+    """(name, environment) for each worker count, event loop and HTTP parser combination"""
+    worker_counts = sorted({1, os.cpu_count() or 1})
+    for workers, loop, http in product(worker_counts, ("asyncio", "uvloop"), ("h11", "httptools")):
+        yield f"{workers}w {loop}/{http}", {
+            "WEB_CONCURRENCY": str(workers), "SERVER_LOOP": loop, "SERVER_HTTP": http
+        }
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_until_serving(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+async def read_response(reader):
+    headers = await reader.readuntil(b"\r\n\r\n")
+    status = int(headers.split(b" ", 2)[1])
+    length = 0
+    for line in headers.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+async def drive(port: int, path: str):
+    """Requests per second, p50 and p99 latency in ms, and non-2xx responses"""
+    request = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode()
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + DURATION
+
+    async def connection():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += status >= 300
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[connection() for _ in range(CONNECTIONS)])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99)], errors
+
+async def main():
+    print(f"{CONNECTIONS} keep-alive connections, {DURATION:.0f}s per endpoint, {os.cpu_count()} CPUs "
+          "(the load generator shares them with the server)\n")
+    print(f"{'configuration':<24}{'endpoint':<40}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    for name, overrides in configurations():
+        port = free_port()
+        env = {
+            **os.environ,
+            **overrides,
+            "SERVER_BIND": f"127.0.0.1:{port}",
+            "REPOSITORY_BACKEND": "memory",
+            "RATE_LIMIT_ENABLED": "false",
+            "LOAD_SHEDDING_ENABLED": "false",
+            "SERVER_MAX_REQUESTS": "0",
+            "SERVER_LOG_LEVEL": "warning",
+        }
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(backend_dir, "serve.py")],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            await wait_until_serving(port)
+            await drive(port, ENDPOINTS[0])  # warm-up
+            for path in ENDPOINTS:
+                rate, p50, p99, errors = await drive(port, path)
+                print(f"{name:<24}{path:<40}{rate:>9.0f}{p50:>9.1f}{p99:>9.1f}{errors:>8}")
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+if __name__ == "__main__":
+    asyncio.run(main())
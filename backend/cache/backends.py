@@ -0,0 +1,119 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Which cache tier to use: "lru" (in-process) or "none"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "lru").lower()
+# Maximum number of entries held by the in-process LRU tier
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+# Upper bound on staleness if an invalidation is ever missed (seconds)
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 60))
+
+class CacheBackend(ABC):
+    """
+    Key/value cache used for per-user read paths.
+
+    The interface is async so that a shared out-of-process tier can be plugged in
+    without changing callers.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Cache a value, expiring after `ttl` seconds (backend default when None)"""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Evict a single key"""
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str):
+        """Evict every key starting with `prefix`"""
+
+    @abstractmethod
+    async def clear(self):
+        """Evict everything"""
+
+class NullCacheBackend(CacheBackend):
+    """Cache that never stores anything; every read goes to the database"""
+
+    async def get(self, key: str) -> Optional[Any]:
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+    async def delete_prefix(self, prefix: str):
+        pass
+
+    async def clear(self):
+        pass
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU tier with per-entry expiry"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, default_ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self.evictions += 1
+
+    async def delete_prefix(self, prefix: str):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+            self.evictions += 1
+
+    async def clear(self):
+        self.evictions += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+def create_cache_backend() -> CacheBackend:
+    """Build the cache tier selected by CACHE_BACKEND"""
+    if CACHE_BACKEND == "lru":
+        return LRUCacheBackend()
+    if CACHE_BACKEND == "none":
+        return NullCacheBackend()
+    raise ValueError(f"Unknown cache backend: {CACHE_BACKEND}")
@@ -0,0 +1,6 @@
+from cache.backends import CacheBackend
+
+# Cache dependency - will be injected from main.py
+async def get_cache() -> CacheBackend:
+    from main import cache
+    return cache
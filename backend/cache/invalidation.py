@@ -0,0 +1,187 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+from cache.backends import CacheBackend
+
+# Collections whose writes invalidate cached reads
+WATCHED_COLLECTIONS = ("users", "training_sessions", "memory_notes")
+# Session and note IDs remembered per worker with their owner, so updates and deletes
+# (which carry only the document key) evict one user's keys instead of every user's
+INVALIDATION_OWNER_CACHE_SIZE = int(os.getenv("INVALIDATION_OWNER_CACHE_SIZE", 50000))
+
+def user_id_key(user_id: str) -> str:
+    """Cached user document, by user ID"""
+    return f"user:id:{user_id}"
+
+def user_email_key(email: str) -> str:
+    """Email -> user ID index entry (emails are not updatable)"""
+    return f"user:email:{email}"
+
+def progress_key(user_id: str) -> str:
+    """Cached ProgressSummary for a user"""
+    return f"progress:{user_id}"
+
+def notes_key(user_id: str) -> str:
+    """Prefix for anything cached from a user's memory notes"""
+    return f"notes:{user_id}"
+
+class InvalidationBus:
+    """
+    Evicts cache entries when the watched collections change, on every worker.
+
+    Each worker runs one database-level change stream filtered to the watched
+    collections, so a write made through any worker (or any other client) evicts
+    the affected keys from this worker's cache shortly after it commits. Change
+    streams require a replica set; on a standalone server the bus stops and the
+    cache TTL bounds staleness.
+
+    Only inserts and replacements carry the document, and with it the owning
+    userId. Updates and deletes of sessions and notes are attributed through the
+    owners learned from those events; when the owner is unknown (the document
+    predates this worker), the fallback prefix eviction is applied once per
+    batch of events rather than once per event.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        cache: CacheBackend,
+        retry_seconds: float = 1.0,
+        owner_cache_size: int = INVALIDATION_OWNER_CACHE_SIZE
+    ):
+        self.db = db
+        self.cache = cache
+        self.retry_seconds = retry_seconds
+        self.owner_cache_size = owner_cache_size
+        # (collection, document _id) -> userId, least recently seen first
+        self.owners: "OrderedDict[tuple, str]" = OrderedDict()
+        # Prefix evictions deferred to the end of the current batch
+        self.pending_prefixes: set = set()
+        self.prefix_evictions = 0
+        self.resume_token = None
+        self.events_processed = 0
+        self.last_event_lag_ms: Optional[float] = None
+        # Extra async callbacks run for every change event
+        self.listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+    def pipeline(self) -> list:
+        # Only ship the fields needed to work out which keys to evict
+        return [
+            {"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}},
+            {"$project": {
+                "operationType": 1,
+                "ns": 1,
+                "documentKey": 1,
+                "clusterTime": 1,
+                "fullDocument.userId": 1,
+                "fullDocument.email": 1
+            }}
+        ]
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def wait_until_ready(self, timeout: float = 5.0):
+        """Wait until the change stream is open (used by tests)"""
+        await asyncio.wait_for(self._ready.wait(), timeout)
+
+    async def run(self):
+        """Watch until cancelled, resuming after transient errors"""
+        while True:
+            try:
+                async with self.db.watch(self.pipeline(), resume_after=self.resume_token) as stream:
+                    self._ready.set()
+                    while stream.alive:
+                        event = await stream.try_next()
+                        if event is None:
+                            # Nothing more buffered: the batch is done
+                            await self.flush_pending()
+                        else:
+                            await self.handle_event(event)
+                        self.resume_token = stream.resume_token
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                if getattr(e, "code", None) == 40573:  # Change streams need a replica set
+                    print("Warning: Change streams unavailable; cache relies on TTL for cross-worker coherence")
+                    return
+                # Events may have been missed while disconnected
+                print(f"Warning: Cache invalidation stream interrupted: {str(e)}")
+                self.pending_prefixes.clear()
+                await self.cache.clear()
+                await asyncio.sleep(self.retry_seconds)
+
+    async def handle_event(self, event: Dict[str, Any]):
+        """Evict the cache keys affected by one change event"""
+        self.events_processed += 1
+        cluster_time = event.get("clusterTime")
+        if cluster_time is not None:
+            self.last_event_lag_ms = max(0.0, (time.time() - cluster_time.time) * 1000)
+
+        for listener in self.listeners:
+            await listener(event)
+
+        operation = event.get("operationType")
+        if operation in ("drop", "dropDatabase", "rename", "invalidate"):
+            await self.cache.clear()
+            return
+
+        collection = event.get("ns", {}).get("coll")
+        document_id = (event.get("documentKey") or {}).get("_id")
+        user_id = self._owner(collection, document_id, event)
+
+        if collection == "users":
+            if document_id is not None:
+                await self.cache.delete(user_id_key(str(document_id)))
+                # The streak shown in progress comes from the user document
+                await self.cache.delete(progress_key(str(document_id)))
+            else:
+                self.pending_prefixes.add("user:")
+        elif collection == "training_sessions":
+            if user_id is not None:
+                await self.cache.delete(progress_key(user_id))
+            else:
+                self.pending_prefixes.add("progress:")
+        elif collection == "memory_notes":
+            if user_id is not None:
+                await self.cache.delete_prefix(notes_key(user_id))
+            else:
+                self.pending_prefixes.add("notes:")
+
+    async def flush_pending(self):
+        """Apply the prefix evictions collected since the last flush"""
+        for prefix in self.pending_prefixes:
+            await self.cache.delete_prefix(prefix)
+            self.prefix_evictions += 1
+        self.pending_prefixes.clear()
+
+    def _owner(self, collection: Optional[str], document_id: Any, event: Dict[str, Any]) -> Optional[str]:
+        """userId owning the changed document, from the event or from earlier events"""
+        if document_id is None:
+            return None
+        key = (collection, document_id)
+        user_id = (event.get("fullDocument") or {}).get("userId")
+        if event.get("operationType") == "delete":
+            return self.owners.pop(key, None)
+        if user_id is not None:
+            self.owners[key] = user_id
+            self.owners.move_to_end(key)
+            while len(self.owners) > self.owner_cache_size:
+                self.owners.popitem(last=False)
+            return user_id
+        if key in self.owners:
+            self.owners.move_to_end(key)
+            return self.owners[key]
+        return None
@@ -0,0 +1,92 @@
+"""
+Pick Argon2 parameters for this machine.
+
+Benchmarks argon2id hashing and chooses the most expensive settings that stay
+within a target login latency and a per-hash memory budget: memory first (it
+is what makes GPU attacks expensive), then as many passes as the latency
+allows. With --env-file the choice is written to ARGON2_* settings there;
+existing hashes are upgraded the next time their owners log in.
+
+    python calibrate_argon2.py --target-ms 250 --max-memory-mib 64 --env-file .env
+"""
+import os
+import time
+import argparse
+import statistics
+from typing import Dict, Optional, Tuple
+
+from passlib.hash import argon2
+
+SAMPLE_PASSWORD = "correct horse battery staple"
+MIN_MEMORY_KIB = 8 * 1024
+MAX_TIME_COST = 10
+
+def measure_ms(time_cost: int, memory_cost: int, parallelism: int, rounds: int = 3) -> float:
+    """Median time to hash one password with these parameters, in milliseconds"""
+    hasher = argon2.using(type="ID", time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hasher.hash(SAMPLE_PASSWORD)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def calibrate(target_ms: float, max_memory_kib: int, parallelism: int, measure=measure_ms) -> Tuple[Dict[str, int], float]:
+    """
+    Returns ({time_cost, memory_cost, parallelism}, measured_ms).
+
+    Starts from the memory budget with a single pass, halving memory until that
+    fits the target, then adds passes while the next one still fits.
+    """
+    memory_cost = max_memory_kib
+    elapsed = measure(1, memory_cost, parallelism)
+    while elapsed > target_ms and memory_cost // 2 >= MIN_MEMORY_KIB:
+        memory_cost //= 2
+        elapsed = measure(1, memory_cost, parallelism)
+
+    time_cost = 1
+    while time_cost < MAX_TIME_COST:
+        candidate = measure(time_cost + 1, memory_cost, parallelism)
+        if candidate > target_ms:
+            break
+        time_cost, elapsed = time_cost + 1, candidate
+
+    return {"time_cost": time_cost, "memory_cost": memory_cost, "parallelism": parallelism}, elapsed
+
+def write_env_file(path: str, settings: Dict[str, int]):
+    """Set ARGON2_* keys in an env file, leaving every other line untouched"""
+    values = {f"ARGON2_{name.upper()}": str(value) for name, value in settings.items()}
+    lines = []
+    if os.path.exists(path):
+        with open(path) as env_file:
+            lines = env_file.read().splitlines()
+
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in values:
+            lines[i] = f"{key}={values.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in values.items())
+
+    with open(path, "w") as env_file:
+        env_file.write("\n".join(lines) + "\n")
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Benchmark Argon2 settings against a latency and memory budget")
+    parser.add_argument("--target-ms", type=float, default=250, help="Upper bound on one hash, in milliseconds")
+    parser.add_argument("--max-memory-mib", type=int, default=64, help="Memory per hash, in MiB")
+    parser.add_argument("--parallelism", type=int, default=os.cpu_count() or 1, help="Lanes per hash")
+    parser.add_argument("--env-file", help="Write the chosen ARGON2_* settings to this file")
+    args = parser.parse_args(argv)
+
+    settings, elapsed = calibrate(args.target_ms, args.max_memory_mib * 1024, args.parallelism)
+    print(f"argon2id t={settings['time_cost']} m={settings['memory_cost']} KiB p={settings['parallelism']}: "
+          f"{elapsed:.0f} ms per hash, ~{1000 / elapsed:.1f} logins/s per core")
+    for name, value in settings.items():
+        print(f"ARGON2_{name.upper()}={value}")
+
+    if args.env_file:
+        write_env_file(args.env_file, settings)
+        print(f"Updated {args.env_file}")
+
+if __name__ == "__main__":
+    main()
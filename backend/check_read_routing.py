@@ -0,0 +1,102 @@
+"""
+Check read routing against a local 3-node replica set.
+
+Start one (ports 27017-27019, replica set rs0) with:
+
+    for port in 27017 27018 27019; do
+      mkdir -p /tmp/rs0-$port
+      mongod --replSet rs0 --port $port --dbpath /tmp/rs0-$port --bind_ip localhost --fork --logpath /tmp/rs0-$port.log
+    done
+    mongosh --port 27017 --eval 'rs.initiate({_id: "rs0", members: [
+      {_id: 0, host: "localhost:27017"}, {_id: 1, host: "localhost:27018"}, {_id: 2, host: "localhost:27019"}]})'
+
+then run `python check_read_routing.py` (MONGODB_REPLICA_SET_URI points it elsewhere).
+It uses the same repositories and settings as the API, in a scratch database.
+"""
+import os
+import asyncio
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from db.routing import ANALYTICS_READS, PRIMARY_READS, apply_read_token, encode_read_token, read_scope
+from db.settings import DatabaseSettings
+from repositories.mongo import MongoRepositories
+
+REPLICA_SET_URI = os.getenv(
+    "MONGODB_REPLICA_SET_URI",
+    "mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0"
+)
+DATABASE = "mindbloom_read_routing_check"
+
+class CommandRecorder(monitoring.CommandListener):
+    """Which server each command went to, and the read concern it carried"""
+
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.database_name == DATABASE:
+            self.commands.append((event.command_name, event.connection_id, event.command.get("readConcern")))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def last(self, command_name):
+        return next(command for command in reversed(self.commands) if command[0] == command_name)
+
+async def main():
+    recorder = CommandRecorder()
+    client = AsyncIOMotorClient(REPLICA_SET_URI, event_listeners=[recorder])
+    await client.admin.command("ping")
+    primary = client.primary
+    secondaries = client.secondaries
+    print(f"Primary {primary[0]}:{primary[1]}, secondaries {', '.join(f'{host}:{port}' for host, port in secondaries)}")
+    if len(secondaries) < 2:
+        raise SystemExit("Expected a 3-node replica set with two secondaries")
+
+    repos = MongoRepositories(client[DATABASE], DatabaseSettings.from_env().analytics_read_preference())
+    user_id = f"read-routing-{datetime.utcnow().timestamp()}"
+    failures = 0
+
+    def check(description, ok):
+        nonlocal failures
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {description}")
+
+    # A write route: runs in a causal session and hands out its token
+    async with await client.start_session(causal_consistency=True) as session:
+        with read_scope(PRIMARY_READS, session):
+            await repos.sessions.create({"userId": user_id, "createdAt": datetime.utcnow(), "isComplete": True})
+            await repos.sessions.list_for_user(user_id)
+        token = encode_read_token(session)
+    check("write routes read from the primary", recorder.last("find")[1] == primary)
+    check("writes produce a read token", token is not None)
+
+    # The analytics read that follows, sending the token back
+    async with await client.start_session(causal_consistency=True) as session:
+        apply_read_token(session, token)
+        with read_scope(ANALYTICS_READS, session):
+            history = await repos.sessions.list_for_user(user_id)
+    _, address, read_concern = recorder.last("find")
+    check("analytics reads go to a secondary", address in secondaries)
+    check("the token becomes afterClusterTime", bool(read_concern and "afterClusterTime" in read_concern))
+    check("the secondary returns the client's own write", len(history) == 1)
+
+    # Without a token the read is only bounded by maxStalenessSeconds
+    with read_scope(ANALYTICS_READS):
+        await repos.sessions.count_for_user(user_id)
+    _, address, read_concern = recorder.last("aggregate")
+    check("reads without a token still go to a secondary, without waiting", address in secondaries and not read_concern)
+
+    await client.drop_database(DATABASE)
+    client.close()
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,15 +1,11 @@
 from fastapi import APIRouter, Depends
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
-router = APIRouter()
+from repositories.base import UserRepository
+from repositories.dependencies import get_user_repository
 
-# Database dependency - will be injected from main.py
-async def get_database() -> AsyncIOMotorDatabase:
-    from main import db
-    return db
+router = APIRouter()
 
 @router.get("/check-user/{email}")
-async def check_user_exists(email: str, db: AsyncIOMotorDatabase = Depends(get_database)):
+async def check_user_exists(email: str, users: UserRepository = Depends(get_user_repository)):
     """Check if a user exists in the database"""
-    user_doc = await db.users.find_one({"email": email})
-    return {"exists": user_doc is not None}
\ No newline at end of file
+    return {"exists": await users.exists(email)}
\ No newline at end of file
@@ -34,6 +34,8 @@ async def clear_performance_data():
         # Collections that contain performance data (not user accounts)
         performance_collections = [
             'training_sessions',  # Training session data
+            'session_buckets',    # Monthly compacted session history
+            'training_sessions_archive',  # Abandoned sessions swept from the hot collection
             'progress',          # Progress tracking data
             'memory_notes',      # Memory notes from sessions
         ]
@@ -41,7 +43,10 @@ async def clear_performance_data():
         # Fields to reset in users collection (keep user account but reset performance stats)
         user_performance_fields = {
             'streak': 0,
-            'totalSessions': 0
+            'totalSessions': 0,
+            'lastActiveDay': None,
+            'longestStreak': 0,
+            'activity': {}
         }
         
         total_deleted = 0
@@ -0,0 +1,121 @@
+import time
+import asyncio
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+from pymongo import monitoring
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Pool utilization per server from the driver's connection pool events.
+
+    Tracks open and checked-out connections, how long checkouts wait for a
+    connection, and checkouts that fail (e.g. the wait queue timed out).
+    Events arrive on the driver's threads; each handler only updates
+    counters, which the GIL keeps consistent.
+    """
+
+    def __init__(self, max_pool_size: Optional[int] = None, recent_waits: int = 1024):
+        self.max_pool_size = max_pool_size
+        self.open: Dict[str, int] = defaultdict(int)
+        self.checked_out: Dict[str, int] = defaultdict(int)
+        self.peak_checked_out = 0
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = defaultdict(int)
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.recent_wait_ms: Deque[float] = deque(maxlen=recent_waits)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        self.open.pop(_address(event), None)
+        self.checked_out.pop(_address(event), None)
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_ready(self, event):
+        self.open[_address(event)] += 1
+
+    def connection_closed(self, event):
+        self.closed += 1
+        self.open[_address(event)] = max(0, self.open[_address(event)] - 1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures[str(event.reason)] += 1
+        self._record_wait(event.duration)
+
+    def connection_checked_out(self, event):
+        address = _address(event)
+        self.checkouts += 1
+        self.checked_out[address] += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out[address])
+        self._record_wait(event.duration)
+
+    def connection_checked_in(self, event):
+        address = _address(event)
+        self.checked_out[address] = max(0, self.checked_out[address] - 1)
+
+    def _record_wait(self, duration: Optional[float]):
+        # Checkout durations are reported in seconds
+        if duration is None:
+            return
+        wait_ms = duration * 1000
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.recent_wait_ms.append(wait_ms)
+
+    def largest_pool(self) -> int:
+        return max(self.open.values(), default=0)
+
+    def stats(self) -> dict:
+        recent = sorted(self.recent_wait_ms)
+        busiest = max(self.checked_out.values(), default=0)
+        return {
+            "open": dict(self.open),
+            "checkedOut": dict(self.checked_out),
+            "utilization": round(busiest / self.max_pool_size, 3) if self.max_pool_size else None,
+            "peakCheckedOut": self.peak_checked_out,
+            "created": self.created,
+            "closed": self.closed,
+            "checkouts": self.checkouts,
+            "checkoutFailures": dict(self.checkout_failures),
+            "checkoutWaitMs": {
+                "avg": round(self.total_wait_ms / max(1, self.checkouts + sum(self.checkout_failures.values())), 3),
+                "p99Recent": round(recent[int(len(recent) * 0.99)], 3) if recent else 0.0,
+                "max": round(self.max_wait_ms, 3)
+            }
+        }
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+async def warm_connection_pool(client, monitor: PoolMonitor, connections: int, timeout: float) -> int:
+    """
+    Wait until the driver has opened `connections` pooled connections to a server.
+
+    The client must have been created with minPoolSize=connections and the
+    monitor as an event listener; the first ping discovers the deployment and
+    the driver's background maintenance then opens (TLS handshake and auth
+    included) the rest. Returns the largest pool reached, which is less than
+    asked for if the timeout expired.
+    """
+    await client.admin.command("ping")
+    deadline = time.monotonic() + timeout
+    while monitor.largest_pool() < connections and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    return monitor.largest_pool()
@@ -0,0 +1,215 @@
+import os
+import random
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+import pymongo
+from pymongo import monitoring
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+# The breaker opens when at least this share of the recent database calls failed or were slow
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", 0.5))
+# Recent calls the failure rate is computed over, and how many are needed before it counts
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", 50))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", 20))
+# A call slower than this counts as a failure: the database is degraded, not down
+BREAKER_SLOW_CALL_MS = float(os.getenv("BREAKER_SLOW_CALL_MS", 2000))
+# How long non-critical reads are fast-failed before traffic is let through again
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", 10))
+# Consecutive healthy calls after the open period that close the breaker again
+BREAKER_HALF_OPEN_SUCCESSES = int(os.getenv("BREAKER_HALF_OPEN_SUCCESSES", 5))
+
+# Attempts for idempotent reads that hit a transient error, and the first backoff (seconds)
+READ_RETRY_ATTEMPTS = int(os.getenv("READ_RETRY_ATTEMPTS", 3))
+READ_RETRY_BASE_DELAY = float(os.getenv("READ_RETRY_BASE_DELAY_MS", 50)) / 1000
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Error codes for operations the server aborted because they ran out of time
+_TIME_LIMIT_CODES = {50, 262}  # MaxTimeMSExpired, ExceededTimeLimit
+
+T = TypeVar("T")
+
+# time.monotonic() by which the current request's database work must be done
+_deadline: ContextVar[Optional[float]] = ContextVar("database_deadline", default=None)
+
+@contextmanager
+def database_deadline(seconds: float):
+    """
+    Bound every database operation in the block by one shared deadline.
+
+    pymongo's client-side operation timeout sends each command with the
+    remaining time as maxTimeMS, so the server abandons the work too, and
+    fails checkouts, server selection and socket reads once it has passed.
+    Motor runs operations with a copy of the caller's context, so the
+    deadline follows them onto the driver's threads.
+    """
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        with pymongo.timeout(seconds):
+            yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_seconds() -> Optional[float]:
+    """Time left before the current deadline, or None outside of one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+class CircuitBreaker:
+    """
+    Tracks the health of database calls across the worker.
+
+    Closed: everything goes through. Open: the failure rate over the recent
+    window crossed the threshold, so callers that can do without the database
+    (non-critical reads) should fail fast until the open period ends.
+    Half-open: traffic goes through again; one failure reopens the breaker,
+    a run of successes closes it. Outcomes are recorded from the driver's
+    threads, hence the lock.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_successes: int = BREAKER_HALF_OPEN_SUCCESSES
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_successes = half_open_successes
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.fast_failures = 0
+
+    def state(self, now: Optional[float] = None) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        now = time.monotonic() if now is None else now
+        return OPEN if now - self._opened_at < self.open_seconds else HALF_OPEN
+
+    def retry_after(self, now: Optional[float] = None) -> float:
+        """Seconds until the breaker lets traffic through again"""
+        if self._opened_at is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.open_seconds - (now - self._opened_at))
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """Whether a non-critical call should go ahead; counts the ones that are refused"""
+        if self.state(now) == OPEN:
+            self.fast_failures += 1
+            return False
+        return True
+
+    def record(self, success: bool, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self.state(now)
+            if state == HALF_OPEN:
+                if not success:
+                    self._open(now)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_successes:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                    self._failures = 0
+                return
+            if state == OPEN:
+                return
+
+            if len(self._outcomes) == self._outcomes.maxlen and not self._outcomes[0]:
+                self._failures -= 1
+            self._outcomes.append(success)
+            if not success:
+                self._failures += 1
+                if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+                    self._open(now)
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._probe_successes = 0
+        self.times_opened += 1
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state(),
+            "recentCalls": len(self._outcomes),
+            "recentFailures": self._failures,
+            "timesOpened": self.times_opened,
+            "fastFailures": self.fast_failures
+        }
+
+database_breaker = CircuitBreaker()
+
+class DatabaseHealthListener(monitoring.CommandListener, monitoring.ServerHeartbeatListener):
+    """
+    Feeds the breaker from every database command and server heartbeat.
+
+    Commands that fail on the network or run out of time, commands slower
+    than BREAKER_SLOW_CALL_MS and failed heartbeats count as failures; errors
+    the server returns for a bad request (duplicate keys, validation) do not.
+    """
+
+    def __init__(self, breaker: CircuitBreaker = database_breaker, slow_call_ms: float = BREAKER_SLOW_CALL_MS):
+        self.breaker = breaker
+        self.slow_call_micros = slow_call_ms * 1000
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        # A heartbeat only shows the server is reachable, not that it keeps up with commands
+        if isinstance(event, monitoring.CommandSucceededEvent):
+            self.breaker.record(event.duration_micros < self.slow_call_micros)
+
+    def failed(self, event):
+        if isinstance(event, monitoring.CommandFailedEvent):
+            failure = event.failure or {}
+            degraded = failure.get("code") in _TIME_LIMIT_CODES or "code" not in failure
+            self.breaker.record(not degraded)
+        else:
+            self.breaker.record(False)
+
+def _is_transient(error: PyMongoError) -> bool:
+    # A timeout means the request's deadline is spent; retrying would only overrun it
+    return isinstance(error, ConnectionFailure) and not error.timeout
+
+async def retry_idempotent_read(
+    read: Callable[[], Awaitable[T]],
+    attempts: int = READ_RETRY_ATTEMPTS,
+    base_delay: float = READ_RETRY_BASE_DELAY
+) -> T:
+    """
+    Run a read that is safe to repeat, retrying transient connection errors
+    (e.g. a failover) with jittered exponential backoff.
+
+    Never use this for writes. Stops early when the backoff would not fit in
+    the request's deadline or the breaker has opened.
+    """
+    for attempt in range(attempts):
+        try:
+            return await read()
+        except PyMongoError as e:
+            delay = random.uniform(0, base_delay * 2 ** attempt)
+            remaining = remaining_seconds()
+            if (
+                attempt == attempts - 1
+                or not _is_transient(e)
+                or database_breaker.state() == OPEN
+                or (remaining is not None and remaining <= delay)
+            ):
+                raise
+            await asyncio.sleep(delay)
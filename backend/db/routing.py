@@ -0,0 +1,78 @@
+import base64
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, List, Optional, Tuple
+
+import bson
+
+# A Motor client session (AsyncIOMotorClientSession)
+ClientSession = Any
+
+PRIMARY_READS = "primary"
+ANALYTICS_READS = "analytics"
+
+# (method, path prefix, read policy), first match wins. Analytics requests read
+# training sessions from secondaries (MONGODB_ANALYTICS_READ_PREFERENCE); everything
+# else, including the reads a write route makes to answer with fresh data (e.g. the
+# progress recalculated after an exercise save), stays on the primary.
+READ_ROUTES: List[Tuple[str, str, str]] = [
+    ("GET", "/api/v1/progress/", ANALYTICS_READS),          # dashboard analytics
+    ("GET", "/api/v1/training/sessions", ANALYTICS_READS),  # history
+]
+
+# Header carrying a causal-consistency token: returned by writes, sent back with
+# analytics reads so a secondary only answers once it has the client's own writes
+READ_AFTER_HEADER = "x-read-after"
+
+_read_policy: ContextVar[str] = ContextVar("read_policy", default=PRIMARY_READS)
+_session: ContextVar[Optional[ClientSession]] = ContextVar("database_session", default=None)
+
+def request_read_policy(method: str, path: str) -> Optional[str]:
+    """Read policy of a request, or None for requests outside the API"""
+    if not path.startswith("/api/"):
+        return None
+    for route_method, prefix, policy in READ_ROUTES:
+        if method == route_method and path.startswith(prefix):
+            return policy
+    return PRIMARY_READS
+
+@contextmanager
+def read_scope(policy: str, session: Optional[ClientSession] = None):
+    """Route the reads in the block by `policy`, running them in `session` when given"""
+    policy_token = _read_policy.set(policy)
+    session_token = _session.set(session)
+    try:
+        yield
+    finally:
+        _session.reset(session_token)
+        _read_policy.reset(policy_token)
+
+def analytics_reads() -> bool:
+    return _read_policy.get() == ANALYTICS_READS
+
+def current_session() -> Optional[ClientSession]:
+    """The request's causally consistent session; None lets the driver use an implicit one"""
+    return _session.get()
+
+def encode_read_token(session: ClientSession) -> Optional[str]:
+    """Token for the latest operation of a session, or None before its first operation"""
+    if session.operation_time is None or session.cluster_time is None:
+        return None
+    document = {"operationTime": session.operation_time, "clusterTime": session.cluster_time}
+    return base64.urlsafe_b64encode(bson.encode(document)).decode()
+
+def apply_read_token(session: ClientSession, token: str) -> bool:
+    """
+    Make the session's reads wait for the operation a token stands for.
+
+    Returns False for tokens that cannot be decoded; the read then goes ahead
+    with bounded staleness only. The cluster time is signed by the server, so a
+    client cannot make up one.
+    """
+    try:
+        document = bson.decode(base64.urlsafe_b64decode(token.encode()))
+        session.advance_cluster_time(document["clusterTime"])
+        session.advance_operation_time(document["operationTime"])
+    except Exception:
+        return False
+    return True
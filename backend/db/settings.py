@@ -0,0 +1,120 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import read_preferences
+
+# Wire compressors pymongo understands; unavailable ones are skipped by the driver with a warning
+SUPPORTED_COMPRESSORS = ("zstd", "snappy", "zlib")
+
+# Read preference modes by their connection-string names
+READ_PREFERENCES = {
+    "primary": read_preferences.Primary,
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+
+# The driver rejects smaller bounds: staleness is only measured every heartbeat plus idle write period
+MIN_MAX_STALENESS_SECONDS = 90
+
+def _int_env(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    if value.lower() in ("none", "off"):
+        return None
+    return int(value)
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """
+    MongoDB client settings, read from MONGODB_* environment variables.
+
+    Timeouts are in milliseconds; None leaves the driver's default (for
+    max_idle_time_ms and wait_queue_timeout_ms that means no limit).
+    """
+
+    uri: Optional[str] = None
+    # Connections each worker keeps open, and warms up before serving
+    min_pool_size: int = 10
+    # Most concurrent operations per worker and server; further checkouts wait in a queue
+    max_pool_size: int = 100
+    # How long a checkout may wait for a free connection before failing
+    wait_queue_timeout_ms: Optional[int] = 2000
+    # Idle connections above min_pool_size are closed after this long
+    max_idle_time_ms: Optional[int] = 300000
+    # How long an operation waits for a suitable server, e.g. during an Atlas failover
+    server_selection_timeout_ms: int = 10000
+    connect_timeout_ms: int = 10000
+    # Preferred wire compressors, in order; the server picks the first it also supports.
+    # zstd is cheap enough to pay off even within a region; zlib only pays off on slow
+    # links (see benchmark_db_compression.py), so it is opt-in
+    compressors: Tuple[str, ...] = ("zstd",)
+    # 1 is fastest, 9 smallest, -1 zlib's default trade-off
+    zlib_compression_level: int = 1
+    # Longest a worker waits for its warm connections before serving anyway (seconds)
+    warmup_timeout_seconds: float = 10.0
+    # Where progress and history reads go; "primary" keeps every read on the primary
+    analytics_read_mode: str = "secondaryPreferred"
+    # Secondaries lagging the primary by more than this are not read from (None: no bound)
+    analytics_max_staleness_seconds: Optional[int] = MIN_MAX_STALENESS_SECONDS
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        defaults = cls()
+        compressors = os.getenv("MONGODB_COMPRESSORS")
+        if compressors is None:
+            compressors = ",".join(defaults.compressors)
+        compressors = tuple(name.strip().lower() for name in compressors.split(",") if name.strip() and name.strip().lower() != "none")
+        unknown = [name for name in compressors if name not in SUPPORTED_COMPRESSORS]
+        if unknown:
+            raise ValueError(f"Unsupported MONGODB_COMPRESSORS: {', '.join(unknown)}")
+
+        analytics_read_mode = os.getenv("MONGODB_ANALYTICS_READ_PREFERENCE", defaults.analytics_read_mode).strip()
+        if analytics_read_mode not in READ_PREFERENCES:
+            raise ValueError(f"Unsupported MONGODB_ANALYTICS_READ_PREFERENCE: {analytics_read_mode}")
+        max_staleness = _int_env("MONGODB_ANALYTICS_MAX_STALENESS_SECONDS", defaults.analytics_max_staleness_seconds)
+        if max_staleness is not None and max_staleness < MIN_MAX_STALENESS_SECONDS:
+            raise ValueError(f"MONGODB_ANALYTICS_MAX_STALENESS_SECONDS must be at least {MIN_MAX_STALENESS_SECONDS}")
+
+        return cls(
+            uri=os.getenv("MONGODB_URI"),
+            min_pool_size=_int_env("MONGODB_MIN_POOL_SIZE", defaults.min_pool_size),
+            max_pool_size=_int_env("MONGODB_MAX_POOL_SIZE", defaults.max_pool_size),
+            wait_queue_timeout_ms=_int_env("MONGODB_WAIT_QUEUE_TIMEOUT_MS", defaults.wait_queue_timeout_ms),
+            max_idle_time_ms=_int_env("MONGODB_MAX_IDLE_TIME_MS", defaults.max_idle_time_ms),
+            server_selection_timeout_ms=_int_env("MONGODB_SERVER_SELECTION_TIMEOUT_MS", defaults.server_selection_timeout_ms),
+            connect_timeout_ms=_int_env("MONGODB_CONNECT_TIMEOUT_MS", defaults.connect_timeout_ms),
+            compressors=compressors,
+            zlib_compression_level=_int_env("MONGODB_ZLIB_COMPRESSION_LEVEL", defaults.zlib_compression_level),
+            warmup_timeout_seconds=float(os.getenv("MONGODB_WARMUP_TIMEOUT_SECONDS", defaults.warmup_timeout_seconds)),
+            analytics_read_mode=analytics_read_mode,
+            analytics_max_staleness_seconds=max_staleness
+        )
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for AsyncIOMotorClient, besides the URI"""
+        kwargs = {
+            "minPoolSize": self.min_pool_size,
+            "maxPoolSize": self.max_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+        }
+        if self.wait_queue_timeout_ms is not None:
+            kwargs["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.max_idle_time_ms is not None:
+            kwargs["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.compressors:
+            kwargs["compressors"] = ",".join(self.compressors)
+            if "zlib" in self.compressors:
+                kwargs["zlibCompressionLevel"] = self.zlib_compression_level
+        return kwargs
+
+    def analytics_read_preference(self) -> read_preferences._ServerMode:
+        """Read preference for the reads of analytics requests (see db/routing.py)"""
+        mode = READ_PREFERENCES[self.analytics_read_mode]
+        if mode is read_preferences.Primary:
+            return mode()
+        return mode(max_staleness=-1 if self.analytics_max_staleness_seconds is None else self.analytics_max_staleness_seconds)
@@ -3,6 +3,7 @@ import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from progress.logic import get_progress_analytics, _analyze_performance_patterns
+from repositories.mongo import MongoRepositories
 import json
 
 # Load environment variables
@@ -55,7 +56,7 @@ async def debug_user_progress():
                             print(f"      Exercise {j+1}: {result.get('exerciseId', 'unknown')} - Score: {result.get('score', 0)}")
                 
                 # Get progress analytics
-                progress = await get_progress_analytics(user_id, db)
+                progress = await get_progress_analytics(user_id, MongoRepositories(db))
                 
                 print(f"\nPROGRESS ANALYTICS:")
                 print(f"  Total Sessions: {progress.total_sessions}")
@@ -111,9 +111,10 @@ async def debug_progress_nonetype_error():
         # Test 5: Full progress analytics
         print('\n5️⃣ Testing full progress analytics...')
         from progress.logic import get_progress_analytics
+        from repositories.mongo import MongoRepositories
         
         try:
-            progress_summary = await get_progress_analytics(user_id, db)
+            progress_summary = await get_progress_analytics(user_id, MongoRepositories(db))
             print(f'   ✅ Full progress analytics completed')
             print(f'     Total sessions: {progress_summary.total_sessions}')
             print(f'     Overall average: {progress_summary.overall_average_score}')
@@ -0,0 +1,38 @@
+# Production server settings, used by serve.py (or `gunicorn -c gunicorn.conf.py main:app`).
+# Every setting can be overridden from the environment.
+import os
+
+# Address to listen on
+bind = os.getenv("SERVER_BIND", "0.0.0.0:8000")
+
+# Async workers each keep a core busy, so one per CPU rather than the 2n+1 used for sync workers
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+# Uvicorn worker with the event loop and HTTP parser chosen by SERVER_LOOP and SERVER_HTTP
+worker_class = "serve.TunedUvicornWorker"
+
+# Import the app once in the arbiter and fork workers from it; connections, caches and
+# background tasks are still created per worker by the lifespan, after the fork
+preload_app = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+
+# Recycle a worker after this many requests (plus up to the jitter, so workers don't
+# restart together) to cap memory growth; 0 disables recycling
+max_requests = int(os.getenv("SERVER_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", max_requests // 10))
+
+# On SIGTERM or a recycle, stop accepting connections and give in-flight requests and the
+# lifespan shutdown (e.g. the write-behind flush) this long before the worker is killed
+graceful_timeout = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+
+# Restart a worker whose event loop has not checked in for this long
+timeout = int(os.getenv("SERVER_TIMEOUT", 60))
+
+# Idle keep-alive connections are held this long; keep it above the load balancer's idle timeout
+keepalive = int(os.getenv("SERVER_KEEPALIVE", 75))
+
+# Pending connections queued by the kernel while all workers are busy
+backlog = int(os.getenv("SERVER_BACKLOG", 2048))
+
+accesslog = os.getenv("SERVER_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("SERVER_LOG_LEVEL", "info")
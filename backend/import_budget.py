@@ -0,0 +1,124 @@
+"""
+Import-time budget for the API.
+
+Imports `main` in fresh interpreters with `-X importtime`, keeps each module's
+fastest cumulative time over several runs, and compares it with the budgets
+in import_budget.json. Modules listed under "lazy" must not be imported by
+`import main` at all; they are loaded on first use or during startup.
+
+    python import_budget.py            # exit status 1 when over budget
+    python import_budget.py --update   # re-record budgets with headroom
+
+The test suite always checks the lazy list; it compares times with the
+budgets only when IMPORT_BUDGET_CHECK=true, on a machine the budgets were
+recorded for.
+"""
+import os
+import sys
+import json
+import math
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budget.json")
+
+# Budgets recorded with --update leave this much room for machine noise
+HEADROOM = 1.5
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """(module, depth, cumulative microseconds) for every line of -X importtime output"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), depth, int(cumulative)))
+    return modules
+
+def imported_by(modules: List[Tuple[str, int, int]], root: str) -> Dict[str, int]:
+    """Cumulative microseconds of `root` and every module first imported beneath it"""
+    # Children are printed before their parent, so walk backwards from the root
+    index = max(i for i, (name, _, _) in enumerate(modules) if name == root)
+    root_depth = modules[index][1]
+    subtree = {root: modules[index][2]}
+    for name, depth, cumulative in reversed(modules[:index]):
+        if depth <= root_depth:
+            break
+        subtree[name] = cumulative
+    return subtree
+
+def measure(root: str = "main", runs: int = 5) -> Dict[str, float]:
+    """Fastest cumulative import time of each module under `root` over several runs, in milliseconds"""
+    fastest: Dict[str, float] = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {root}"],
+            cwd=os.path.dirname(BUDGET_FILE),
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        for name, cumulative in imported_by(parse_importtime(result.stderr), root).items():
+            fastest[name] = min(fastest.get(name, math.inf), cumulative / 1000)
+    return fastest
+
+def load_budget() -> dict:
+    with open(BUDGET_FILE) as budget_file:
+        return json.load(budget_file)
+
+def check(measured: Dict[str, float], budget: dict) -> List[str]:
+    """Every way the measured imports break the budget"""
+    problems = []
+    for name, limit in budget["modules"].items():
+        if measured.get(name, 0) > limit:
+            problems.append(f"{name} took {measured[name]:.0f} ms to import (budget {limit} ms)")
+    for name in budget["lazy"]:
+        eager = sorted(module for module in measured if module == name or module.startswith(name + "."))
+        if eager:
+            problems.append(f"{name} should load lazily but `import main` imported {', '.join(eager[:3])}")
+    return problems
+
+def record(measured: Dict[str, float], budget: dict) -> dict:
+    """New budgets for main and its first-party imports, keeping the lazy list"""
+    first_party = {
+        name.split(".")[0] for name in os.listdir(os.path.dirname(BUDGET_FILE))
+        if name.endswith(".py") or os.path.isdir(os.path.join(os.path.dirname(BUDGET_FILE), name))
+    }
+    modules = {
+        name: int(math.ceil(ms * HEADROOM / 5) * 5)
+        for name, ms in measured.items()
+        if name == "main" or (name.split(".")[0] in first_party and name.count(".") <= 1)
+    }
+    return {"lazy": budget.get("lazy", []), "modules": dict(sorted(modules.items()))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check how long `import main` takes against import_budget.json")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to take the fastest time from")
+    parser.add_argument("--update", action="store_true", help="Re-record the budgets from this machine")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    measured = measure(runs=args.runs)
+    budget = load_budget()
+    for name, ms in sorted(measured.items(), key=lambda item: -item[1])[:args.top]:
+        limit = budget["modules"].get(name)
+        print(f"{ms:8.1f} ms  {name}" + (f"  (budget {limit} ms)" if limit else ""))
+
+    if args.update:
+        with open(BUDGET_FILE, "w") as budget_file:
+            json.dump(record(measured, budget), budget_file, indent=2)
+            budget_file.write("\n")
+        print(f"\nUpdated {BUDGET_FILE}")
+        return
+
+    problems = check(measured, budget)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print("\n✅ Imports are within budget")
+
+if __name__ == "__main__":
+    main()
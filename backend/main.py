@@ -1,5 +1,9 @@
+import time
+_import_started = time.perf_counter()
+
 import os
-import certifi
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -12,11 +16,186 @@ from training.router import router as training_router
 from progress.router import router as progress_router
 from memory_notes.router import router as memory_notes_router
 from check_user_exists import router as check_user_router
+from monitoring.router import router as monitoring_router
+from auth.bulk import shutdown_hash_pool
+from progress.compaction import run_compaction_loop
+from training.archival import run_archival_loop
+from repositories.mongo import MongoRepositories
+from repositories.memory import InMemoryRepositories
+from repositories.caching import CachingUserRepository, BloomFilteredUserRepository
+from repositories.write_behind import WriteBehindResultRepository, WRITE_BEHIND_ENABLED
+from cache.backends import create_cache_backend
+from cache.invalidation import InvalidationBus
+from middleware.rate_limit import RateLimitMiddleware
+from middleware.load_shedding import LoadSheddingMiddleware, load_shedder
+from middleware.deadlines import DeadlineMiddleware
+from middleware.read_routing import ReadRoutingMiddleware
+from middleware.profiling import RequestProfilingMiddleware
+from training.logic import get_exercise_catalog
+from auth.security import get_pwd_context
+from db.pool import PoolMonitor, warm_connection_pool
+from db.settings import DatabaseSettings
+from db.resilience import DatabaseHealthListener, database_breaker
+from monitoring.loop_watchdog import LOOP_WATCHDOG_ENABLED, loop_watchdog
+from monitoring.request_profile import RequestCommandListener
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="MindBloom API", version="1.0.0")
+# MongoDB client
+client = None
+db = None
+
+# Pool sizes, timeouts and wire compression from MONGODB_* settings; the pool is
+# warmed up to min_pool_size before the worker starts serving
+db_settings = DatabaseSettings.from_env()
+pool_monitor = PoolMonitor(max_pool_size=db_settings.max_pool_size)
+
+# Data access used by the routers; "memory" runs the API without MongoDB
+REPOSITORY_BACKEND = os.getenv("REPOSITORY_BACKEND", "mongo").lower()
+repositories = None
+
+# Per-worker read cache, kept coherent across workers by the invalidation bus
+cache = create_cache_backend()
+invalidation_bus = None
+
+# Registered-email Bloom filter in front of the check-user endpoint
+email_filter = None
+
+# Journaled exercise-result buffer, when WRITE_BEHIND_ENABLED
+write_behind = None
+
+# Background maintenance tasks started with the app
+background_tasks = []
+
+# Milliseconds this worker spent importing and in each startup phase, reported by /healthz
+startup_timings = {"imports": round((time.perf_counter() - _import_started) * 1000, 1)}
+
+@contextmanager
+def startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+async def start_services():
+    global client, db, repositories, invalidation_bus, write_behind, email_filter
+
+    # Build the exercise catalog and load the Argon2 backend before the first session start or login
+    with startup_phase("preload"):
+        get_exercise_catalog()
+        get_pwd_context().handler("argon2").get_backend()
+
+    if REPOSITORY_BACKEND == "memory":
+        repositories = InMemoryRepositories()
+        email_filter = BloomFilteredUserRepository(CachingUserRepository(repositories.users, cache))
+        repositories.users = email_filter
+        with startup_phase("email_filter"):
+            await email_filter.rebuild()
+        return
+
+    if db_settings.uri:
+        import certifi  # CA bundle for the TLS connection to Atlas; not needed in memory mode
+        client = AsyncIOMotorClient(
+            db_settings.uri,
+            tlsCAFile=certifi.where(),
+            event_listeners=[pool_monitor, DatabaseHealthListener(), RequestCommandListener()],
+            **db_settings.client_kwargs()
+        )
+        db = client.mindbloom  # Database name
+        # Progress and history reads go to secondaries within MONGODB_ANALYTICS_MAX_STALENESS_SECONDS
+        repositories = MongoRepositories(db, db_settings.analytics_read_preference())
+        email_filter = BloomFilteredUserRepository(CachingUserRepository(repositories.users, cache))
+        repositories.users = email_filter
+
+        with startup_phase("warm_pool"):
+            try:
+                opened = await warm_connection_pool(
+                    client, pool_monitor, db_settings.min_pool_size, db_settings.warmup_timeout_seconds
+                )
+                if opened < db_settings.min_pool_size:
+                    print(f"Warning: Only {opened} of {db_settings.min_pool_size} database connections warmed up")
+            except Exception as e:
+                print(f"Warning: Failed to warm up database connections: {str(e)}")
+
+        with startup_phase("indexes"):
+            try:
+                await repositories.ensure_indexes()
+            except Exception as e:
+                print(f"Warning: Failed to create indexes: {str(e)}")
+
+        # Until the first build succeeds every check-user call goes to the database
+        with startup_phase("email_filter"):
+            try:
+                await email_filter.rebuild()
+            except Exception as e:
+                print(f"Warning: Failed to build email filter: {str(e)}")
+        background_tasks.append(asyncio.create_task(email_filter.run_rebuild_loop()))
+
+        # Acknowledge exercise saves from a local journal and batch them into MongoDB
+        if WRITE_BEHIND_ENABLED:
+            with startup_phase("write_behind"):
+                write_behind = WriteBehindResultRepository(db.training_sessions)
+                repositories.results = write_behind
+                background_tasks.append(await write_behind.start())
+
+        # Fold old completed sessions into monthly buckets
+        if os.getenv("SESSION_COMPACTION_ENABLED", "true").lower() == "true":
+            background_tasks.append(asyncio.create_task(run_compaction_loop(db)))
+
+        # Move abandoned empty sessions out of the hot collection
+        if os.getenv("SESSION_ARCHIVAL_ENABLED", "true").lower() == "true":
+            background_tasks.append(asyncio.create_task(run_archival_loop(db)))
+
+        # Evict cached reads when any worker (or other client) writes
+        if os.getenv("CACHE_INVALIDATION_ENABLED", "true").lower() == "true":
+            invalidation_bus = InvalidationBus(db, cache)
+            invalidation_bus.listeners.append(email_filter.handle_change)
+            background_tasks.append(invalidation_bus.start())
+
+async def stop_services():
+    if write_behind:
+        await write_behind.stop()
+    for task in background_tasks:
+        task.cancel()
+    shutdown_hash_pool()
+    if client:
+        client.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Everything here finishes before the worker accepts its first request
+    with startup_phase("total"):
+        await start_services()
+    phases = ", ".join(f"{name} {ms:.0f} ms" for name, ms in startup_timings.items())
+    print(f"Worker {os.getpid()} ready: {phases}")
+    # Watch for code blocking the event loop once the (deliberately blocking) startup is done
+    if LOOP_WATCHDOG_ENABLED:
+        background_tasks.append(asyncio.create_task(loop_watchdog.run()))
+    yield
+    await stop_services()
+
+app = FastAPI(title="MindBloom API", version="1.0.0", lifespan=lifespan)
+
+# Profile single requests for admins who send X-Profile (innermost, so shed
+# or rejected requests are never profiled)
+app.add_middleware(RequestProfilingMiddleware)
+
+# Send analytics reads to secondaries, and hand out and honour the causal
+# tokens that keep them read-your-writes
+app.add_middleware(ReadRoutingMiddleware)
+
+# Bound each request's database work by its route's deadline, and fail
+# non-critical reads fast while the database is degraded
+app.add_middleware(DeadlineMiddleware)
+
+# Shed low-priority work first when the worker is overloaded
+app.add_middleware(LoadSheddingMiddleware)
+
+# Per-client admission control for auth and lookup endpoints (added before CORS
+# so CORS headers are still applied to 429 and 503 responses)
+app.add_middleware(RateLimitMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -25,26 +204,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Read-After"],  # causal token the frontend sends back with progress reads
 )
 
-# MongoDB client
-client = None
-db = None
-
-@app.on_event("startup")
-async def startup_db_client():
-    global client, db
-    mongodb_uri = os.getenv("MONGODB_URI")
-    if mongodb_uri:
-        client = AsyncIOMotorClient(mongodb_uri, tlsCAFile=certifi.where())
-        db = client.mindbloom  # Database name
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    global client
-    if client:
-        client.close()
-
 @app.get("/healthz")
 async def health_check():
     db_status = "failed"
@@ -59,7 +221,13 @@ async def health_check():
     
     return {
         "status": "ok",
-        "db_connection": db_status
+        "db_connection": db_status,
+        "email_filter": email_filter.stats() if email_filter else None,
+        "load_shedding": load_shedder.stats(),
+        "event_loop": loop_watchdog.stats() if LOOP_WATCHDOG_ENABLED else None,
+        "db_pool": pool_monitor.stats() if client is not None else None,
+        "db_breaker": database_breaker.stats(),
+        "startup": startup_timings
     }
 
 # Include routers
@@ -68,4 +236,5 @@ app.include_router(users_router, prefix="/api/v1/users", tags=["users"])
 app.include_router(training_router, prefix="/api/v1/training", tags=["training"])
 app.include_router(progress_router, prefix="/api/v1/progress", tags=["progress"])
 app.include_router(memory_notes_router, prefix="/api/v1/memory-notes", tags=["memory-notes"])
-app.include_router(check_user_router, prefix="/api/v1", tags=["user-check"])
\ No newline at end of file
+app.include_router(check_user_router, prefix="/api/v1", tags=["user-check"])
+app.include_router(monitoring_router, prefix="/api/v1/admin", tags=["admin"])
\ No newline at end of file
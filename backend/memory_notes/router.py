@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List
 from datetime import datetime
 import uuid
@@ -7,19 +6,19 @@ import uuid
 from models.memory_note import MemoryNote, MemoryNoteCreate, MemoryNoteUpdate
 from models.user import User
 from auth.router import get_current_user
+from responses import TrustedJSONResponse, TrustedModelShape
+from repositories.base import NoteRepository
+from repositories.dependencies import get_note_repository
 
 router = APIRouter()
 
-# Database dependency - will be injected from main.py
-async def get_database() -> AsyncIOMotorDatabase:
-    from main import db
-    return db
+_NOTE_SHAPE = TrustedModelShape(MemoryNote)
 
 @router.post("/", response_model=MemoryNote, status_code=status.HTTP_201_CREATED)
 async def create_memory_note(
     note_data: MemoryNoteCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    notes: NoteRepository = Depends(get_note_repository)
 ):
     """Create a new memory note for the authenticated user"""
     try:
@@ -34,9 +33,9 @@ async def create_memory_note(
         }
         
         # Insert into database
-        result = await db.memory_notes.insert_one(note_doc)
+        inserted_id = await notes.create(note_doc)
         
-        if not result.inserted_id:
+        if not inserted_id:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create memory note"
@@ -59,22 +58,18 @@ async def create_memory_note(
 @router.get("/", response_model=List[MemoryNote])
 async def get_memory_notes(
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    notes: NoteRepository = Depends(get_note_repository)
 ):
     """Retrieve all memory notes for the authenticated user"""
     try:
         # Find all notes for the current user, sorted by creation date (newest first)
-        cursor = db.memory_notes.find({"userId": current_user.id}).sort("createdAt", -1)
-        notes = await cursor.to_list(length=None)
-        
-        # Convert MongoDB documents to MemoryNote models
+        # Shape MongoDB documents as MemoryNote payloads without per-item validation
         memory_notes = []
-        for note_doc in notes:
+        async for note_doc in notes.iter_for_user(current_user.id):
             note_doc["id"] = str(note_doc["_id"])
-            del note_doc["_id"]
-            memory_notes.append(MemoryNote(**note_doc))
+            memory_notes.append(_NOTE_SHAPE.payload(note_doc))
         
-        return memory_notes
+        return TrustedJSONResponse(content=memory_notes)
         
     except Exception as e:
         raise HTTPException(
@@ -86,15 +81,12 @@ async def get_memory_notes(
 async def get_memory_note(
     note_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    notes: NoteRepository = Depends(get_note_repository)
 ):
     """Retrieve a specific memory note by ID"""
     try:
         # Find the note by ID and ensure it belongs to the current user
-        note_doc = await db.memory_notes.find_one({
-            "_id": note_id,
-            "userId": current_user.id
-        })
+        note_doc = await notes.get_for_user(note_id, current_user.id)
         
         if not note_doc:
             raise HTTPException(
@@ -121,7 +113,7 @@ async def update_memory_note(
     note_id: str,
     note_update: MemoryNoteUpdate,
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    notes: NoteRepository = Depends(get_note_repository)
 ):
     """Update an existing memory note"""
     try:
@@ -133,28 +125,13 @@ async def update_memory_note(
         if note_update.content is not None:
             update_doc["content"] = note_update.content
         
-        # Update the note in database (only if it belongs to the current user)
-        result = await db.memory_notes.update_one(
-            {"_id": note_id, "userId": current_user.id},
-            {"$set": update_doc}
-        )
-        
-        if result.matched_count == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Memory note not found"
-            )
-        
-        # Fetch and return updated note
-        updated_note_doc = await db.memory_notes.find_one({
-            "_id": note_id,
-            "userId": current_user.id
-        })
+        # Update the note in database (only if it belongs to the current user) and fetch it back
+        updated_note_doc = await notes.update_for_user(note_id, current_user.id, update_doc)
         
         if not updated_note_doc:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Memory note not found after update"
+                detail="Memory note not found"
             )
         
         # Convert MongoDB document to MemoryNote model
@@ -175,17 +152,14 @@ async def update_memory_note(
 async def delete_memory_note(
     note_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    notes: NoteRepository = Depends(get_note_repository)
 ):
     """Delete an existing memory note"""
     try:
         # Delete the note (only if it belongs to the current user)
-        result = await db.memory_notes.delete_one({
-            "_id": note_id,
-            "userId": current_user.id
-        })
+        deleted = await notes.delete_for_user(note_id, current_user.id)
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Memory note not found"
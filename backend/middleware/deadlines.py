@@ -0,0 +1,79 @@
+import os
+import math
+from typing import Dict, List, Optional, Tuple
+
+from db.resilience import CircuitBreaker, database_breaker, database_deadline
+
+# Deadlines on the database work of each kind of request
+DEADLINES_ENABLED = os.getenv("DEADLINES_ENABLED", "true").lower() == "true"
+
+# Milliseconds every database operation of a request must finish within, shared
+# across all the operations it makes; override with DEADLINE_<NAME>_MS
+DEFAULT_DEADLINES_MS = {
+    "default": 5000,
+    "training": 5000,   # session start, exercise saves, completion
+    "progress": 3000,   # dashboard analytics
+    "history": 3000,    # training history
+    "activity": 3000,   # calendar heatmap
+    "bulk": 120000,     # bulk provisioning hashes and inserts thousands of users
+}
+DEADLINES_MS = {
+    name: float(os.getenv(f"DEADLINE_{name.upper()}_MS", default))
+    for name, default in DEFAULT_DEADLINES_MS.items()
+}
+
+# Reads the app can do without while the database is degraded; they are
+# failed fast instead of adding to its load
+NON_CRITICAL = {"progress", "history", "activity"}
+
+# (method, path prefix, deadline name), first match wins. Unlisted API routes use
+# the default; requests outside /api have no deadline.
+DEADLINE_ROUTES: List[Tuple[str, str, str]] = [
+    ("GET", "/api/v1/training/sessions", "history"),
+    ("POST", "/api/v1/training/", "training"),
+    ("GET", "/api/v1/users/me/activity", "activity"),
+    ("GET", "/api/v1/progress/", "progress"),
+    ("POST", "/api/v1/users/bulk", "bulk"),
+]
+
+def request_deadline(method: str, path: str) -> Optional[str]:
+    """Deadline name of a request, or None for requests without one"""
+    if not path.startswith("/api/"):
+        return None
+    for route_method, prefix, name in DEADLINE_ROUTES:
+        if method == route_method and path.startswith(prefix):
+            return name
+    return "default"
+
+class DeadlineMiddleware:
+    """
+    Gives each API request a deadline that every database operation it makes
+    inherits, and answers non-critical reads with 503 while the database
+    circuit breaker is open.
+    """
+
+    def __init__(self, app, breaker: Optional[CircuitBreaker] = None, deadlines_ms: Optional[Dict[str, float]] = None):
+        self.app = app
+        self.breaker = breaker or database_breaker
+        self.deadlines_ms = deadlines_ms or DEADLINES_MS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not DEADLINES_ENABLED:
+            return await self.app(scope, receive, send)
+
+        name = request_deadline(scope["method"], scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        if name in NON_CRITICAL and not self.breaker.allow():
+            retry_after = max(1, math.ceil(self.breaker.retry_after()))
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"content-type", b"application/json"), (b"retry-after", str(retry_after).encode())]
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Temporarily unavailable, please retry"}'})
+            return
+
+        with database_deadline(self.deadlines_ms.get(name, self.deadlines_ms["default"]) / 1000):
+            await self.app(scope, receive, send)
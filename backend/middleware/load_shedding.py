@@ -0,0 +1,159 @@
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Concurrency limiting with priority classes in front of the API
+LOAD_SHEDDING_ENABLED = os.getenv("LOAD_SHEDDING_ENABLED", "true").lower() == "true"
+# Bounds and starting point of the adaptive concurrency limit (requests in flight per worker)
+LOAD_SHED_INITIAL_LIMIT = float(os.getenv("LOAD_SHED_INITIAL_LIMIT", 64))
+LOAD_SHED_MIN_LIMIT = float(os.getenv("LOAD_SHED_MIN_LIMIT", 8))
+LOAD_SHED_MAX_LIMIT = float(os.getenv("LOAD_SHED_MAX_LIMIT", 512))
+# Latency above which the limit is cut (milliseconds)
+LOAD_SHED_TARGET_LATENCY_MS = float(os.getenv("LOAD_SHED_TARGET_LATENCY_MS", 500))
+# Multiplicative decrease applied at most once per decrease interval
+LOAD_SHED_BACKOFF = float(os.getenv("LOAD_SHED_BACKOFF", 0.9))
+LOAD_SHED_DECREASE_INTERVAL_MS = float(os.getenv("LOAD_SHED_DECREASE_INTERVAL_MS", 100))
+
+HIGH = "high"
+MEDIUM = "medium"
+LOW = "low"
+
+# Share of the concurrency limit each class may fill. Low-priority work is shed
+# once half the limit is in use; training writes can use all of it.
+CLASS_SHARES = {HIGH: 1.0, MEDIUM: 0.8, LOW: 0.5}
+
+# (method, path prefix, class), first match wins. Unlisted API routes are medium;
+# requests outside /api, and routes with no class, are not limited.
+PRIORITY_ROUTES: List[Tuple[str, str, Optional[str]]] = [
+    ("POST", "/api/v1/training/", HIGH),        # session start, exercise saves, completion
+    ("GET", "/api/v1/training/sessions", LOW),  # history
+    ("GET", "/api/v1/users/me/activity", LOW),  # calendar heatmap
+    ("GET", "/api/v1/progress/", MEDIUM),       # dashboard analytics
+    ("POST", "/api/v1/users/bulk", LOW),        # bulk provisioning, can be retried later
+    ("GET", "/api/v1/admin/profile", None),     # runs for seconds by design; must not cut the limit
+]
+
+# (method, path prefix) of routes that are slow by design: an Argon2 hash per login
+# or signup, one per user in a bulk upload. They are still admitted and shed, but
+# their latency says nothing about overload, so it is not fed to the limiter.
+UNSAMPLED_ROUTES: List[Tuple[str, str]] = [
+    ("POST", "/api/v1/auth/login"),
+    ("POST", "/api/v1/auth/signup"),
+    ("POST", "/api/v1/users/bulk"),
+]
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit: additive increase while latency is under the
+    target and the limit is actually being used, multiplicative decrease when
+    it is exceeded.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = LOAD_SHED_INITIAL_LIMIT,
+        min_limit: float = LOAD_SHED_MIN_LIMIT,
+        max_limit: float = LOAD_SHED_MAX_LIMIT,
+        target_latency: float = LOAD_SHED_TARGET_LATENCY_MS / 1000,
+        backoff: float = LOAD_SHED_BACKOFF,
+        decrease_interval: float = LOAD_SHED_DECREASE_INTERVAL_MS / 1000
+    ):
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.decrease_interval = decrease_interval
+        self._last_decrease = float("-inf")
+
+    def on_sample(self, latency: float, inflight: int, now: float):
+        if latency > self.target_latency:
+            # One cut per interval, however many slow requests finish in it
+            if now - self._last_decrease >= self.decrease_interval:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif inflight >= self.limit / 2:
+            # Only grow while the limit is what holds requests back
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+class LoadShedder:
+    """Admission decisions and per-class counters for one worker"""
+
+    def __init__(self, limiter: Optional[AIMDLimiter] = None):
+        self.limiter = limiter or AIMDLimiter()
+        self.inflight = 0
+        self.admitted: Dict[str, int] = {name: 0 for name in CLASS_SHARES}
+        self.rejected: Dict[str, int] = {name: 0 for name in CLASS_SHARES}
+
+    def try_acquire(self, priority: str) -> bool:
+        if self.inflight >= self.limiter.limit * CLASS_SHARES[priority]:
+            self.rejected[priority] += 1
+            return False
+        self.inflight += 1
+        self.admitted[priority] += 1
+        return True
+
+    def release(self, latency: float, sampled: bool = True):
+        self.inflight -= 1
+        if sampled:
+            self.limiter.on_sample(latency, self.inflight + 1, time.monotonic())
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limiter.limit, 1),
+            "inflight": self.inflight,
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected)
+        }
+
+load_shedder = LoadShedder()
+
+def request_priority(method: str, path: str) -> Optional[str]:
+    """Priority class of a request, or None for requests that are never shed"""
+    if not path.startswith("/api/"):
+        return None
+    for route_method, prefix, priority in PRIORITY_ROUTES:
+        if method == route_method and path.startswith(prefix):
+            return priority
+    return MEDIUM
+
+def latency_sampled(method: str, path: str) -> bool:
+    """Whether the request's latency should adjust the concurrency limit"""
+    return not any(method == route_method and path.startswith(prefix) for route_method, prefix in UNSAMPLED_ROUTES)
+
+class LoadSheddingMiddleware:
+    """
+    Rejects requests with 503 when their priority class is over its share of
+    the adaptive concurrency limit, so analytics and history reads are shed
+    before the exercise saves users are waiting on mid-session.
+    """
+
+    def __init__(self, app, shedder: Optional[LoadShedder] = None):
+        self.app = app
+        self.shedder = shedder or load_shedder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not LOAD_SHEDDING_ENABLED:
+            return await self.app(scope, receive, send)
+
+        priority = request_priority(scope["method"], scope["path"])
+        if priority is None:
+            return await self.app(scope, receive, send)
+
+        if not self.shedder.try_acquire(priority):
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"content-type", b"application/json"), (b"retry-after", b"1")]
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Server busy, please retry"}'})
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.release(
+                time.monotonic() - started,
+                sampled=latency_sampled(scope["method"], scope["path"])
+            )
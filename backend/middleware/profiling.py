@@ -0,0 +1,97 @@
+import time
+import asyncio
+import threading
+from typing import Optional
+
+from auth.router import ADMIN_EMAILS
+from auth.security import verify_token
+from monitoring.request_profile import (
+    build_report,
+    new_report_id,
+    recording_commands,
+    store_report
+)
+
+PROFILE_HEADER = b"x-profile"
+
+# cProfile hooks the whole thread, so a worker profiles one request at a time
+_profiling = threading.Lock()
+
+def _admin_email(scope) -> Optional[str]:
+    """Email of the admin the request's bearer token belongs to, if it asks to be profiled"""
+    headers = dict(scope.get("headers", []))
+    if PROFILE_HEADER not in headers:
+        return None
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    email = verify_token(token)
+    return email if email and email.lower() in ADMIN_EMAILS else None
+
+class RequestProfilingMiddleware:
+    """
+    Profiles single API requests that carry an X-Profile header with an admin
+    token; the header is ignored for everyone else.
+
+    The request runs under cProfile with its MongoDB commands recorded. The
+    response carries X-Profile-Report, the ID of the stored report (top
+    functions by cumulative time, every command with its latency, and the
+    raw pstats), and an X-Profile-Summary line. cProfile sees everything the
+    event loop runs meanwhile, so profile on a quiet worker where possible;
+    the command list only ever holds this request's commands.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+
+        email = _admin_email(scope)
+        if email is None:
+            return await self.app(scope, receive, send)
+        if not _profiling.acquire(blocking=False):
+            async def send_busy(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-report", b"busy")]
+                await send(message)
+            return await self.app(scope, receive, send_busy)
+
+        # Only loaded once someone profiles a request
+        import cProfile
+        import pstats
+
+        report_id = new_report_id()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            with recording_commands() as commands:
+                async def send_with_report(message):
+                    if message["type"] == "http.response.start":
+                        # The handler is done once the response starts; the body is just sent
+                        profiler.disable()
+                        duration = time.perf_counter() - started
+                        profile_stats = pstats.Stats(profiler)
+                        report = build_report(
+                            scope["method"], scope["path"], email, duration,
+                            message["status"], profile_stats, commands
+                        )
+                        await asyncio.to_thread(store_report, report_id, report, profile_stats)
+                        mongo = report["mongo"]
+                        summary = f"{report['durationMs']:.1f} ms; {mongo['count']} mongo commands, {mongo['totalMs']:.1f} ms"
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (b"x-profile-report", report_id.encode()),
+                            (b"x-profile-summary", summary.encode())
+                        ]
+                        print(f"Profiled {scope['method']} {scope['path']} for {email}: {summary} (report {report_id})")
+                    await send(message)
+
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send_with_report)
+                finally:
+                    profiler.disable()
+        finally:
+            _profiling.release()
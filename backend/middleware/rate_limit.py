@@ -0,0 +1,162 @@
+import os
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, status
+
+# Admission control for endpoints that cost Argon2 work or a database hit
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Upper bound on tracked clients/accounts per limiter; least recently seen are evicted
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 50000))
+# Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+# Limits are "<requests>/<seconds>": a bucket of <requests> tokens refilled over <seconds>.
+# Each can be overridden with RATE_LIMIT_<NAME>, e.g. RATE_LIMIT_LOGIN_ACCOUNT="5/300"; "off" disables it.
+DEFAULT_LIMITS = {
+    "login": "20/60",            # per IP
+    "login_account": "10/300",   # per email, across IPs
+    "signup": "10/3600",         # per IP
+    "check_user": "60/60",       # per IP
+}
+
+# (method, path) -> limit name; paths ending in "/" match as prefixes
+LIMITED_ROUTES = {
+    ("POST", "/api/v1/auth/login"): "login",
+    ("POST", "/api/v1/auth/signup"): "signup",
+    ("GET", "/api/v1/check-user/"): "check_user",
+}
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by client or account, in bounded memory.
+
+    Buckets live in an LRU map; once it holds `max_keys` entries the least
+    recently seen bucket is dropped, which at worst gives that key a full
+    bucket again.
+    """
+
+    def __init__(self, capacity: float, period: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Take a token for `key`. Returns 0 if allowed, else seconds until a token is available"""
+        if now is None:
+            now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.capacity, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.allowed += 1
+            return 0.0
+        self.rejected += 1
+        return (1 - bucket[0]) / self.refill_rate
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "allowed": self.allowed, "rejected": self.rejected}
+
+def parse_limit(spec: str) -> Optional[Tuple[float, float]]:
+    """"20/60" -> (20, 60); "off" -> None"""
+    if spec.strip().lower() == "off":
+        return None
+    requests, seconds = spec.split("/")
+    return float(requests), float(seconds)
+
+def build_limiters() -> Dict[str, TokenBucketLimiter]:
+    limiters = {}
+    for name, default in DEFAULT_LIMITS.items():
+        limit = parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+        if limit is not None:
+            limiters[name] = TokenBucketLimiter(*limit)
+    return limiters
+
+limiters = build_limiters()
+
+def _retry_after(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+def enforce_account_limit(name: str, account: str):
+    """
+    Per-account limit, checked by handlers once the account is known from the
+    request body or path. Raises 429 when the account's bucket is empty.
+    """
+    limiter = limiters.get(name)
+    if limiter is None or not RATE_LIMIT_ENABLED:
+        return
+    wait = limiter.acquire(account.lower())
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": _retry_after(wait)}
+        )
+
+class RateLimitMiddleware:
+    """
+    Per-IP token-bucket limits for the routes in LIMITED_ROUTES.
+
+    A plain ASGI middleware: requests to other routes cost one dict lookup and a
+    prefix check, and allowed requests one bucket update.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.exact = {}
+        self.prefixes = []
+        for (method, path), name in LIMITED_ROUTES.items():
+            if path.endswith("/"):
+                self.prefixes.append((method, path, name))
+            else:
+                self.exact[(method, path)] = name
+
+    def _limit_name(self, method: str, path: str) -> Optional[str]:
+        name = self.exact.get((method, path))
+        if name is None:
+            for prefix_method, prefix, prefix_name in self.prefixes:
+                if method == prefix_method and path.startswith(prefix):
+                    return prefix_name
+        return name
+
+    def _client_ip(self, scope) -> str:
+        if RATE_LIMIT_TRUST_FORWARDED:
+            for header, value in scope["headers"]:
+                if header == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+
+        name = self._limit_name(scope["method"], scope["path"])
+        limiter = limiters.get(name) if name else None
+        if limiter is not None:
+            wait = limiter.acquire(self._client_ip(scope))
+            if wait:
+                await send({
+                    "type": "http.response.start",
+                    "status": 429,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"retry-after", _retry_after(wait).encode())
+                    ]
+                })
+                await send({"type": "http.response.body", "body": b'{"detail":"Too many requests"}'})
+                return
+
+        await self.app(scope, receive, send)
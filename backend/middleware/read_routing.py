@@ -0,0 +1,67 @@
+from typing import Any, Callable, Optional
+
+from db.routing import (
+    ANALYTICS_READS,
+    READ_AFTER_HEADER,
+    apply_read_token,
+    encode_read_token,
+    read_scope,
+    request_read_policy
+)
+
+class ReadRoutingMiddleware:
+    """
+    Applies the read policy of each API request and carries causal consistency
+    across requests.
+
+    Writes run in a causally consistent session and answer with an X-Read-After
+    token for their last operation. Analytics reads that send the token back
+    run in a session advanced to it, so the secondary they are routed to waits
+    until it has replicated the client's own writes.
+    """
+
+    def __init__(self, app, get_client: Optional[Callable[[], Any]] = None):
+        self.app = app
+        self.get_client = get_client or _main_client
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        policy = request_read_policy(scope["method"], scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+
+        client = self.get_client()
+        is_write = scope["method"] not in ("GET", "HEAD", "OPTIONS")
+        token = _header(scope, READ_AFTER_HEADER) if policy == ANALYTICS_READS else None
+        if client is None or not (is_write or token):
+            with read_scope(policy):
+                return await self.app(scope, receive, send)
+
+        async with await client.start_session(causal_consistency=True) as session:
+            if token:
+                apply_read_token(session, token)
+
+            async def send_with_token(message):
+                if message["type"] == "http.response.start" and is_write:
+                    read_token = encode_read_token(session)
+                    if read_token:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (READ_AFTER_HEADER.encode(), read_token.encode())
+                        ]
+                await send(message)
+
+            with read_scope(policy, session):
+                await self.app(scope, receive, send_with_token)
+
+def _header(scope, name: str) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name.encode():
+            return value.decode("latin-1")
+    return None
+
+def _main_client():
+    # The client is created in the app's lifespan, after the middleware stack is built
+    from main import client
+    return client
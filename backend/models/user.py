@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 
 class UserCreate(BaseModel):
     """Model for user creation (signup)"""
@@ -15,6 +15,18 @@ class UserCreate(BaseModel):
     goals: List[str] = []
     cognitiveAreas: List[str] = []
 
+class BulkProvisionFailure(BaseModel):
+    """A row of a bulk upload that was not registered"""
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class BulkProvisionReport(BaseModel):
+    """Outcome of a bulk upload"""
+    total: int
+    created: int
+    failed: List[BulkProvisionFailure] = []
+
 class UserInDB(BaseModel):
     """Model for user as stored in database"""
     id: str
@@ -48,10 +60,24 @@ class User(BaseModel):
     totalSessions: int = 0
     createdAt: datetime
 
+class ActivityHeatmap(BaseModel):
+    """Model for a user's daily activity over a date range"""
+    start: date
+    end: date
+    bitmap: str  # Base64; bit i (LSB first within each byte) is day start + i
+    activeDays: int
+    currentStreak: int
+    longestStreak: int
+
 class Token(BaseModel):
     """Model for JWT token response"""
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    """Model for exchanging or revoking a refresh token"""
+    refresh_token: str
 
 class TokenData(BaseModel):
     """Model for token data"""
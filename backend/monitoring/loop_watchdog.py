@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+# Continuous event-loop lag measurement, with the blocking stack captured during stalls
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "true").lower() == "true"
+# How often the loop is asked to run the heartbeat (milliseconds)
+LOOP_WATCHDOG_INTERVAL_MS = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", 50))
+# Lag at which the loop counts as stalled and the blocking stack is captured (milliseconds)
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", 100))
+# Stalls kept, with their stacks, for the admin stalls endpoint
+LOOP_STALL_HISTORY = int(os.getenv("LOOP_STALL_HISTORY", 20))
+# Innermost frames kept of each captured stack
+LOOP_STALL_STACK_DEPTH = int(os.getenv("LOOP_STALL_STACK_DEPTH", 12))
+
+# Upper bounds of the lag histogram buckets (milliseconds); larger lags go to "+Inf"
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def format_stack(frame, depth: int = LOOP_STALL_STACK_DEPTH) -> List[str]:
+    """Innermost `depth` frames of a stack as "function (file:line)", outermost first"""
+    entries = traceback.extract_stack(frame)[-depth:]
+    return [f"{entry.name} ({short_path(entry.filename)}:{entry.lineno})" for entry in entries]
+
+def short_path(filename: str) -> str:
+    """File name relative to the backend, or to site-packages for libraries"""
+    if filename.startswith(BACKEND_DIR):
+        return os.path.relpath(filename, BACKEND_DIR)
+    return filename.rsplit("site-packages" + os.sep, 1)[-1]
+
+class LagHistogram:
+    """Counts of event-loop lag samples per bucket"""
+
+    def __init__(self, buckets=LAG_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.samples = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, lag_ms: float):
+        index = next((i for i, bound in enumerate(self.buckets) if lag_ms <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.samples += 1
+        self.total_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    def stats(self) -> dict:
+        labels = [str(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "samples": self.samples,
+            "avgMs": round(self.total_ms / self.samples, 2) if self.samples else 0.0,
+            "maxMs": round(self.max_ms, 1),
+            "bucketsMs": dict(zip(labels, self.counts))
+        }
+
+class LoopWatchdog:
+    """
+    Measures how late the event loop runs a periodic heartbeat, and captures
+    what the loop thread is executing when it stalls.
+
+    Lag can only be measured once the loop is free again, so a separate
+    thread watches the heartbeat and, once it is LOOP_STALL_THRESHOLD_MS
+    overdue, takes the loop thread's stack from sys._current_frames(): the
+    code that is blocking it, caught in the act.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_WATCHDOG_INTERVAL_MS / 1000,
+        threshold: float = LOOP_STALL_THRESHOLD_MS / 1000,
+        history: int = LOOP_STALL_HISTORY
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = LagHistogram()
+        self.stall_histogram = LagHistogram()
+        self.stalls: Deque[Dict] = deque(maxlen=history)
+        self._beat = 0
+        self._last_beat = time.monotonic()
+        self._captured: Dict[int, List[str]] = {}
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+
+    async def run(self):
+        """Heartbeat; runs as a background task on the loop being watched"""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        watcher = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        watcher.start()
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                self._record((now - self._last_beat - self.interval) * 1000)
+                self._last_beat = now
+                self._beat += 1
+        finally:
+            self._stop.set()
+
+    def _record(self, lag_ms: float):
+        lag_ms = max(0.0, lag_ms)
+        self.histogram.observe(lag_ms)
+        stack = self._captured.pop(self._beat, None)
+        if lag_ms < self.threshold * 1000:
+            return
+        self.stall_histogram.observe(lag_ms)
+        self.stalls.append({
+            "at": time.time(),
+            "durationMs": round(lag_ms, 1),
+            "stack": stack or []
+        })
+        if stack:
+            print(f"Warning: Event loop blocked for {lag_ms:.0f} ms in:\n  " + "\n  ".join(stack))
+
+    def _watch(self):
+        # Polls often enough to catch every stall while it is still going on
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue < self.threshold or beat in self._captured:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._captured[beat] = format_stack(frame)
+
+    def stats(self) -> dict:
+        """Lag counters only; safe for the unauthenticated health check"""
+        return {
+            "lag": self.histogram.stats(),
+            "stalls": self.stall_histogram.stats()
+        }
+
+    def recent_stalls(self) -> List[Dict]:
+        """Latest stalls with their blocking stacks, most recent first"""
+        return list(reversed(self.stalls))
+
+loop_watchdog = LoopWatchdog()
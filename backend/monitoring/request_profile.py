@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from pymongo import monitoring
+
+if TYPE_CHECKING:
+    import pstats  # Loaded by the profiling middleware only when a request is profiled
+
+from monitoring.loop_watchdog import BACKEND_DIR, short_path
+
+# Where X-Profile reports are written; shared by the workers of one container
+PROFILE_REPORT_DIR = os.getenv("PROFILE_REPORT_DIR", "/tmp/mindbloom-profiles")
+# Functions listed in a report, by cumulative time
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", 30))
+# Reports kept on disk; the oldest are removed first
+PROFILE_MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", 100))
+
+# Commands of the request being profiled, in the order they were started
+_commands: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("profiled_commands", default=None)
+
+def is_report_id(value: str) -> bool:
+    return len(value) == 32 and all(c in "0123456789abcdef" for c in value)
+
+class RequestCommandListener(monitoring.CommandListener):
+    """
+    Records the MongoDB commands of profiled requests.
+
+    Motor runs each operation with a copy of the caller's context, so the
+    list the profiled request put in the context variable is visible here
+    on the driver's threads, and commands of other requests never are.
+    """
+
+    def started(self, event):
+        commands = _commands.get()
+        if commands is None:
+            return
+        target = event.command.get(event.command_name)
+        commands.append({
+            "requestId": event.request_id,
+            "command": event.command_name,
+            "collection": target if isinstance(target, str) else event.command.get("collection"),
+            "server": f"{event.connection_id[0]}:{event.connection_id[1]}",
+            "durationMs": None,
+            "ok": None
+        })
+
+    def succeeded(self, event):
+        self._finish(event, True)
+
+    def failed(self, event):
+        self._finish(event, False)
+
+    def _finish(self, event, ok: bool):
+        commands = _commands.get()
+        if commands is None:
+            return
+        for command in reversed(commands):
+            if command["requestId"] == event.request_id:
+                command["durationMs"] = round(event.duration_micros / 1000, 2)
+                command["ok"] = ok
+                return
+
+@contextmanager
+def recording_commands():
+    """Collect the commands issued in the block into the list this yields"""
+    commands: List[Dict[str, Any]] = []
+    token = _commands.set(commands)
+    try:
+        yield commands
+    finally:
+        _commands.reset(token)
+
+def top_functions(stats: "pstats.Stats", limit: int = PROFILE_TOP_FUNCTIONS, app_only: bool = False) -> List[Dict[str, Any]]:
+    """The `limit` functions with the most cumulative time, optionally only the backend's own"""
+    entries = [
+        item for item in stats.stats.items()
+        if not app_only or item[0][0].startswith(BACKEND_DIR + os.sep)
+    ]
+    entries = sorted(entries, key=lambda item: -item[1][3])[:limit]
+    return [
+        {
+            "function": f"{name} ({short_path(filename)}:{line})",
+            "calls": calls,
+            "totalMs": round(total * 1000, 2),
+            "cumulativeMs": round(cumulative * 1000, 2)
+        }
+        for (filename, line, name), (_, calls, total, cumulative, _) in entries
+    ]
+
+def command_summary(commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+    by_command: Dict[str, Dict[str, Any]] = {}
+    for command in commands:
+        key = f"{command['command']} {command['collection'] or ''}".strip()
+        entry = by_command.setdefault(key, {"count": 0, "totalMs": 0.0})
+        entry["count"] += 1
+        entry["totalMs"] = round(entry["totalMs"] + (command["durationMs"] or 0), 2)
+    return {
+        "count": len(commands),
+        "totalMs": round(sum(command["durationMs"] or 0 for command in commands), 2),
+        "byCommand": by_command,
+        "commands": [{key: value for key, value in command.items() if key != "requestId"} for command in commands]
+    }
+
+_write_lock = threading.Lock()
+
+def new_report_id() -> str:
+    return uuid.uuid4().hex
+
+def store_report(report_id: str, report: Dict[str, Any], profile_stats: "pstats.Stats"):
+    """Write a report (JSON) and its raw profile (pstats) under PROFILE_REPORT_DIR"""
+    with _write_lock:
+        os.makedirs(PROFILE_REPORT_DIR, exist_ok=True)
+        with open(report_path(report_id), "w") as report_file:
+            json.dump({"id": report_id, **report}, report_file, indent=2)
+        profile_stats.dump_stats(report_path(report_id, ".prof"))
+
+        reports = sorted(
+            (entry for entry in os.scandir(PROFILE_REPORT_DIR) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in reports[:max(0, len(reports) - PROFILE_MAX_REPORTS)]:
+            for suffix in (".json", ".prof"):
+                try:
+                    os.remove(entry.path[:-len(".json")] + suffix)
+                except FileNotFoundError:
+                    pass
+
+def report_path(report_id: str, suffix: str = ".json") -> str:
+    return os.path.join(PROFILE_REPORT_DIR, f"{report_id}{suffix}")
+
+def build_report(method: str, path: str, email: str, duration: float, status: Optional[int],
+                 profile_stats: "pstats.Stats", commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "at": time.time(),
+        "method": method,
+        "path": path,
+        "user": email,
+        "status": status,
+        "durationMs": round(duration * 1000, 2),
+        # Framework and middleware wrappers top the full list; the backend's own code is listed apart
+        "functions": top_functions(profile_stats),
+        "appFunctions": top_functions(profile_stats, app_only=True),
+        "mongo": command_summary(commands)
+    }
@@ -0,0 +1,73 @@
+import os
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from auth.router import get_admin_user
+from models.user import User
+from monitoring.loop_watchdog import LOOP_WATCHDOG_ENABLED, loop_watchdog
+from monitoring.sampler import PROFILER_MAX_SECONDS, PROFILER_INTERVAL_MS, StackSampler, profile_lock
+from monitoring.request_profile import is_report_id, report_path
+
+router = APIRouter()
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(PROFILER_INTERVAL_MS, ge=1, le=1000),
+    include_idle: bool = False,
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Sample the stacks of every thread in the worker that serves this request
+    for `seconds`, and return them collapsed for flamegraph.pl or speedscope.
+    """
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running in this worker"
+        )
+    sampler = StackSampler(interval=interval_ms / 1000, include_idle=include_idle)
+    try:
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+    finally:
+        profile_lock.release()
+
+    stats = sampler.stats()
+    print(f"Profiled worker for {admin.email}: {stats['samples']} samples, {stats['overheadPercent']}% overhead")
+    return PlainTextResponse(sampler.collapsed(), headers={
+        "X-Profile-Samples": str(stats["samples"]),
+        "X-Profile-Seconds": str(stats["seconds"]),
+        "X-Profile-Overhead-Percent": str(stats["overheadPercent"])
+    })
+
+@router.get("/stalls")
+async def get_loop_stalls(admin: User = Depends(get_admin_user)):
+    """Recent event-loop stalls of this worker, with the stack that blocked the loop"""
+    if not LOOP_WATCHDOG_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event loop watchdog is disabled")
+    return {**loop_watchdog.stats(), "recentStalls": loop_watchdog.recent_stalls()}
+
+def _stored_report(report_id: str, suffix: str) -> str:
+    path = report_path(report_id, suffix)
+    if not is_report_id(report_id) or not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile report not found")
+    return path
+
+@router.get("/profiles/{report_id}")
+async def get_request_profile(report_id: str, admin: User = Depends(get_admin_user)):
+    """Report of a request profiled with the X-Profile header"""
+    return FileResponse(_stored_report(report_id, ".json"), media_type="application/json")
+
+@router.get("/profiles/{report_id}/pstats")
+async def get_request_profile_stats(report_id: str, admin: User = Depends(get_admin_user)):
+    """Raw cProfile data of a profiled request, for pstats, snakeviz or gprof2dot"""
+    return FileResponse(
+        _stored_report(report_id, ".prof"),
+        media_type="application/octet-stream",
+        filename=f"{report_id}.prof"
+    )
@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from types import CodeType
+from typing import Dict, Optional
+
+from monitoring.loop_watchdog import short_path
+
+# Longest profile one request may ask for (seconds)
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", 60))
+# Target time between samples (milliseconds); stretched when sampling gets expensive
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", 10))
+# Largest share of the worker's time the sampler may take
+PROFILER_MAX_OVERHEAD = float(os.getenv("PROFILER_MAX_OVERHEAD", 0.02))
+
+# Innermost Python frames of threads that are waiting rather than working
+# (the idle event loop, idle driver and executor threads), by file and function
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+def _frame_name(code) -> str:
+    # co_qualname (with the class name) exists from Python 3.11
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({short_path(code.co_filename)})".replace(";", ":")
+
+class StackSampler:
+    """
+    Statistical profiler over every thread of the worker.
+
+    A background thread snapshots sys._current_frames() at a fixed interval
+    and counts each thread's stack in collapsed form ("thread;outer;...;inner"),
+    the input flamegraph.pl and speedscope take. Each snapshot holds the GIL
+    briefly; the interval is stretched whenever snapshots would take more
+    than `max_overhead` of the worker's time.
+    """
+
+    def __init__(
+        self,
+        interval: float = PROFILER_INTERVAL_MS / 1000,
+        max_overhead: float = PROFILER_MAX_OVERHEAD,
+        include_idle: bool = False
+    ):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.elapsed_seconds = 0.0
+        self._names: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        started = time.perf_counter()
+        own_id = threading.get_ident()
+        while True:
+            sample_started = time.perf_counter()
+            self._sample(own_id)
+            cost = time.perf_counter() - sample_started
+            self.sampling_seconds += cost
+            self.samples += 1
+            # cost / (cost + pause) stays within max_overhead
+            pause = max(self.interval - cost, cost * (1 / self.max_overhead - 1))
+            if self._stop.wait(pause):
+                break
+        self.elapsed_seconds = time.perf_counter() - started
+
+    def _sample(self, own_id: int):
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                name = self._names.get(code)
+                if name is None:
+                    name = self._names[code] = _frame_name(code)
+                names.append(name)
+                frame = frame.f_back
+            names.append(thread_names.get(thread_id, f"thread-{thread_id}").replace(";", ":"))
+            self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        """One "stack count" line per distinct stack, most frequent first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def stats(self) -> dict:
+        elapsed = self.elapsed_seconds or 1e-9
+        return {
+            "samples": self.samples,
+            "seconds": round(self.elapsed_seconds, 2),
+            "overheadPercent": round(self.sampling_seconds / elapsed * 100, 2)
+        }
+
+# Only one profile runs per worker at a time; overlapping samplers would skew each other
+profile_lock = threading.Lock()
@@ -0,0 +1,253 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from collections import defaultdict
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from progress.logic import bucket_aggregates
+
+# Completed sessions older than this are folded into monthly buckets
+COMPACTION_AGE_DAYS = int(os.getenv("SESSION_COMPACTION_AGE_DAYS", 90))
+# How often the background compactor wakes up (seconds)
+COMPACTION_INTERVAL_SECONDS = int(os.getenv("SESSION_COMPACTION_INTERVAL_SECONDS", 3600))
+# Upper bound on raw sessions folded per compaction pass
+COMPACTION_BATCH_SIZE = int(os.getenv("SESSION_COMPACTION_BATCH_SIZE", 5000))
+
+BUCKET_COLLECTION = "session_buckets"
+# Bumped whenever the aggregates change; older buckets are read session by session
+BUCKET_VERSION = 2
+# Top-level aggregate fields of version 1 buckets, removed when a bucket is rewritten
+LEGACY_AGGREGATE_FIELDS = ("scoreSum", "scoreCount", "bestScore", "totalTimeSpent", "areas")
+
+def bucket_id(user_id: str, month_key: str) -> str:
+    """Bucket documents are keyed by user and calendar month, e.g. '<userId>:2025-03'"""
+    return f"{user_id}:{month_key}"
+
+def compact_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a raw training session to the fields analytics read.
+
+    Exercise results are stored as compact [exerciseId, score, timeSpent] arrays
+    and the embedded exercise catalog entries are dropped.
+    """
+    return {
+        "sessionId": str(session["_id"]),
+        "mood": session.get("mood"),
+        "focusAreas": session.get("focusAreas", []),
+        "averageScore": session.get("averageScore"),
+        "createdAt": session.get("createdAt"),
+        "completedAt": session.get("completedAt"),
+        "results": [
+            [result.get("exerciseId"), result.get("score"), result.get("timeSpent", 0)]
+            for result in session.get("exerciseResults") or []
+        ]
+    }
+
+def expand_compacted_session(entry: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    """Turn a compacted bucket entry back into a session-shaped document"""
+    return {
+        "_id": entry["sessionId"],
+        "userId": user_id,
+        "mood": entry.get("mood"),
+        "focusAreas": entry.get("focusAreas", []),
+        "exercises": [],
+        "exerciseResults": [
+            {"exerciseId": exercise_id, "score": score, "timeSpent": time_spent}
+            for exercise_id, score, time_spent in entry.get("results", [])
+        ],
+        "averageScore": entry.get("averageScore"),
+        "isComplete": True,
+        "createdAt": entry.get("createdAt"),
+        "completedAt": entry.get("completedAt")
+    }
+
+async def ensure_bucket_indexes(db: AsyncIOMotorDatabase):
+    """Create the indexes the compactor and bucket readers rely on"""
+    await db[BUCKET_COLLECTION].create_index([("userId", 1), ("monthStart", 1)])
+    await db.training_sessions.create_index([("isComplete", 1), ("createdAt", 1)])
+
+async def _fold_into_bucket(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    month_key: str,
+    sessions: List[Dict[str, Any]]
+) -> int:
+    """
+    Fold one user's sessions for one month into its bucket, then delete the raw documents.
+    Returns the number of sessions folded.
+
+    The month's aggregates are recomputed from all of its entries, so buckets
+    written before a change to the aggregates are brought up to date too.
+    """
+    target_id = bucket_id(user_id, month_key)
+
+    # Skip sessions a previous (possibly interrupted) pass already folded
+    existing = await db[BUCKET_COLLECTION].find_one({"_id": target_id}, {"sessions": 1, "sessionCount": 1})
+    existing_entries = existing.get("sessions", []) if existing else []
+    already_folded = {entry["sessionId"] for entry in existing_entries}
+    pending = [session for session in sessions if str(session["_id"]) not in already_folded]
+
+    if pending:
+        entries = sorted(
+            existing_entries + [compact_session(session) for session in pending],
+            key=lambda entry: entry["createdAt"]
+        )
+        fields = {
+            "sessions": entries,
+            "sessionIds": [entry["sessionId"] for entry in entries],
+            "sessionCount": len(entries),
+            "aggregates": bucket_aggregates([expand_compacted_session(entry, user_id) for entry in entries]),
+            "version": BUCKET_VERSION,
+            "lastCreatedAt": entries[-1]["createdAt"],
+            "updatedAt": datetime.utcnow()
+        }
+
+        if existing is None:
+            year, month = (int(part) for part in month_key.split("-"))
+            try:
+                await db[BUCKET_COLLECTION].insert_one({
+                    "_id": target_id,
+                    "userId": user_id,
+                    "month": month_key,
+                    "monthStart": datetime(year, month, 1),
+                    **fields
+                })
+                written = True
+            except DuplicateKeyError:
+                written = False
+        else:
+            # Only replace the bucket as it was read, so two workers racing on it
+            # never overwrite each other's sessions
+            result = await db[BUCKET_COLLECTION].update_one(
+                {"_id": target_id, "sessionCount": existing.get("sessionCount", len(existing_entries))},
+                {"$set": fields, "$unset": {field: "" for field in LEGACY_AGGREGATE_FIELDS}}
+            )
+            written = result.matched_count == 1
+
+        if not written:
+            # Another compactor folded into this bucket first; the next pass picks up the rest
+            print(f"Compaction race on bucket {target_id}, deferring to next pass")
+            return 0
+
+    await db.training_sessions.delete_many({"_id": {"$in": [session["_id"] for session in sessions]}})
+    return len(sessions)
+
+async def compact_sessions(
+    db: AsyncIOMotorDatabase,
+    older_than_days: int = COMPACTION_AGE_DAYS,
+    user_id: Optional[str] = None,
+    batch_size: int = COMPACTION_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    Fold completed sessions older than `older_than_days` into monthly bucket documents.
+
+    Args:
+        db: MongoDB database connection
+        older_than_days: Minimum session age before it is compacted
+        user_id: Restrict compaction to a single user (all users when None)
+        batch_size: Maximum number of raw sessions processed in this pass
+
+    Returns:
+        Dict with the number of sessions folded and buckets touched
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    query: Dict[str, Any] = {"isComplete": True, "createdAt": {"$lt": cutoff}}
+    if user_id is not None:
+        query["userId"] = user_id
+
+    cursor = db.training_sessions.find(query, {"exercises": 0}).sort(
+        [("userId", 1), ("createdAt", 1)]
+    ).limit(batch_size)
+
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+    async for session in cursor:
+        month_key = session["createdAt"].strftime("%Y-%m")
+        groups[(session["userId"], month_key)].append(session)
+
+    folded = 0
+    for (group_user_id, month_key), sessions in groups.items():
+        try:
+            folded += await _fold_into_bucket(db, group_user_id, month_key, sessions)
+        except Exception as e:
+            # One bad bucket must not hold up every other user's compaction
+            print(f"Warning: Failed to compact bucket {bucket_id(group_user_id, month_key)}: {str(e)}")
+
+    return {"sessions_compacted": folded, "buckets_updated": len(groups)}
+
+async def iter_bucketed_sessions(
+    user_id: str,
+    db: AsyncIOMotorDatabase,
+    newest_first: bool = False,
+    session=None
+):
+    """
+    Yield the compacted sessions of a user as session-shaped documents,
+    reading one bucket document per month.
+    """
+    direction = -1 if newest_first else 1
+    cursor = db[BUCKET_COLLECTION].find(
+        {"userId": user_id},
+        {"sessions": 1},
+        session=session
+    ).sort("monthStart", direction)
+    async for bucket in cursor:
+        entries = bucket.get("sessions", [])
+        if newest_first:
+            entries = reversed(entries)
+        for entry in entries:
+            yield expand_compacted_session(entry, user_id)
+
+async def iter_compacted_months(
+    user_id: str,
+    db: AsyncIOMotorDatabase,
+    expand_since: Optional[datetime] = None,
+    session=None
+):
+    """
+    Yield a user's compacted months oldest first, each as one item holding the
+    month's aggregates, keyed by the start of the month.
+
+    Months with sessions from `expand_since` on, and buckets written before the
+    current aggregates, are yielded as their sessions instead; only those
+    months' session arrays leave the server.
+    """
+    expand = {"$ne": ["$version", BUCKET_VERSION]}
+    if expand_since is not None:
+        expand = {"$or": [expand, {"$gte": ["$lastCreatedAt", expand_since]}]}
+    cursor = db[BUCKET_COLLECTION].find(
+        {"userId": user_id},
+        {
+            "monthStart": 1,
+            "sessionIds": 1,
+            "aggregates": 1,
+            "sessions": {"$cond": [expand, "$sessions", "$$REMOVE"]}
+        },
+        session=session
+    ).sort("monthStart", 1)
+    async for bucket in cursor:
+        if "sessions" in bucket:
+            for entry in bucket["sessions"]:
+                yield expand_compacted_session(entry, user_id)
+        else:
+            yield {
+                "_id": bucket["_id"],
+                "createdAt": bucket["monthStart"],
+                "sessionIds": bucket.get("sessionIds", []),
+                "aggregates": bucket["aggregates"]
+            }
+
+async def run_compaction_loop(db: AsyncIOMotorDatabase, interval_seconds: int = COMPACTION_INTERVAL_SECONDS):
+    """Background task: periodically compact old sessions until cancelled"""
+    await ensure_bucket_indexes(db)
+    while True:
+        try:
+            stats = await compact_sessions(db)
+            if stats["sessions_compacted"]:
+                print(f"Session compaction: {stats}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warning: Session compaction pass failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
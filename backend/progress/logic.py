@@ -1,36 +1,51 @@
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from collections import defaultdict
-import statistics
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterator
+from collections import defaultdict, deque
 
 from models.progress import ProgressSummary, FocusAreaAnalytics, PerformanceTrend
+from repositories.base import Repositories
+from cache.backends import CacheBackend
+from cache.invalidation import progress_key
+from users.activity import current_streak as streak_as_of
 
-async def get_progress_analytics(user_id: str, db: AsyncIOMotorDatabase) -> ProgressSummary:
+async def get_progress_analytics(
+    user_id: str,
+    repos: Repositories,
+    pending_session: Optional[Dict[str, Any]] = None
+) -> ProgressSummary:
     """
-    Fetch all training sessions for the given user_id from MongoDB and
+    Stream all training sessions for the given user_id from the session repository and
     aggregate the data to calculate performance trends and analytics.
     
+    Sessions are consumed one at a time by fixed-size accumulators, so peak
+    memory does not grow with the length of the user's history. Compacted
+    months outside the trend window arrive as precomputed aggregates and are
+    added in one step, so their cost grows with months rather than sessions.
+    
     Args:
         user_id: The ID of the user to get analytics for
-        db: MongoDB database connection
+        repos: Data repositories
+        pending_session: A session whose latest results may not be written yet; used
+            in place of the stored copy
         
     Returns:
         ProgressSummary: Compiled analytics data
     """
     
-    # Fetch all training sessions for the user that have exercise data
-    # Include both completed sessions AND sessions with exercise results (handles incomplete sessions)
-    cursor = db.training_sessions.find({
-        "userId": user_id
-    }).sort("createdAt", 1)  # Sort by creation date ascending
-    sessions = []
-    async for session in cursor:
-        # Include sessions that are either complete OR have exercise results
-        if session.get("isComplete", False) or session.get("exerciseResults", []):
-            sessions.append(session)
-    
-    if not sessions:
+    summary = _SummaryAccumulator()
+    focus_areas = _FocusAreaAccumulator()
+    trend = _PerformanceTrendAccumulator(days=30)
+    
+    async for session in iter_analytics_sessions(user_id, repos, pending_session, trend.cutoff_date):
+        if "aggregates" in session:
+            summary.add_aggregates(session["aggregates"]["summary"])
+            focus_areas.add_aggregates(session["aggregates"]["areas"])
+            continue
+        summary.add(session)
+        focus_areas.add(session)
+        trend.add(session)
+    
+    if summary.total_sessions == 0:
         # Return empty analytics if no sessions found
         return ProgressSummary(
             user_id=user_id,
@@ -46,316 +61,461 @@ async def get_progress_analytics(user_id: str, db: AsyncIOMotorDatabase) -> Prog
             generated_at=datetime.utcnow()
         )
     
-    # Calculate basic statistics with robust None handling
-    total_sessions = len(sessions)
-    all_scores = []
-    for session in sessions:
-        avg_score = session.get("averageScore")
-        if avg_score is not None and isinstance(avg_score, (int, float)) and not (isinstance(avg_score, float) and (avg_score != avg_score)):  # Check for NaN
-            all_scores.append(float(avg_score))
-    
-    overall_average_score = statistics.mean(all_scores) if all_scores else 0.0
-    best_session_score = max(all_scores) if all_scores else 0.0
-    
-    # Calculate total time spent
-    total_time_spent = 0
-    for session in sessions:
-        if session.get("exerciseResults"):
-            for result in session["exerciseResults"]:
-                total_time_spent += result.get("timeSpent", 0)
-    
     # Get current streak from user document
-    user_doc = await db.users.find_one({"_id": user_id})
-    current_streak = user_doc.get("streak", 0) if user_doc else 0
+    user_doc = await repos.users.get_by_id(user_id)
+    current_streak = streak_as_of(user_doc, datetime.utcnow())
     
     # Calculate focus area analytics
-    focus_areas_analytics = await _calculate_focus_area_analytics(sessions, db)
-    
-    # Calculate recent performance trend (last 30 days)
-    recent_performance_trend = _calculate_performance_trend(sessions, days=30)
+    focus_areas_analytics = focus_areas.results()
     
     # Determine improvement areas and strengths
     improvement_areas, strengths = _analyze_performance_patterns(focus_areas_analytics)
 
     return ProgressSummary(
         user_id=user_id,
-        total_sessions=total_sessions,
+        total_sessions=summary.total_sessions,
         current_streak=current_streak,
-        overall_average_score=overall_average_score,
-        best_session_score=best_session_score,
-        total_time_spent=total_time_spent,
+        overall_average_score=summary.overall_average_score,
+        best_session_score=summary.best_session_score,
+        total_time_spent=summary.total_time_spent,
         focus_areas_analytics=focus_areas_analytics,
-        recent_performance_trend=recent_performance_trend,
+        recent_performance_trend=trend.results(),
         improvement_areas=improvement_areas,
         strengths=strengths,
         generated_at=datetime.utcnow()
     )
 
-async def _calculate_focus_area_analytics(sessions: List[Dict[str, Any]], db: AsyncIOMotorDatabase) -> List[FocusAreaAnalytics]:
-    """Calculate analytics for each focus area"""
-    
-    # Exercise to focus area mapping
-    exercise_to_area_map = {
-        # Memory exercises
-        'memory_sequence': 'memory',
-        'word_pairs': 'memory',
-        'visual_recall': 'memory',
-        'working_memory': 'memory',
-        # Attention exercises
-        'attention': 'attention',  # Blue circle attention exercise
-        'divided_attention': 'attention',
-        'sustained_attention': 'attention',
-        'selective_attention': 'attention',
-        # Perception exercises
-        'focused_attention': 'perception',
-        'pattern_recognition': 'perception',
-        'visual_perception': 'perception',
-        # Language exercises
-        'word_finding': 'language',
-        'sentence_completion': 'language',
-        'verbal_fluency': 'language',
-        'reading_comprehension': 'language',
-        'conversation': 'language',  # Conversation exercise
-        # Executive exercises
-        'planning_task': 'executive',
-        'cognitive_flexibility': 'executive',
-        'inhibition_control': 'executive',
-        'task_switching': 'executive',
-        'sequencing': 'executive',  # Sequencing exercise
-        # Processing Speed exercises
-        'speed_processing': 'processing',
-        'rapid_naming': 'processing',
-        'symbol_coding': 'processing',
-        # Spatial Reasoning exercises
-        'spatial_rotation': 'spatial',
-        'mental_rotation': 'spatial',
-        'spatial_navigation': 'spatial',
-        'block_design': 'spatial',
-        # Creativity exercises
-        'creative_thinking': 'creativity',
-        'divergent_thinking': 'creativity',
-        'idea_generation': 'creativity',
-        'creative_problem_solving': 'creativity',
-        'alternative_uses': 'creativity',
-        'musical_creativity': 'creativity',
-        'story_creation': 'creativity',
-        # General Cognitive exercises
-        'general_cognitive': 'general',
-        'cognitive_assessment': 'general',
-        'brain_training': 'general',
-        'mindful_breathing': 'general',
-        'cognitive_warm_up': 'general',
-        'mental_flexibility': 'general'
-    }
-    
-    # Group exercise results by focus areas
-    focus_area_data = defaultdict(list)
+async def iter_analytics_sessions(
+    user_id: str,
+    repos: Repositories,
+    pending_session: Optional[Dict[str, Any]] = None,
+    expand_since: Optional[datetime] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield the user's analytics-relevant sessions in chronological order.
     
+    Compacted months come from monthly buckets, as one item carrying the month's
+    "aggregates" or, for months reaching `expand_since`, as their sessions. They
+    are merged by createdAt with raw sessions, which are filtered and projected
+    server-side.
+    """
+    compacted = repos.sessions.iter_compacted_months(user_id, expand_since)
+    raw_sessions = repos.sessions.iter_for_analytics(user_id)
+    if pending_session is not None:
+        raw_sessions = _with_pending_session(raw_sessions, pending_session)
+    
+    # A month's aggregates sort at the start of the month, ahead of any of its sessions
+    # still in training_sessions because the compactor is mid-pass
+    folded_ids = set()
+    async for session in merge_sessions_by_created_at(compacted, raw_sessions):
+        if "aggregates" in session:
+            folded_ids = set(session["sessionIds"])
+        elif str(session["_id"]) in folded_ids:
+            continue
+        yield session
+
+def bucket_aggregates(sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Summary and focus-area aggregates of a month of sessions (oldest first), built
+    with the accumulators analytics use so a compacted month can be added in one step
+    """
+    summary = _SummaryAccumulator()
+    focus_areas = _FocusAreaAccumulator()
     for session in sessions:
-        session_date = session.get("createdAt")
-        exercise_results = session.get("exerciseResults", [])
-        session_focus_areas = session.get("focusAreas", [])
-        
-        if not exercise_results or not session_focus_areas:
-            # Fallback to session average if no individual results or focus areas
-            session_score = session.get("averageScore", 0.0)
-            for area in session_focus_areas:
-                focus_area_data[area].append({
-                    "score": session_score,
-                    "date": session_date
-                })
+        summary.add(session)
+        focus_areas.add(session)
+    return {"summary": summary.aggregates(), "areas": focus_areas.aggregates()}
+
+async def _with_pending_session(
+    raw_sessions: AsyncIterator[Dict[str, Any]],
+    pending_session: Dict[str, Any]
+) -> AsyncIterator[Dict[str, Any]]:
+    """Raw sessions with `pending_session` merged in place of its stored copy"""
+    pending_id = str(pending_session["_id"])
+    
+    async def stored():
+        async for session in raw_sessions:
+            if str(session["_id"]) != pending_id:
+                yield session
+    
+    async def pending():
+        yield pending_session
+    
+    async for session in _merge_by_created_at(stored(), pending()):
+        yield session
+
+async def merge_sessions_by_created_at(
+    compacted: AsyncIterator[Dict[str, Any]],
+    raw: AsyncIterator[Dict[str, Any]],
+    newest_first: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Merge compacted and raw session streams, both sorted by createdAt (oldest
+    first, or newest first when `newest_first`), without buffering either.
+    
+    A session may briefly exist in both places while the compactor is mid-pass; duplicates
+    share a createdAt, so only ids seen at the current timestamp need remembering.
+    """
+    current_timestamp = None
+    ids_at_timestamp = set()
+    async for session in _merge_by_created_at(compacted, raw, newest_first):
+        created_at = session.get("createdAt")
+        if created_at != current_timestamp:
+            current_timestamp = created_at
+            ids_at_timestamp = set()
+        session_id = str(session["_id"])
+        if session_id in ids_at_timestamp:
             continue
+        ids_at_timestamp.add(session_id)
+        yield session
+
+async def _merge_by_created_at(
+    first: AsyncIterator[Dict[str, Any]],
+    second: AsyncIterator[Dict[str, Any]],
+    newest_first: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """Merge two createdAt-sorted async streams without buffering either"""
+    def sort_key(session: Optional[Dict[str, Any]]) -> datetime:
+        return session.get("createdAt") or datetime.min
+    
+    def first_goes_next(first_item: Dict[str, Any], second_item: Dict[str, Any]) -> bool:
+        if newest_first:
+            return sort_key(first_item) >= sort_key(second_item)
+        return sort_key(first_item) <= sort_key(second_item)
+    
+    first_iter = first.__aiter__()
+    second_iter = second.__aiter__()
+    first_item = await _next_or_none(first_iter)
+    second_item = await _next_or_none(second_iter)
+    
+    while first_item is not None or second_item is not None:
+        if second_item is None or (first_item is not None and first_goes_next(first_item, second_item)):
+            yield first_item
+            first_item = await _next_or_none(first_iter)
+        else:
+            yield second_item
+            second_item = await _next_or_none(second_iter)
+
+async def _next_or_none(iterator) -> Optional[Dict[str, Any]]:
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
+
+def _valid_score(value: Any) -> Optional[float]:
+    """Return the value as a float if it is a real number, otherwise None (handles None and NaN)"""
+    if value is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if isinstance(value, float) and value != value:  # Check for NaN
+        return None
+    return float(value)
+
+def _normalize_exercise_score(raw_score: Any) -> float:
+    """Robust score handling - ensure we have a valid numeric value"""
+    if isinstance(raw_score, str):
+        try:
+            raw_score = float(raw_score)
+        except (ValueError, TypeError):
+            return 0.0
+    score = _valid_score(raw_score)
+    return score if score is not None else 0.0
+
+class _SummaryAccumulator:
+    """Session count, average/best session score and total time spent"""
+    
+    def __init__(self):
+        self.total_sessions = 0
+        self.total_time_spent = 0
+        self._score_sum = 0.0
+        self._score_count = 0
+        self._best_score = None
+    
+    def add(self, session: Dict[str, Any]):
+        self.total_sessions += 1
+        avg_score = _valid_score(session.get("averageScore"))
+        if avg_score is not None:
+            self._score_sum += avg_score
+            self._score_count += 1
+            self._best_score = avg_score if self._best_score is None else max(self._best_score, avg_score)
+        for result in session.get("exerciseResults") or []:
+            self.total_time_spent += result.get("timeSpent", 0) or 0
+    
+    def add_aggregates(self, aggregates: Dict[str, Any]):
+        """Add the totals of many sessions at once, as produced by aggregates()"""
+        self.total_sessions += aggregates["sessionCount"]
+        self.total_time_spent += aggregates["totalTimeSpent"]
+        self._score_sum += aggregates["scoreSum"]
+        self._score_count += aggregates["scoreCount"]
+        best_score = aggregates["bestScore"]
+        if best_score is not None:
+            self._best_score = best_score if self._best_score is None else max(self._best_score, best_score)
+    
+    def aggregates(self) -> Dict[str, Any]:
+        return {
+            "sessionCount": self.total_sessions,
+            "totalTimeSpent": self.total_time_spent,
+            "scoreSum": self._score_sum,
+            "scoreCount": self._score_count,
+            "bestScore": self._best_score
+        }
+    
+    @property
+    def overall_average_score(self) -> float:
+        return self._score_sum / self._score_count if self._score_count else 0.0
+    
+    @property
+    def best_session_score(self) -> float:
+        return self._best_score if self._best_score is not None else 0.0
+
+# Exercise groupings used to attribute individual exercise scores to a focus area
+_MEMORY_EXERCISES = ['memory_sequence', 'word_pairs', 'visual_recall', 'working_memory']
+_LANGUAGE_EXERCISES = ['conversation', 'word_finding', 'sentence_completion', 'verbal_fluency', 'reading_comprehension']
+_EXECUTIVE_EXERCISES = ['sequencing', 'planning_task', 'cognitive_flexibility', 'inhibition_control', 'task_switching']
+_ATTENTION_EXERCISES = ['attention', 'divided_attention', 'sustained_attention', 'selective_attention']
+_PROCESSING_EXERCISES = ['speed_processing', 'rapid_naming', 'symbol_coding']
+_CREATIVITY_EXERCISES = ['creative_thinking', 'divergent_thinking', 'idea_generation', 'creative_problem_solving', 'alternative_uses', 'musical_creativity', 'story_creation']
+_SPATIAL_EXERCISES = ['spatial_rotation', 'mental_rotation', 'spatial_navigation', 'block_design']
+_PERCEPTION_EXERCISES = ['focused_attention', 'pattern_recognition', 'visual_perception']
+
+def _session_area_scores(session: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """Score each of the session's focus areas from its individual exercise results"""
+    exercise_results = session.get("exerciseResults") or []
+    session_focus_areas = session.get("focusAreas", [])
+    
+    if not exercise_results or not session_focus_areas:
+        # Fallback to session average if no individual results or focus areas
+        session_score = session.get("averageScore", 0.0)
+        return [(area, session_score) for area in session_focus_areas]
+    
+    # Map exercises to focus areas and calculate area-specific scores
+    # This gives more accurate representation of performance per focus area
+    area_exercise_scores = defaultdict(list)
+    
+    # Map each exercise to its corresponding focus area based on exercise type
+    for result in exercise_results:
+        exercise_id = result.get("exerciseId", "")
+        exercise_score = _normalize_exercise_score(result.get("score", 0.0))
         
-        # Map exercises to focus areas and calculate area-specific scores
-        # This gives more accurate representation of performance per focus area
-        area_exercise_scores = defaultdict(list)
-        
-        # Map each exercise to its corresponding focus area based on exercise type
-        for result in exercise_results:
-            exercise_id = result.get("exerciseId", "")
-            raw_score = result.get("score", 0.0)
-            
-            # Robust score handling - ensure we have a valid numeric value
-            if raw_score is None:
-                exercise_score = 0.0
-            elif isinstance(raw_score, str):
-                try:
-                    exercise_score = float(raw_score)
-                except (ValueError, TypeError):
-                    exercise_score = 0.0
-            elif isinstance(raw_score, (int, float)):
-                # Check for NaN
-                if isinstance(raw_score, float) and (raw_score != raw_score):
-                    exercise_score = 0.0
-                else:
-                    exercise_score = float(raw_score)
-            else:
-                exercise_score = 0.0
-            
-            # Map specific exercises to focus areas
-            focus_area = None
-            if exercise_id in ['memory_sequence', 'word_pairs', 'visual_recall', 'working_memory']:
-                focus_area = 'memory'
-            elif exercise_id in ['conversation', 'word_finding', 'sentence_completion', 'verbal_fluency', 'reading_comprehension']:
-                # Conversation can map to either language or creativity depending on session focus areas
-                if 'creativity' in session_focus_areas:
-                    focus_area = 'creativity'
-                elif 'language' in session_focus_areas:
-                    focus_area = 'language'
-            elif exercise_id in ['sequencing', 'planning_task', 'cognitive_flexibility', 'inhibition_control', 'task_switching']:
-                focus_area = 'executive'
-            elif exercise_id in ['attention', 'divided_attention', 'sustained_attention', 'selective_attention']:
-                focus_area = 'attention'
-            elif exercise_id in ['speed_processing', 'rapid_naming', 'symbol_coding']:
-                focus_area = 'processing'
-            elif exercise_id in ['creative_thinking', 'divergent_thinking', 'idea_generation', 'creative_problem_solving', 'alternative_uses', 'musical_creativity', 'story_creation']:
+        # Map specific exercises to focus areas
+        focus_area = None
+        if exercise_id in _MEMORY_EXERCISES:
+            focus_area = 'memory'
+        elif exercise_id in _LANGUAGE_EXERCISES:
+            # Conversation can map to either language or creativity depending on session focus areas
+            if 'creativity' in session_focus_areas:
                 focus_area = 'creativity'
-            elif exercise_id in ['spatial_rotation', 'mental_rotation', 'spatial_navigation', 'block_design']:
-                focus_area = 'spatial'
-            elif exercise_id in ['focused_attention', 'pattern_recognition', 'visual_perception']:
-                focus_area = 'perception'
-            
-            # If we can map the exercise to a focus area, use that mapping
-            if focus_area and focus_area in session_focus_areas:
-                area_exercise_scores[focus_area].append(exercise_score)
+            elif 'language' in session_focus_areas:
+                focus_area = 'language'
+        elif exercise_id in _EXECUTIVE_EXERCISES:
+            focus_area = 'executive'
+        elif exercise_id in _ATTENTION_EXERCISES:
+            focus_area = 'attention'
+        elif exercise_id in _PROCESSING_EXERCISES:
+            focus_area = 'processing'
+        elif exercise_id in _CREATIVITY_EXERCISES:
+            focus_area = 'creativity'
+        elif exercise_id in _SPATIAL_EXERCISES:
+            focus_area = 'spatial'
+        elif exercise_id in _PERCEPTION_EXERCISES:
+            focus_area = 'perception'
         
-        # For focus areas that have specific exercise scores, use those
-        # For focus areas without specific exercises, distribute remaining exercises
-        remaining_exercises = []
-        for result in exercise_results:
-            exercise_id = result.get("exerciseId", "")
-            exercise_score = result.get("score", 0.0)
-            
-            # Check if this exercise was already mapped
-            mapped = False
-            for area in area_exercise_scores:
-                if any(ex_id in ['memory_sequence', 'word_pairs', 'visual_recall', 'working_memory'] and area == 'memory' for ex_id in [exercise_id]) or \
-                   any(ex_id in ['conversation', 'word_finding', 'sentence_completion', 'verbal_fluency', 'reading_comprehension'] and area == 'language' for ex_id in [exercise_id]) or \
-                   any(ex_id in ['sequencing', 'planning_task', 'cognitive_flexibility', 'inhibition_control', 'task_switching'] and area == 'executive' for ex_id in [exercise_id]):
-                    mapped = True
-                    break
-            
-            if not mapped:
-                remaining_exercises.append(exercise_score)
+        # If we can map the exercise to a focus area, use that mapping
+        if focus_area and focus_area in session_focus_areas:
+            area_exercise_scores[focus_area].append(exercise_score)
+    
+    # For focus areas that have specific exercise scores, use those
+    # For focus areas without specific exercises, distribute remaining exercises
+    remaining_exercises = []
+    for result in exercise_results:
+        exercise_id = result.get("exerciseId", "")
+        
+        # Check if this exercise was already mapped
+        mapped = (
+            (exercise_id in _MEMORY_EXERCISES and 'memory' in area_exercise_scores) or
+            (exercise_id in _LANGUAGE_EXERCISES and 'language' in area_exercise_scores) or
+            (exercise_id in _EXECUTIVE_EXERCISES and 'executive' in area_exercise_scores)
+        )
         
-        # Calculate scores for each focus area
-        for focus_area in session_focus_areas:
-            if focus_area in area_exercise_scores and area_exercise_scores[focus_area]:
-                # Use the specific exercise scores for this focus area
-                area_score = sum(area_exercise_scores[focus_area]) / len(area_exercise_scores[focus_area])
+        if not mapped:
+            remaining_exercises.append(_normalize_exercise_score(result.get("score", 0.0)))
+    
+    # Calculate scores for each focus area
+    area_scores = []
+    for focus_area in session_focus_areas:
+        if focus_area in area_exercise_scores and area_exercise_scores[focus_area]:
+            # Use the specific exercise scores for this focus area
+            area_score = sum(area_exercise_scores[focus_area]) / len(area_exercise_scores[focus_area])
+        else:
+            # Use average of remaining exercises or session average
+            if remaining_exercises:
+                area_score = sum(remaining_exercises) / len(remaining_exercises)
             else:
-                # Use average of remaining exercises or session average
-                if remaining_exercises:
-                    area_score = sum(remaining_exercises) / len(remaining_exercises)
-                else:
-                    area_score = session.get("averageScore", 0.0)
-            
-            focus_area_data[focus_area].append({
-                "score": area_score,
-                "date": session_date
-            })
+                area_score = session.get("averageScore", 0.0)
+        area_scores.append((focus_area, area_score))
     
-    analytics = []
+    return area_scores
+
+class _AreaStats:
+    """Running statistics for one focus area, bounded to the last few data points"""
     
-    for area_name, area_sessions in focus_area_data.items():
-        if not area_sessions:
-            continue
-            
+    def __init__(self):
+        self.count = 0
+        self.score_sum = 0.0
+        self.best_score = None
+        self.first_score = 0.0
+        self.recent_scores = deque(maxlen=3)  # Last 3 sessions, for improvement status
+        self.trend = deque(maxlen=10)  # Last 10 sessions, for trend data
+    
+    def add(self, score: Any, date: Optional[datetime]):
         # Robust score extraction with None handling
-        scores = []
-        for s in area_sessions:
-            score = s.get("score", 0.0)
-            if score is not None and isinstance(score, (int, float)) and not (isinstance(score, float) and (score != score)):
-                scores.append(float(score))
-            else:
-                scores.append(0.0)
-        
-        sessions_count = len(area_sessions)
-        average_score = statistics.mean(scores) if scores else 0.0
-        best_score = max(scores) if scores else 0.0
-        current_score = scores[-1] if scores else 0.0  # Most recent score
+        clean_score = _valid_score(score)
+        if clean_score is None:
+            clean_score = 0.0
+        if self.count == 0:
+            self.first_score = clean_score
+        self.count += 1
+        self.score_sum += clean_score
+        self.best_score = clean_score if self.best_score is None else max(self.best_score, clean_score)
+        self.recent_scores.append(clean_score)
+        self.trend.append((date, clean_score))
+    
+    def add_aggregates(self, aggregates: Dict[str, Any]):
+        """Add many data points at once, as produced by aggregates()"""
+        if self.count == 0:
+            self.first_score = aggregates["firstScore"]
+        self.count += aggregates["count"]
+        self.score_sum += aggregates["scoreSum"]
+        best_score = aggregates["bestScore"]
+        self.best_score = best_score if self.best_score is None else max(self.best_score, best_score)
+        # The last 10 points are enough to rebuild both bounded windows
+        for point in aggregates["recent"]:
+            self.recent_scores.append(point["score"])
+            self.trend.append((point["date"], point["score"]))
+    
+    def aggregates(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "scoreSum": self.score_sum,
+            "bestScore": self.best_score,
+            "firstScore": self.first_score,
+            "recent": [{"date": date, "score": score} for date, score in self.trend]
+        }
+
+class _FocusAreaAccumulator:
+    """Analytics for each focus area"""
+    
+    def __init__(self):
+        self._areas: Dict[str, _AreaStats] = {}
+    
+    def add(self, session: Dict[str, Any]):
+        session_date = session.get("createdAt")
+        for area, area_score in _session_area_scores(session):
+            if area not in self._areas:
+                self._areas[area] = _AreaStats()
+            self._areas[area].add(area_score, session_date)
+    
+    def add_aggregates(self, areas: List[Dict[str, Any]]):
+        """Add per-area aggregates, as produced by aggregates()"""
+        for area_aggregates in areas:
+            area = area_aggregates["area"]
+            if area not in self._areas:
+                self._areas[area] = _AreaStats()
+            self._areas[area].add_aggregates(area_aggregates)
+    
+    def aggregates(self) -> List[Dict[str, Any]]:
+        # A list keyed by value, so area names never become document field paths
+        return [{"area": area, **stats.aggregates()} for area, stats in self._areas.items()]
+    
+    def results(self) -> List[FocusAreaAnalytics]:
+        analytics = []
         
-        # Calculate improvement status
-        if sessions_count >= 3:
-            recent_scores = scores[-3:]  # Last 3 sessions
-            earlier_scores = scores[:-3] if len(scores) > 3 else scores[:1]
-            
-            recent_avg = statistics.mean(recent_scores)
-            earlier_avg = statistics.mean(earlier_scores)
+        for area_name, stats in self._areas.items():
+            sessions_count = stats.count
+            average_score = stats.score_sum / sessions_count
+            best_score = stats.best_score
+            current_score = stats.recent_scores[-1]  # Most recent score
             
-            if recent_avg > earlier_avg + 0.1:  # 10% improvement threshold
-                improvement_status = "improving"
-            elif recent_avg < earlier_avg - 0.1:  # 10% decline threshold
-                improvement_status = "declining"
+            # Calculate improvement status
+            if sessions_count >= 3:
+                recent_avg = sum(stats.recent_scores) / len(stats.recent_scores)  # Last 3 sessions
+                if sessions_count > 3:
+                    earlier_avg = (stats.score_sum - sum(stats.recent_scores)) / (sessions_count - 3)
+                else:
+                    earlier_avg = stats.first_score
+                
+                if recent_avg > earlier_avg + 0.1:  # 10% improvement threshold
+                    improvement_status = "improving"
+                elif recent_avg < earlier_avg - 0.1:  # 10% decline threshold
+                    improvement_status = "declining"
+                else:
+                    improvement_status = "stable"
             else:
-                improvement_status = "stable"
-        else:
-            # For new users (1-2 sessions), base status on performance level
-            # This provides more encouraging feedback for first-time users
-            if current_score >= 80.0:  # Excellent performance
-                improvement_status = "improving"
-            elif current_score >= 70.0:  # Good performance
-                improvement_status = "improving"
-            elif current_score >= 60.0:  # Decent performance
-                improvement_status = "stable"
-            else:  # Below 60% - needs work
-                improvement_status = "declining"
-        
-        # Create trend data (last 10 sessions for this area)
-        trend_data = []
-        recent_area_sessions = area_sessions[-10:]  # Last 10 sessions
-        for session_data in recent_area_sessions:
-            trend_data.append(PerformanceTrend(
-                date=session_data["date"],
-                score=session_data["score"]
+                # For new users (1-2 sessions), base status on performance level
+                # This provides more encouraging feedback for first-time users
+                if current_score >= 80.0:  # Excellent performance
+                    improvement_status = "improving"
+                elif current_score >= 70.0:  # Good performance
+                    improvement_status = "improving"
+                elif current_score >= 60.0:  # Decent performance
+                    improvement_status = "stable"
+                else:  # Below 60% - needs work
+                    improvement_status = "declining"
+            
+            # Create trend data (last 10 sessions for this area)
+            trend_data = [
+                PerformanceTrend(date=date, score=score)
+                for date, score in stats.trend
+            ]
+            
+            analytics.append(FocusAreaAnalytics(
+                area_name=area_name,
+                current_score=current_score,
+                improvement_status=improvement_status,
+                sessions_count=sessions_count,
+                average_score=average_score,
+                best_score=best_score,
+                trend_data=trend_data
             ))
         
-        analytics.append(FocusAreaAnalytics(
-            area_name=area_name,
-            current_score=current_score,
-            improvement_status=improvement_status,
-            sessions_count=sessions_count,
-            average_score=average_score,
-            best_score=best_score,
-            trend_data=trend_data
-        ))
-    
-    return analytics
+        return analytics
 
-def _calculate_performance_trend(sessions: List[Dict[str, Any]], days: int = 30) -> List[PerformanceTrend]:
-    """Calculate performance trend over the specified number of days"""
-    
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
-    recent_sessions = [
-        session for session in sessions
-        if session.get("createdAt") and session["createdAt"] >= cutoff_date
-    ]
-    
-    if not recent_sessions:
-        return []
+async def _calculate_focus_area_analytics(sessions: List[Dict[str, Any]], repos: Optional[Repositories] = None) -> List[FocusAreaAnalytics]:
+    """Calculate analytics for each focus area from an already-loaded list of sessions (used by diagnostic scripts)"""
+    focus_areas = _FocusAreaAccumulator()
+    for session in sessions:
+        focus_areas.add(session)
+    return focus_areas.results()
+
+class _PerformanceTrendAccumulator:
+    """Daily average score and activity count over the last `days` days"""
     
-    # Group sessions by date and calculate daily averages and activity counts
-    daily_data = defaultdict(lambda: {"scores": [], "activities": 0})
+    def __init__(self, days: int = 30):
+        self.cutoff_date = datetime.utcnow() - timedelta(days=days)
+        # Group sessions by date and track daily score totals and activity counts
+        self._daily_data = defaultdict(lambda: {"score_sum": 0.0, "sessions": 0, "activities": 0})
     
-    for session in recent_sessions:
-        session_date = session["createdAt"].date()
-        session_score = session.get("averageScore", 0.0)
-        exercise_count = len(session.get("exerciseResults", []))
+    def add(self, session: Dict[str, Any]):
+        created_at = session.get("createdAt")
+        if not created_at or created_at < self.cutoff_date:
+            return
         
-        daily_data[session_date]["scores"].append(session_score)
-        daily_data[session_date]["activities"] += exercise_count
-    
-    # Calculate daily averages and create trend data
-    trend_data = []
-    for date, data in sorted(daily_data.items()):
-        daily_average = statistics.mean(data["scores"]) if data["scores"] else 0.0
-        trend_data.append(PerformanceTrend(
-            date=datetime.combine(date, datetime.min.time()),
-            score=daily_average,
-            activities=data["activities"]
-        ))
-    
-    return trend_data
+        day = self._daily_data[created_at.date()]
+        session_score = _valid_score(session.get("averageScore"))
+        day["score_sum"] += session_score if session_score is not None else 0.0
+        day["sessions"] += 1
+        day["activities"] += len(session.get("exerciseResults") or [])
+    
+    def results(self) -> List[PerformanceTrend]:
+        # Calculate daily averages and create trend data
+        trend_data = []
+        for date, data in sorted(self._daily_data.items()):
+            daily_average = data["score_sum"] / data["sessions"] if data["sessions"] else 0.0
+            trend_data.append(PerformanceTrend(
+                date=datetime.combine(date, datetime.min.time()),
+                score=daily_average,
+                activities=data["activities"]
+            ))
+        return trend_data
 
 def _analyze_performance_patterns(focus_areas_analytics: List[FocusAreaAnalytics]) -> Tuple[List[str], List[str]]:
     """Analyze performance patterns to identify improvement areas and strengths"""
@@ -419,20 +579,27 @@ def _analyze_performance_patterns(focus_areas_analytics: List[FocusAreaAnalytics
     
     return improvement_areas, strengths
 
-async def recalculate_user_progress(user_id: str, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+async def recalculate_user_progress(
+    user_id: str,
+    repos: Repositories,
+    cache: Optional[CacheBackend] = None,
+    pending_session: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """
     Recalculate user progress immediately after session completion and cache the results
     
     Args:
         user_id: The ID of the user to recalculate progress for
-        db: MongoDB database connection
+        repos: Data repositories
+        cache: Optional cache tier to refresh with the new progress summary
+        pending_session: A session with results not yet written to the database
         
     Returns:
         Dict containing updated improvement_areas and strengths
     """
     try:
         # Get fresh progress analytics
-        progress_summary = await get_progress_analytics(user_id, db)
+        progress_summary = await get_progress_analytics(user_id, repos, pending_session)
         
         # Extract the key data we need for frontend
         progress_data = {
@@ -444,14 +611,11 @@ async def recalculate_user_progress(user_id: str, db: AsyncIOMotorDatabase) -> D
         }
         
         # Cache this data in the user document for quick access
-        await db.users.update_one(
-            {"_id": user_id},
-            {
-                "$set": {
-                    "cached_progress": progress_data
-                }
-            }
-        )
+        await repos.users.update_fields(user_id, {"cached_progress": progress_data})
+        
+        # Serve the next progress read from memory instead of recomputing it
+        if cache is not None:
+            await cache.set(progress_key(user_id), progress_summary)
         
         return progress_data
         
@@ -466,20 +630,20 @@ async def recalculate_user_progress(user_id: str, db: AsyncIOMotorDatabase) -> D
             "overall_average_score": 0.0
         }
 
-async def get_cached_progress_or_calculate(user_id: str, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+async def get_cached_progress_or_calculate(user_id: str, repos: Repositories) -> Dict[str, Any]:
     """
     Get cached progress data if available and recent, otherwise recalculate
     
     Args:
         user_id: The ID of the user
-        db: MongoDB database connection
+        repos: Data repositories
         
     Returns:
         Dict containing improvement_areas and strengths
     """
     try:
         # Get user document with cached progress
-        user_doc = await db.users.find_one({"_id": user_id})
+        user_doc = await repos.users.get_by_id(user_id)
         
         if user_doc and "cached_progress" in user_doc:
             cached_data = user_doc["cached_progress"]
@@ -490,12 +654,12 @@ async def get_cached_progress_or_calculate(user_id: str, db: AsyncIOMotorDatabas
                 return cached_data
         
         # Cache is stale or doesn't exist, recalculate
-        return await recalculate_user_progress(user_id, db)
+        return await recalculate_user_progress(user_id, repos)
         
     except Exception as e:
         print(f"Error getting cached progress: {str(e)}")
         # Fallback to fresh calculation
-        progress_summary = await get_progress_analytics(user_id, db)
+        progress_summary = await get_progress_analytics(user_id, repos)
         return {
             "improvement_areas": progress_summary.improvement_areas,
             "strengths": progress_summary.strengths,
@@ -1,28 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from auth.router import get_current_user
 from models.user import User
 from models.progress import ProgressSummary
 from progress.logic import get_progress_analytics, get_cached_progress_or_calculate
+from repositories.base import Repositories
+from repositories.dependencies import get_repositories
+from cache.backends import CacheBackend
+from cache.dependencies import get_cache
+from cache.invalidation import progress_key
+from db.resilience import retry_idempotent_read
 
 router = APIRouter()
 
-# Database dependency - will be injected from main.py
-async def get_database() -> AsyncIOMotorDatabase:
-    from main import db
-    return db
-
 @router.get("/", response_model=ProgressSummary)
 async def get_progress_summary(
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repos: Repositories = Depends(get_repositories),
+    cache: CacheBackend = Depends(get_cache)
 ):
     """Get comprehensive progress analytics for the current user"""
     try:
-        progress_summary = await get_progress_analytics(current_user.id, db)
+        cached_summary = await cache.get(progress_key(current_user.id))
+        if cached_summary is not None:
+            return cached_summary
+        
+        progress_summary = await retry_idempotent_read(lambda: get_progress_analytics(current_user.id, repos))
+        await cache.set(progress_key(current_user.id), progress_summary)
         return progress_summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch progress data: {str(e)}")
@@ -30,11 +36,11 @@ async def get_progress_summary(
 @router.get("/quick")
 async def get_quick_progress_summary(
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repos: Repositories = Depends(get_repositories)
 ):
     """Get quick progress summary using cached data when available"""
     try:
-        cached_progress = await get_cached_progress_or_calculate(current_user.id, db)
+        cached_progress = await get_cached_progress_or_calculate(current_user.id, repos)
         return cached_progress
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch quick progress data: {str(e)}")
@@ -42,7 +48,7 @@ async def get_quick_progress_summary(
 @router.get("/today")
 async def get_todays_performance(
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repos: Repositories = Depends(get_repositories)
 ):
     """Get today's specific training session performance"""
     try:
@@ -52,19 +58,11 @@ async def get_todays_performance(
         end_of_day = datetime.combine(today, datetime.max.time())
         
         # Find today's training sessions (completed or with exercise data)
-        cursor = db.training_sessions.find({
-            "userId": current_user.id,
-            "createdAt": {
-                "$gte": start_of_day,
-                "$lte": end_of_day
-            }
-        }).sort("createdAt", 1)
-        
-        sessions = []
-        async for session in cursor:
-            # Include sessions that are either complete OR have exercise results
-            if session.get("isComplete", False) or session.get("exerciseResults", []):
-                sessions.append(session)
+        sessions = [
+            session async for session in repos.sessions.iter_for_analytics(
+                current_user.id, start=start_of_day, end=end_of_day
+            )
+        ]
         
         if not sessions:
             return {
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Register many users at once from a CSV or NDJSON file.
+
+CSV needs a header row with the signup fields (name, email, password, ageGroup,
+reminderTime, ...); list fields such as cognitiveAreas separate values with
+semicolons. NDJSON has one signup object per line. Rows that fail, including
+already-registered emails, are listed and the rest are still registered, so a
+partly failed upload can simply be fixed and re-run.
+
+    python provision_users.py patients.csv
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+import time
+import certifi
+from concurrent.futures import ProcessPoolExecutor
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from auth.bulk import provision_users, FORMATS, BULK_HASH_WORKERS
+from repositories.mongo import MongoUserRepository
+
+# Load environment variables
+load_dotenv()
+
+async def run(path: str, format: str, workers: int) -> int:
+    mongodb_uri = os.getenv("MONGODB_URI")
+    if not mongodb_uri:
+        print("❌ Error: MONGODB_URI not found in environment variables")
+        return 1
+
+    with open(path, encoding="utf-8-sig") as upload:
+        content = upload.read()
+
+    client = AsyncIOMotorClient(mongodb_uri, tlsCAFile=certifi.where())
+    users = MongoUserRepository(client.mindbloom)
+    await users.ensure_indexes()
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        report = await provision_users(users, content, format, executor)
+    elapsed = time.perf_counter() - started
+    client.close()
+
+    for failure in report["failed"]:
+        print(f"❌ Row {failure['row']} ({failure['email'] or 'no email'}): {failure['error']}")
+    print(f"\n🎉 Registered {report['created']} of {report['total']} users in {elapsed:.1f}s "
+          f"({report['created'] / elapsed:.0f} users/s)")
+    return 0 if not report["failed"] else 2
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-register users from a CSV or NDJSON file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--workers", type=int, default=BULK_HASH_WORKERS, help="Password hashing processes")
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    sys.exit(asyncio.run(run(args.path, format, args.workers)))
+
+if __name__ == "__main__":
+    main()
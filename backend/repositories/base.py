@@ -0,0 +1,234 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+def activity_day(moment: datetime) -> str:
+    """The UTC calendar day a user was active on, as stored in lastActiveDay"""
+    return moment.strftime("%Y-%m-%d")
+
+class DuplicateError(Exception):
+    """Raised when an insert violates a uniqueness constraint (e.g. a registered email)"""
+
+class UnavailableError(Exception):
+    """Raised when a write cannot be accepted right now and should be retried later"""
+
+class UserRepository(ABC):
+    """Access to user account documents"""
+
+    @abstractmethod
+    async def ensure_indexes(self):
+        """Create any indexes the backend needs"""
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Return the user document for an email, or None"""
+
+    @abstractmethod
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return the user document for a user ID, or None"""
+
+    @abstractmethod
+    async def exists(self, email: str) -> bool:
+        """Whether an account is registered for the email"""
+
+    @abstractmethod
+    def iter_emails(self) -> AsyncIterator[str]:
+        """Stream every registered email"""
+
+    @abstractmethod
+    async def create(self, user_doc: Dict[str, Any]) -> str:
+        """Insert a new user and return its ID. Raises DuplicateError for a registered email"""
+
+    @abstractmethod
+    async def create_many(self, user_docs: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Insert users in one unordered batch.
+
+        Returns each document's new ID, or None where the email was already
+        registered; the other documents are inserted regardless.
+        """
+
+    @abstractmethod
+    async def update_by_email(self, email: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Set the given fields and return the updated document, or None if no user matched"""
+
+    @abstractmethod
+    async def update_fields(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        """Set the given fields on a user by ID. Returns whether a user matched"""
+
+    @abstractmethod
+    async def record_session_completion(self, user_id: str, completed_at: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Count a completed session and advance the daily streak, atomically.
+
+        The streak grows by one on the first session of a day that follows the
+        user's last active day, is unchanged for further sessions on the same
+        day, and restarts at 1 after a gap. The day is also marked in the
+        user's activity bitmap. Returns the updated streak, longestStreak and
+        totalSessions, or None when the user does not exist.
+        """
+
+class SessionRepository(ABC):
+    """Access to training session documents"""
+
+    @abstractmethod
+    async def ensure_indexes(self):
+        """Create any indexes the backend needs"""
+
+    @abstractmethod
+    async def create(self, session_doc: Dict[str, Any]) -> str:
+        """Insert a new session and return its ID"""
+
+    @abstractmethod
+    async def get_for_user(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return a session owned by the user, or None"""
+
+    @abstractmethod
+    async def complete(
+        self,
+        session_id: str,
+        user_id: str,
+        submitted_results: List[Dict[str, Any]],
+        completed_at: datetime
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically merge submitted results into an open session and flag it complete.
+
+        Submitted results are only added for exercise IDs the session does not
+        already hold, and averageScore is computed over the merged results.
+        Returns {"averageScore": ...}, or None if the user has no such open session.
+        """
+
+    @abstractmethod
+    async def list_for_user(self, user_id: str, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+        """Raw sessions for a user, newest first"""
+
+    @abstractmethod
+    async def count_for_user(self, user_id: str) -> int:
+        """Number of raw (not compacted) sessions for a user"""
+
+    @abstractmethod
+    def iter_for_analytics(
+        self,
+        user_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a user's sessions that are complete or have exercise results, oldest first,
+        optionally limited to createdAt within [start, end]. Only analytics fields are
+        guaranteed to be present.
+        """
+
+    @abstractmethod
+    def iter_compacted(self, user_id: str, newest_first: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a user's compacted (bucketed) sessions as session-shaped documents"""
+
+    @abstractmethod
+    def iter_compacted_months(
+        self,
+        user_id: str,
+        expand_since: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a user's compacted months oldest first: one {"createdAt", "sessionIds",
+        "aggregates"} item per month, or the month's sessions for months with
+        sessions from `expand_since` on
+        """
+
+class ExerciseResultRepository(ABC):
+    """Access to the exercise results embedded in training sessions"""
+
+    @abstractmethod
+    async def append(
+        self,
+        session_id: str,
+        result: Dict[str, Any],
+        persisted: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Append a result to a session and return the session's full result list.
+
+        `persisted` is the result list of a session document the caller has just
+        read; backends that do not write through immediately use it to build the
+        returned list without another round trip.
+        """
+
+    async def flush(self, session_id: Optional[str] = None):
+        """Make appended results visible to readers (no-op for write-through backends)"""
+
+class NoteRepository(ABC):
+    """Access to memory note documents"""
+
+    @abstractmethod
+    async def ensure_indexes(self):
+        """Create any indexes the backend needs"""
+
+    @abstractmethod
+    async def create(self, note_doc: Dict[str, Any]) -> str:
+        """Insert a new note and return its ID"""
+
+    @abstractmethod
+    def iter_for_user(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a user's notes, newest first"""
+
+    @abstractmethod
+    async def get_for_user(self, note_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return a note owned by the user, or None"""
+
+    @abstractmethod
+    async def update_for_user(self, note_id: str, user_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Set the given fields and return the updated note, or None if no note matched"""
+
+    @abstractmethod
+    async def delete_for_user(self, note_id: str, user_id: str) -> bool:
+        """Delete a note owned by the user. Returns whether a note was deleted"""
+
+class RefreshTokenRepository(ABC):
+    """Access to refresh token records, keyed by the token's hash"""
+
+    @abstractmethod
+    async def ensure_indexes(self):
+        """Create any indexes the backend needs (including expiry of old tokens)"""
+
+    @abstractmethod
+    async def create(self, token_doc: Dict[str, Any]):
+        """Store a new refresh token record"""
+
+    @abstractmethod
+    async def consume(self, token_hash: str, now: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Atomically mark an unused, unrevoked, unexpired token as used and return
+        its record, or None if no such token exists
+        """
+
+    @abstractmethod
+    async def get(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        """Return a token record in any state, or None"""
+
+    @abstractmethod
+    async def revoke_family(self, family_id: str, now: datetime) -> int:
+        """Revoke every token descended from the same login. Returns how many were revoked"""
+
+class Repositories:
+    """The set of repositories handed to routers through FastAPI dependencies"""
+
+    def __init__(
+        self,
+        users: UserRepository,
+        sessions: SessionRepository,
+        results: ExerciseResultRepository,
+        notes: NoteRepository,
+        refresh_tokens: RefreshTokenRepository
+    ):
+        self.users = users
+        self.sessions = sessions
+        self.results = results
+        self.notes = notes
+        self.refresh_tokens = refresh_tokens
+
+    async def ensure_indexes(self):
+        await self.users.ensure_indexes()
+        await self.sessions.ensure_indexes()
+        await self.notes.ensure_indexes()
+        await self.refresh_tokens.ensure_indexes()
@@ -0,0 +1,209 @@
+import os
+import asyncio
+from datetime import datetime
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+from cache.backends import CacheBackend
+from cache.bloom import BloomFilter
+from cache.invalidation import user_id_key, user_email_key
+from repositories.base import UserRepository
+
+# Sizing of the registered-email Bloom filter
+EMAIL_FILTER_EXPECTED_USERS = int(os.getenv("EMAIL_FILTER_EXPECTED_USERS", 100000))
+EMAIL_FILTER_FALSE_POSITIVE_RATE = float(os.getenv("EMAIL_FILTER_FALSE_POSITIVE_RATE", 0.01))
+# How often the filter is rebuilt from the database (seconds); picks up signups the
+# invalidation bus could not deliver and sheds deleted accounts
+EMAIL_FILTER_REBUILD_SECONDS = int(os.getenv("EMAIL_FILTER_REBUILD_SECONDS", 900))
+
+class UserRepositoryProxy(UserRepository):
+    """Passes every call through to another user repository; subclasses override what they layer on"""
+
+    def __init__(self, inner: UserRepository):
+        self.inner = inner
+
+    async def ensure_indexes(self):
+        await self.inner.ensure_indexes()
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self.inner.get_by_email(email)
+
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.inner.get_by_id(user_id)
+
+    async def exists(self, email: str) -> bool:
+        return await self.inner.exists(email)
+
+    def iter_emails(self) -> AsyncIterator[str]:
+        return self.inner.iter_emails()
+
+    async def create(self, user_doc: Dict[str, Any]) -> str:
+        return await self.inner.create(user_doc)
+
+    async def create_many(self, user_docs: List[Dict[str, Any]]) -> List[Optional[str]]:
+        return await self.inner.create_many(user_docs)
+
+    async def update_by_email(self, email: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.inner.update_by_email(email, fields)
+
+    async def update_fields(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        return await self.inner.update_fields(user_id, fields)
+
+    async def record_session_completion(self, user_id: str, completed_at: datetime) -> Optional[Dict[str, Any]]:
+        return await self.inner.record_session_completion(user_id, completed_at)
+
+class CachingUserRepository(UserRepositoryProxy):
+    """
+    Read-through cache in front of a user repository.
+
+    Documents are cached by user ID with a separate email -> ID entry, so an
+    update only has to evict the ID key. Writes through this repository evict
+    locally; the change-stream invalidation bus evicts on the other workers.
+    """
+
+    def __init__(self, inner: UserRepository, cache: CacheBackend):
+        super().__init__(inner)
+        self.cache = cache
+
+    async def _remember(self, user_doc: Dict[str, Any]):
+        user_id = str(user_doc["_id"])
+        await self.cache.set(user_id_key(user_id), dict(user_doc))
+        await self.cache.set(user_email_key(user_doc["email"]), user_id)
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user_id = await self.cache.get(user_email_key(email))
+        if user_id is not None:
+            user_doc = await self.cache.get(user_id_key(user_id))
+            if user_doc is not None:
+                return dict(user_doc)
+
+        user_doc = await self.inner.get_by_email(email)
+        if user_doc is not None:
+            await self._remember(user_doc)
+        return user_doc
+
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        user_doc = await self.cache.get(user_id_key(str(user_id)))
+        if user_doc is not None:
+            return dict(user_doc)
+
+        user_doc = await self.inner.get_by_id(user_id)
+        if user_doc is not None:
+            await self._remember(user_doc)
+        return user_doc
+
+    async def update_by_email(self, email: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        user_doc = await self.inner.update_by_email(email, fields)
+        if user_doc is not None:
+            await self.cache.delete(user_id_key(str(user_doc["_id"])))
+        return user_doc
+
+    async def update_fields(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        matched = await self.inner.update_fields(user_id, fields)
+        await self.cache.delete(user_id_key(str(user_id)))
+        return matched
+
+    async def record_session_completion(self, user_id: str, completed_at: datetime) -> Optional[Dict[str, Any]]:
+        stats = await self.inner.record_session_completion(user_id, completed_at)
+        await self.cache.delete(user_id_key(str(user_id)))
+        return stats
+
+class BloomFilteredUserRepository(UserRepositoryProxy):
+    """
+    Answers exists() for unregistered emails from an in-memory Bloom filter.
+
+    Only probable positives reach the database. The filter is built from every
+    registered email at startup, updated on signups through this worker and,
+    via the invalidation bus, on other workers, and periodically rebuilt.
+    A signup the filter has not seen yet can briefly be reported as available;
+    the unique email index still rejects the duplicate signup.
+    """
+
+    def __init__(
+        self,
+        inner: UserRepository,
+        false_positive_rate: float = EMAIL_FILTER_FALSE_POSITIVE_RATE,
+        expected_users: int = EMAIL_FILTER_EXPECTED_USERS
+    ):
+        super().__init__(inner)
+        self.false_positive_rate = false_positive_rate
+        self.expected_users = expected_users
+        self.filter: Optional[BloomFilter] = None
+        # Emails added while a rebuild is streaming, replayed into the new filter
+        self._added_during_rebuild: Optional[set] = None
+        self.definite_negatives = 0
+        self.probable_positives = 0
+        self.false_positives = 0
+
+    async def rebuild(self):
+        """Build a fresh filter from every registered email and swap it in"""
+        # Leave headroom so the filter does not saturate before the next rebuild
+        registered = self.filter.count if self.filter else 0
+        rebuilt = BloomFilter(max(self.expected_users, registered * 2), self.false_positive_rate)
+        self._added_during_rebuild = set()
+        try:
+            async for email in self.inner.iter_emails():
+                rebuilt.add(email)
+            for email in self._added_during_rebuild:
+                rebuilt.add(email)
+        finally:
+            self._added_during_rebuild = None
+        self.filter = rebuilt
+
+    async def run_rebuild_loop(self, interval_seconds: int = EMAIL_FILTER_REBUILD_SECONDS):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                print(f"Warning: Failed to rebuild email filter: {str(e)}")
+
+    def add(self, email: str):
+        if self.filter is not None:
+            self.filter.add(email)
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.add(email)
+
+    async def handle_change(self, event: Dict[str, Any]):
+        """Invalidation-bus listener: learn emails registered through other workers"""
+        if event.get("operationType") == "insert" and event.get("ns", {}).get("coll") == "users":
+            email = (event.get("fullDocument") or {}).get("email")
+            if email:
+                self.add(email)
+
+    async def exists(self, email: str) -> bool:
+        if self.filter is None:
+            return await self.inner.exists(email)
+        if email not in self.filter:
+            self.definite_negatives += 1
+            return False
+
+        self.probable_positives += 1
+        exists = await self.inner.exists(email)
+        if not exists:
+            self.false_positives += 1
+        return exists
+
+    async def create(self, user_doc: Dict[str, Any]) -> str:
+        user_id = await self.inner.create(user_doc)
+        self.add(user_doc["email"])
+        return user_id
+
+    async def create_many(self, user_docs: List[Dict[str, Any]]) -> List[Optional[str]]:
+        user_ids = await self.inner.create_many(user_docs)
+        for user_doc, user_id in zip(user_docs, user_ids):
+            if user_id is not None:
+                self.add(user_doc["email"])
+        return user_ids
+
+    def stats(self) -> dict:
+        negatives = self.definite_negatives + self.false_positives
+        return {
+            "insertions": self.filter.count if self.filter else 0,
+            "filterBytes": len(self.filter.bits) if self.filter else 0,
+            "definiteNegatives": self.definite_negatives,
+            "probablePositives": self.probable_positives,
+            "falsePositives": self.false_positives,
+            # Share of unregistered emails that still cost a database lookup
+            "observedFalsePositiveRate": self.false_positives / negatives if negatives else 0.0,
+            "estimatedFalsePositiveRate": self.filter.estimated_false_positive_rate() if self.filter else 0.0
+        }
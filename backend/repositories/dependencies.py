@@ -0,0 +1,31 @@
+from fastapi import Depends
+
+from repositories.base import (
+    Repositories,
+    UserRepository,
+    SessionRepository,
+    ExerciseResultRepository,
+    NoteRepository,
+    RefreshTokenRepository
+)
+
+# Repositories dependency - will be injected from main.py
+# Tests and load tests swap backends with app.dependency_overrides[get_repositories]
+async def get_repositories() -> Repositories:
+    from main import repositories
+    return repositories
+
+async def get_user_repository(repos: Repositories = Depends(get_repositories)) -> UserRepository:
+    return repos.users
+
+async def get_session_repository(repos: Repositories = Depends(get_repositories)) -> SessionRepository:
+    return repos.sessions
+
+async def get_result_repository(repos: Repositories = Depends(get_repositories)) -> ExerciseResultRepository:
+    return repos.results
+
+async def get_note_repository(repos: Repositories = Depends(get_repositories)) -> NoteRepository:
+    return repos.notes
+
+async def get_refresh_token_repository(repos: Repositories = Depends(get_repositories)) -> RefreshTokenRepository:
+    return repos.refresh_tokens
@@ -0,0 +1,278 @@
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, AsyncIterator
+from bson import ObjectId
+
+from repositories.base import (
+    activity_day,
+    DuplicateError,
+    UserRepository,
+    SessionRepository,
+    ExerciseResultRepository,
+    NoteRepository,
+    RefreshTokenRepository,
+    Repositories
+)
+from users.activity import mark_active
+
+# Documents are returned as shallow copies: callers may add or remove top-level keys
+# (as the routers do when converting _id to id), but nested lists and dicts are shared
+# with the store and must be treated as read-only.
+
+class InMemoryUserRepository(UserRepository):
+    def __init__(self):
+        self.users_by_id: Dict[str, Dict[str, Any]] = {}
+        self.ids_by_email: Dict[str, str] = {}
+
+    async def ensure_indexes(self):
+        pass
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user_id = self.ids_by_email.get(email)
+        return dict(self.users_by_id[user_id]) if user_id else None
+
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        user = self.users_by_id.get(str(user_id))
+        return dict(user) if user else None
+
+    async def exists(self, email: str) -> bool:
+        return email in self.ids_by_email
+
+    async def iter_emails(self) -> AsyncIterator[str]:
+        for email in list(self.ids_by_email):
+            yield email
+
+    async def create(self, user_doc: Dict[str, Any]) -> str:
+        if user_doc["email"] in self.ids_by_email:
+            raise DuplicateError(f"Email already registered: {user_doc['email']}")
+        user_doc.setdefault("_id", ObjectId())
+        user_id = str(user_doc["_id"])
+        self.users_by_id[user_id] = dict(user_doc)
+        self.ids_by_email[user_doc["email"]] = user_id
+        return user_id
+
+    async def create_many(self, user_docs: List[Dict[str, Any]]) -> List[Optional[str]]:
+        user_ids = []
+        for user_doc in user_docs:
+            try:
+                user_ids.append(await self.create(user_doc))
+            except DuplicateError:
+                user_ids.append(None)
+        return user_ids
+
+    async def update_by_email(self, email: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        user_id = self.ids_by_email.get(email)
+        if user_id is None:
+            return None
+        self.users_by_id[user_id].update(fields)
+        return dict(self.users_by_id[user_id])
+
+    async def update_fields(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        user = self.users_by_id.get(str(user_id))
+        if user is None:
+            return False
+        user.update(fields)
+        return True
+
+    async def record_session_completion(self, user_id: str, completed_at: datetime) -> Optional[Dict[str, Any]]:
+        user = self.users_by_id.get(str(user_id))
+        if user is None:
+            return None
+        today = activity_day(completed_at)
+        yesterday = activity_day(completed_at - timedelta(days=1))
+        streak = user.get("streak") or 0
+        # Same rules as the MongoDB update pipeline
+        if user.get("lastActiveDay") == today:
+            user["streak"] = max(streak, 1)
+        elif user.get("lastActiveDay") == yesterday or "lastActiveDay" not in user:
+            user["streak"] = streak + 1
+        else:
+            user["streak"] = 1
+        user["totalSessions"] = (user.get("totalSessions") or 0) + 1
+        user["lastActiveDay"] = today
+        user["longestStreak"] = max(user.get("longestStreak") or 0, user["streak"])
+        user["activity"] = dict(user.get("activity") or {})
+        mark_active(user["activity"], completed_at.date())
+        return {
+            "streak": user["streak"],
+            "longestStreak": user["longestStreak"],
+            "totalSessions": user["totalSessions"]
+        }
+
+class InMemorySessionRepository(SessionRepository):
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        # Per-user session IDs in insertion (createdAt) order
+        self.ids_by_user: Dict[str, List[str]] = {}
+
+    async def ensure_indexes(self):
+        pass
+
+    async def create(self, session_doc: Dict[str, Any]) -> str:
+        session_doc.setdefault("_id", ObjectId())
+        session_id = str(session_doc["_id"])
+        self.sessions[session_id] = dict(session_doc)
+        self.ids_by_user.setdefault(session_doc["userId"], []).append(session_id)
+        return session_id
+
+    async def get_for_user(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        session = self.sessions.get(session_id)
+        if session is None or session.get("userId") != user_id:
+            return None
+        return dict(session)
+
+    async def complete(
+        self,
+        session_id: str,
+        user_id: str,
+        submitted_results: List[Dict[str, Any]],
+        completed_at: datetime
+    ) -> Optional[Dict[str, Any]]:
+        session = self.sessions.get(session_id)
+        if session is None or session.get("userId") != user_id or session.get("isComplete"):
+            return None
+        existing_results = list(session.get("exerciseResults") or [])
+        existing_ids = {result.get("exerciseId") for result in existing_results}
+        merged = existing_results + [
+            result for result in submitted_results if result.get("exerciseId") not in existing_ids
+        ]
+        scores = [result["score"] for result in merged if isinstance(result.get("score"), (int, float))]
+        session.update({
+            "exerciseResults": merged,
+            "averageScore": sum(scores) / len(scores) if scores else 0.0,
+            "isComplete": True,
+            "completedAt": completed_at
+        })
+        return {"averageScore": session["averageScore"]}
+
+    async def list_for_user(self, user_id: str, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+        session_ids = self.ids_by_user.get(user_id, [])
+        newest_first = session_ids[::-1][skip:skip + limit]
+        return [dict(self.sessions[session_id]) for session_id in newest_first]
+
+    async def count_for_user(self, user_id: str) -> int:
+        return len(self.ids_by_user.get(user_id, []))
+
+    async def iter_for_analytics(
+        self,
+        user_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        for session_id in list(self.ids_by_user.get(user_id, [])):
+            session = self.sessions[session_id]
+            if not (session.get("isComplete", False) or session.get("exerciseResults")):
+                continue
+            created_at = session.get("createdAt")
+            if start is not None and (created_at is None or created_at < start):
+                continue
+            if end is not None and (created_at is None or created_at > end):
+                continue
+            yield dict(session)
+
+    async def iter_compacted(self, user_id: str, newest_first: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        # The in-memory backend never compacts sessions
+        return
+        yield
+
+    async def iter_compacted_months(
+        self,
+        user_id: str,
+        expand_since: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        return
+        yield
+
+class InMemoryExerciseResultRepository(ExerciseResultRepository):
+    def __init__(self, sessions: InMemorySessionRepository):
+        self.sessions = sessions
+
+    async def append(
+        self,
+        session_id: str,
+        result: Dict[str, Any],
+        persisted: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        session = self.sessions.sessions.get(session_id)
+        if session is None:
+            return []
+        session["exerciseResults"] = (session.get("exerciseResults") or []) + [result]
+        return list(session["exerciseResults"])
+
+class InMemoryNoteRepository(NoteRepository):
+    def __init__(self):
+        self.notes: Dict[str, Dict[str, Any]] = {}
+
+    async def ensure_indexes(self):
+        pass
+
+    async def create(self, note_doc: Dict[str, Any]) -> str:
+        self.notes[note_doc["_id"]] = dict(note_doc)
+        return note_doc["_id"]
+
+    async def iter_for_user(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        notes = [note for note in self.notes.values() if note.get("userId") == user_id]
+        notes.sort(key=lambda note: note.get("createdAt") or datetime.min, reverse=True)
+        for note in notes:
+            yield dict(note)
+
+    async def get_for_user(self, note_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        note = self.notes.get(note_id)
+        if note is None or note.get("userId") != user_id:
+            return None
+        return dict(note)
+
+    async def update_for_user(self, note_id: str, user_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        note = self.notes.get(note_id)
+        if note is None or note.get("userId") != user_id:
+            return None
+        note.update(fields)
+        return dict(note)
+
+    async def delete_for_user(self, note_id: str, user_id: str) -> bool:
+        note = self.notes.get(note_id)
+        if note is None or note.get("userId") != user_id:
+            return False
+        del self.notes[note_id]
+        return True
+
+class InMemoryRefreshTokenRepository(RefreshTokenRepository):
+    def __init__(self):
+        self.tokens: Dict[str, Dict[str, Any]] = {}
+
+    async def ensure_indexes(self):
+        pass
+
+    async def create(self, token_doc: Dict[str, Any]):
+        self.tokens[token_doc["_id"]] = dict(token_doc)
+
+    async def consume(self, token_hash: str, now: datetime) -> Optional[Dict[str, Any]]:
+        token = self.tokens.get(token_hash)
+        if token is None or token.get("usedAt") or token.get("revokedAt") or token["expiresAt"] <= now:
+            return None
+        token["usedAt"] = now
+        return dict(token)
+
+    async def get(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        token = self.tokens.get(token_hash)
+        return dict(token) if token else None
+
+    async def revoke_family(self, family_id: str, now: datetime) -> int:
+        revoked = 0
+        for token in self.tokens.values():
+            if token["familyId"] == family_id and not token.get("revokedAt"):
+                token["revokedAt"] = now
+                revoked += 1
+        return revoked
+
+class InMemoryRepositories(Repositories):
+    """Process-local repositories for unit tests, load tests and running the API without MongoDB"""
+
+    def __init__(self):
+        sessions = InMemorySessionRepository()
+        super().__init__(
+            users=InMemoryUserRepository(),
+            sessions=sessions,
+            results=InMemoryExerciseResultRepository(sessions),
+            notes=InMemoryNoteRepository(),
+            refresh_tokens=InMemoryRefreshTokenRepository()
+        )
@@ -0,0 +1,316 @@
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, AsyncIterator
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.read_preferences import _ServerMode
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+
+from repositories.base import (
+    activity_day,
+    DuplicateError,
+    UserRepository,
+    SessionRepository,
+    ExerciseResultRepository,
+    NoteRepository,
+    RefreshTokenRepository,
+    Repositories
+)
+from progress.compaction import iter_bucketed_sessions, iter_compacted_months
+from db.routing import analytics_reads, current_session
+from users.activity import activity_mask_update
+
+# Only the fields analytics reads; the embedded exercise catalog entries are never transferred
+ANALYTICS_PROJECTION = {
+    "_id": 1,
+    "createdAt": 1,
+    "mood": 1,
+    "focusAreas": 1,
+    "averageScore": 1,
+    "isComplete": 1,
+    "exerciseResults.exerciseId": 1,
+    "exerciseResults.score": 1,
+    "exerciseResults.timeSpent": 1
+}
+
+def _object_id(value: str):
+    """User and session IDs are ObjectId hex strings; fall back to the raw value otherwise"""
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+class MongoUserRepository(UserRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.users
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("email", unique=True)
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"email": email})
+
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": _object_id(user_id)}, session=current_session())
+
+    async def exists(self, email: str) -> bool:
+        return await self.collection.find_one({"email": email}, {"_id": 1}) is not None
+
+    async def iter_emails(self) -> AsyncIterator[str]:
+        # Covered by the unique email index
+        async for user in self.collection.find({}, {"_id": 0, "email": 1}):
+            yield user["email"]
+
+    async def create(self, user_doc: Dict[str, Any]) -> str:
+        try:
+            result = await self.collection.insert_one(user_doc)
+        except DuplicateKeyError as e:
+            raise DuplicateError(str(e))
+        return str(result.inserted_id)
+
+    async def create_many(self, user_docs: List[Dict[str, Any]]) -> List[Optional[str]]:
+        if not user_docs:
+            return []
+        # insert_many assigns _id to every document, including the ones that fail
+        duplicates = set()
+        try:
+            await self.collection.insert_many(user_docs, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != 11000 for error in errors):
+                raise
+            duplicates = {error["index"] for error in errors}
+        return [None if i in duplicates else str(doc["_id"]) for i, doc in enumerate(user_docs)]
+
+    async def update_by_email(self, email: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one_and_update(
+            {"email": email},
+            {"$set": fields},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def update_fields(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        result = await self.collection.update_one({"_id": _object_id(user_id)}, {"$set": fields}, session=current_session())
+        return result.matched_count > 0
+
+    async def record_session_completion(self, user_id: str, completed_at: datetime) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one_and_update(
+            {"_id": _object_id(user_id)},
+            _session_completion_update(completed_at),
+            projection={"_id": 0, "streak": 1, "longestStreak": 1, "totalSessions": 1},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
+        )
+
+def _session_completion_update(completed_at: datetime) -> List[Dict[str, Any]]:
+    """Update pipeline that applies the streak rules server-side, in the same write as the count"""
+    today = activity_day(completed_at)
+    yesterday = activity_day(completed_at - timedelta(days=1))
+    streak = {"$ifNull": ["$streak", 0]}
+    return [{
+        "$set": {
+            "totalSessions": {"$add": [{"$ifNull": ["$totalSessions", 0]}, 1]},
+            "streak": {
+                "$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$lastActiveDay", today]}, "then": {"$max": [streak, 1]}},
+                        {"case": {"$eq": ["$lastActiveDay", yesterday]}, "then": {"$add": [streak, 1]}},
+                        # Accounts from before lastActiveDay was tracked keep their count
+                        {"case": {"$eq": [{"$type": "$lastActiveDay"}, "missing"]}, "then": {"$add": [streak, 1]}}
+                    ],
+                    "default": 1
+                }
+            },
+            "lastActiveDay": today,
+            **activity_mask_update(completed_at.date())
+        }
+    }, {
+        "$set": {"longestStreak": {"$max": [{"$ifNull": ["$longestStreak", 0]}, "$streak"]}}
+    }]
+
+class MongoSessionRepository(SessionRepository):
+    def __init__(self, db: AsyncIOMotorDatabase, analytics_read_preference: Optional[_ServerMode] = None):
+        self.db = db
+        self.collection = db.training_sessions
+        # History and analytics scans inside analytics requests (db/routing.py) go here
+        self.analytics_db = db.with_options(read_preference=analytics_read_preference) if analytics_read_preference else db
+        self.analytics_collection = self.analytics_db.training_sessions
+
+    def _reads(self):
+        return self.analytics_collection if analytics_reads() else self.collection
+
+    async def ensure_indexes(self):
+        # Backs the per-user chronological scans of history and analytics
+        await self.collection.create_index([("userId", 1), ("createdAt", 1)])
+
+    async def create(self, session_doc: Dict[str, Any]) -> str:
+        result = await self.collection.insert_one(session_doc, session=current_session())
+        return str(result.inserted_id)
+
+    async def get_for_user(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(session_id), "userId": user_id}, session=current_session())
+
+    async def complete(
+        self,
+        session_id: str,
+        user_id: str,
+        submitted_results: List[Dict[str, Any]],
+        completed_at: datetime
+    ) -> Optional[Dict[str, Any]]:
+        # Merge, average and flag in one update, so results pushed concurrently by
+        # save_exercise_result are never overwritten and the result array is never
+        # sent back and forth
+        existing_results = {"$ifNull": ["$exerciseResults", []]}
+        new_results = {
+            "$filter": {
+                "input": {"$literal": submitted_results},
+                "cond": {"$not": [{"$in": ["$$this.exerciseId", {"$ifNull": ["$exerciseResults.exerciseId", []]}]}]}
+            }
+        }
+        return await self.collection.find_one_and_update(
+            {"_id": ObjectId(session_id), "userId": user_id, "isComplete": {"$ne": True}},
+            [
+                {"$set": {"exerciseResults": {"$concatArrays": [existing_results, new_results]}}},
+                {"$set": {
+                    # $avg skips results without a numeric score
+                    "averageScore": {"$ifNull": [{"$avg": "$exerciseResults.score"}, 0.0]},
+                    "isComplete": True,
+                    "completedAt": completed_at
+                }}
+            ],
+            projection={"_id": 0, "averageScore": 1},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
+        )
+
+    async def list_for_user(self, user_id: str, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+        cursor = self._reads().find({"userId": user_id}, session=current_session()).sort("createdAt", -1).skip(skip).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def count_for_user(self, user_id: str) -> int:
+        return await self._reads().count_documents({"userId": user_id}, session=current_session())
+
+    async def iter_for_analytics(
+        self,
+        user_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        # Push the "complete or has results" predicate to the server
+        query: Dict[str, Any] = {
+            "userId": user_id,
+            "$or": [
+                {"isComplete": True},
+                {"exerciseResults.0": {"$exists": True}}
+            ]
+        }
+        if start is not None or end is not None:
+            query["createdAt"] = {}
+            if start is not None:
+                query["createdAt"]["$gte"] = start
+            if end is not None:
+                query["createdAt"]["$lte"] = end
+
+        cursor = self._reads().find(query, ANALYTICS_PROJECTION, session=current_session()).sort("createdAt", 1)
+        async for session in cursor:
+            yield session
+
+    def iter_compacted(self, user_id: str, newest_first: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        db = self.analytics_db if analytics_reads() else self.db
+        return iter_bucketed_sessions(user_id, db, newest_first=newest_first, session=current_session())
+
+    def iter_compacted_months(
+        self,
+        user_id: str,
+        expand_since: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        db = self.analytics_db if analytics_reads() else self.db
+        return iter_compacted_months(user_id, db, expand_since=expand_since, session=current_session())
+
+class MongoExerciseResultRepository(ExerciseResultRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.training_sessions
+
+    async def append(
+        self,
+        session_id: str,
+        result: Dict[str, Any],
+        persisted: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        # Push and read back the result list in a single round trip
+        updated = await self.collection.find_one_and_update(
+            {"_id": ObjectId(session_id)},
+            {"$push": {"exerciseResults": result}},
+            projection={"exerciseResults": 1},
+            return_document=ReturnDocument.AFTER,
+            session=current_session()
+        )
+        return updated.get("exerciseResults", []) if updated else []
+
+class MongoNoteRepository(NoteRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.memory_notes
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("userId", 1), ("createdAt", -1)])
+
+    async def create(self, note_doc: Dict[str, Any]) -> str:
+        result = await self.collection.insert_one(note_doc)
+        return str(result.inserted_id) if result.inserted_id else None
+
+    async def iter_for_user(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        async for note in self.collection.find({"userId": user_id}).sort("createdAt", -1):
+            yield note
+
+    async def get_for_user(self, note_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": note_id, "userId": user_id})
+
+    async def update_for_user(self, note_id: str, user_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one_and_update(
+            {"_id": note_id, "userId": user_id},
+            {"$set": fields},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def delete_for_user(self, note_id: str, user_id: str) -> bool:
+        result = await self.collection.delete_one({"_id": note_id, "userId": user_id})
+        return result.deleted_count > 0
+
+class MongoRefreshTokenRepository(RefreshTokenRepository):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.refresh_tokens
+
+    async def ensure_indexes(self):
+        # MongoDB deletes records once expiresAt has passed
+        await self.collection.create_index("expiresAt", expireAfterSeconds=0)
+        await self.collection.create_index("familyId")
+
+    async def create(self, token_doc: Dict[str, Any]):
+        await self.collection.insert_one(token_doc)
+
+    async def consume(self, token_hash: str, now: datetime) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one_and_update(
+            {"_id": token_hash, "usedAt": None, "revokedAt": None, "expiresAt": {"$gt": now}},
+            {"$set": {"usedAt": now}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def get(self, token_hash: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": token_hash})
+
+    async def revoke_family(self, family_id: str, now: datetime) -> int:
+        result = await self.collection.update_many(
+            {"familyId": family_id, "revokedAt": None},
+            {"$set": {"revokedAt": now}}
+        )
+        return result.modified_count
+
+class MongoRepositories(Repositories):
+    """Repositories backed by a Motor database"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, analytics_read_preference: Optional[_ServerMode] = None):
+        super().__init__(
+            users=MongoUserRepository(db),
+            sessions=MongoSessionRepository(db, analytics_read_preference),
+            results=MongoExerciseResultRepository(db),
+            notes=MongoNoteRepository(db),
+            refresh_tokens=MongoRefreshTokenRepository(db)
+        )
+        self.db = db
@@ -0,0 +1,373 @@
+import asyncio
+import fcntl
+import os
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+from bson import ObjectId, json_util
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from repositories.base import ExerciseResultRepository, UnavailableError
+
+# Buffer exercise results locally and batch them into MongoDB
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+# When a save is acknowledged:
+#   "fsync"  - once the journal entry is on disk (survives power loss)
+#   "write"  - once the entry is handed to the OS (survives a process crash)
+#   "memory" - immediately, no journal (results since the last flush can be lost)
+WRITE_BEHIND_DURABILITY = os.getenv("WRITE_BEHIND_DURABILITY", "fsync").lower()
+# Directory holding one journal file per worker
+WRITE_BEHIND_JOURNAL_DIR = os.getenv("WRITE_BEHIND_JOURNAL_DIR", "journal")
+# Flush buffered results every N milliseconds...
+WRITE_BEHIND_FLUSH_INTERVAL_MS = int(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", 50))
+# ...or as soon as M results are waiting
+WRITE_BEHIND_FLUSH_MAX_RESULTS = int(os.getenv("WRITE_BEHIND_FLUSH_MAX_RESULTS", 500))
+# Saves are refused (503) once this many results are waiting, e.g. while MongoDB is unreachable
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", 20000))
+
+DURABILITY_MODES = ("fsync", "write", "memory")
+
+class ResultJournal:
+    """
+    Append-only journal of buffered exercise results.
+
+    Every record carries a sequence number. After a flush the journal is
+    truncated if nothing is left pending, otherwise a commit marker records the
+    highest flushed sequence number. In "fsync" mode concurrent appends share a
+    single fsync (group commit).
+
+    Each worker holds an exclusive lock on its own journal slot. On startup a
+    worker also adopts the records of any slot no live worker holds, so results
+    from a crashed or scaled-down worker are replayed too.
+    """
+
+    def __init__(self, directory: str, durability: str):
+        self.directory = directory
+        self.durability = durability
+        self.path: Optional[str] = None
+        self._file = None
+        self._orphans = []
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def _slot_path(self, slot: int) -> str:
+        return os.path.join(self.directory, f"results-{slot}.journal")
+
+    @staticmethod
+    def _read_records(journal_file) -> Tuple[List[Dict[str, Any]], int]:
+        """Unflushed records in a journal file, and the highest sequence number used"""
+        journal_file.seek(0)
+        committed = 0
+        last_seq = 0
+        records = []
+        for line in journal_file:
+            try:
+                entry = json_util.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-write was never acknowledged
+                continue
+            if "committed" in entry:
+                committed = max(committed, entry["committed"])
+            else:
+                records.append(entry)
+                last_seq = max(last_seq, entry["seq"])
+        return [record for record in records if record["seq"] > committed], last_seq
+
+    def open(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Lock a journal slot.
+
+        Returns the unflushed records of this worker's slot, which stay in place,
+        and those of orphaned slots, which the caller must append to this journal
+        before calling release_orphans().
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        own_records: List[Dict[str, Any]] = []
+        orphan_records: List[Dict[str, Any]] = []
+        slot = 0
+        while True:
+            path = self._slot_path(slot)
+            if not os.path.exists(path) and self._file is not None:
+                break
+
+            journal_file = open(path, "a+b")
+            try:
+                fcntl.flock(journal_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Owned by a live worker
+                journal_file.close()
+                slot += 1
+                continue
+
+            records, last_seq = self._read_records(journal_file)
+            if self._file is None:
+                self._file = journal_file
+                self.path = path
+                own_records = records
+                self._written_seq = self._synced_seq = last_seq
+            else:
+                self._orphans.append(journal_file)
+                orphan_records.extend(records)
+            slot += 1
+
+        return own_records, orphan_records
+
+    def release_orphans(self):
+        """Empty and unlock adopted slots once their records are in this journal"""
+        for journal_file in self._orphans:
+            journal_file.truncate(0)
+            journal_file.close()
+        self._orphans = []
+
+    def write(self, record: Dict[str, Any]) -> int:
+        """Append a record and return its sequence number"""
+        self._written_seq += 1
+        record["seq"] = self._written_seq
+        self._file.write(json_util.dumps(record).encode() + b"\n")
+        self._file.flush()
+        return record["seq"]
+
+    async def wait_durable(self, seq: int):
+        """Return once the record is as durable as the configured mode requires"""
+        if self.durability != "fsync":
+            return
+        while self._synced_seq < seq:
+            if self._sync_task is None:
+                self._sync_task = asyncio.create_task(self._sync())
+            await asyncio.shield(self._sync_task)
+
+    async def _sync(self):
+        # Everything written before the fsync starts is covered by it
+        target = self._written_seq
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._file.fileno())
+            self._synced_seq = max(self._synced_seq, target)
+        finally:
+            self._sync_task = None
+
+    def commit(self, seq: int, drained: bool):
+        """Record that every entry up to `seq` is in MongoDB"""
+        if drained:
+            self._file.truncate(0)
+        else:
+            self._file.write(json_util.dumps({"committed": seq}).encode() + b"\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class WriteBehindResultRepository(ExerciseResultRepository):
+    """
+    Exercise results acknowledged from a local journal and group-committed to MongoDB.
+
+    Buffered results are written with one bulk_write per flush, which pushes
+    every pending result of a session in a single update. Each result carries a
+    resultId and the update only appends IDs the session does not have yet, so
+    replaying the journal after a crash never duplicates results.
+
+    A session can be completed before its buffered results are flushed, for
+    instance when the completion request reaches another worker, whose flush
+    only drains its own buffer. Late results are still added to a completed
+    session, except for exercises the completion already recorded, and its
+    averageScore is recomputed.
+
+    Once WRITE_BEHIND_MAX_PENDING results are waiting, appends raise
+    UnavailableError instead of buffering without bound.
+
+    Readers other than the saving request see a buffered result once it is
+    flushed, at most WRITE_BEHIND_FLUSH_INTERVAL_MS later. Completing a session
+    flushes first.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        durability: str = WRITE_BEHIND_DURABILITY,
+        journal_dir: str = WRITE_BEHIND_JOURNAL_DIR,
+        flush_interval_ms: int = WRITE_BEHIND_FLUSH_INTERVAL_MS,
+        flush_max_results: int = WRITE_BEHIND_FLUSH_MAX_RESULTS,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown write-behind durability mode: {durability}")
+        self.collection = collection
+        self.durability = durability
+        self.journal = ResultJournal(journal_dir, durability) if durability != "memory" else None
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_max_results = flush_max_results
+        self.max_pending = max_pending
+        # (journal seq, session ID, result) in append order
+        self.pending: List[Tuple[int, str, Dict[str, Any]]] = []
+        # The same pending results, per session, for building acknowledgements
+        self._pending_by_session: Dict[str, List[Dict[str, Any]]] = {}
+        self._memory_seq = 0
+        self._flush_lock = asyncio.Lock()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_results = 0
+        self.refused = 0
+        self.last_flush_ms: Optional[float] = None
+
+    async def start(self) -> asyncio.Task:
+        """Replay the journal and start the background flusher"""
+        if self.journal is not None:
+            own_records, orphan_records = self.journal.open()
+            for record in own_records:
+                self.pending.append((record["seq"], record["sessionId"], record["result"]))
+                self._pending_by_session.setdefault(record["sessionId"], []).append(record["result"])
+            for record in orphan_records:
+                await self._buffer(record["sessionId"], record["result"])
+            self.journal.release_orphans()
+
+            recovered = len(own_records) + len(orphan_records)
+            if recovered:
+                print(f"Replaying {recovered} journaled exercise results")
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"Warning: Failed to replay exercise result journal: {str(e)}")
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Stop the flusher and write out whatever is still buffered"""
+        if self._task:
+            self._task.cancel()
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Warning: Exercise results left in journal at shutdown: {str(e)}")
+        if self.journal is not None:
+            self.journal.close()
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Results stay buffered and journaled; retried on the next tick
+                print(f"Warning: Failed to flush exercise results: {str(e)}")
+
+    async def _buffer(self, session_id: str, result: Dict[str, Any]):
+        if self.journal is not None:
+            seq = self.journal.write({"sessionId": session_id, "result": result})
+        else:
+            self._memory_seq += 1
+            seq = self._memory_seq
+        # Buffered before waiting on the journal, so a concurrent flush never
+        # truncates an entry that is not yet in MongoDB
+        self.pending.append((seq, session_id, result))
+        self._pending_by_session.setdefault(session_id, []).append(result)
+        if len(self.pending) >= self.flush_max_results:
+            self._full.set()
+        if self.journal is not None:
+            await self.journal.wait_durable(seq)
+
+    async def append(
+        self,
+        session_id: str,
+        result: Dict[str, Any],
+        persisted: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        if len(self.pending) >= self.max_pending:
+            self.refused += 1
+            raise UnavailableError(f"{len(self.pending)} exercise results are waiting to be written")
+        result = dict(result, resultId=uuid.uuid4().hex)
+        if persisted is None:
+            session = await self.collection.find_one({"_id": ObjectId(session_id)}, {"exerciseResults": 1})
+            persisted = (session or {}).get("exerciseResults") or []
+
+        # Results already buffered for this session but not yet in `persisted`
+        known_ids = {existing.get("resultId") for existing in persisted}
+        buffered = [
+            pending_result for pending_result in self._pending_by_session.get(session_id, [])
+            if pending_result["resultId"] not in known_ids
+        ]
+
+        await self._buffer(session_id, result)
+        return list(persisted) + buffered + [result]
+
+    def _session_update(self, session_id: str, results: List[Dict[str, Any]]) -> UpdateOne:
+        is_complete = {"$eq": ["$isComplete", True]}
+        new_results = {
+            "$filter": {
+                "input": {"$literal": results},
+                "cond": {"$and": [
+                    {"$not": [{"$in": ["$$this.resultId", {"$ifNull": ["$exerciseResults.resultId", []]}]}]},
+                    # A completed session keeps the results its completion recorded
+                    {"$or": [
+                        {"$not": [is_complete]},
+                        {"$not": [{"$in": ["$$this.exerciseId", {"$ifNull": ["$exerciseResults.exerciseId", []]}]}]}
+                    ]}
+                ]}
+            }
+        }
+        return UpdateOne(
+            {"_id": ObjectId(session_id)},
+            [
+                {"$set": {"exerciseResults": {"$concatArrays": [{"$ifNull": ["$exerciseResults", []]}, new_results]}}},
+                {"$set": {"averageScore": {"$cond": [
+                    is_complete,
+                    {"$ifNull": [{"$avg": "$exerciseResults.score"}, 0.0]},
+                    "$averageScore"
+                ]}}}
+            ]
+        )
+
+    async def flush(self, session_id: Optional[str] = None):
+        """
+        Write every buffered result to MongoDB in one bulk_write.
+
+        All sessions are flushed even when `session_id` is given; batching them
+        together is what makes a flush cheap.
+        """
+        async with self._flush_lock:
+            batch = list(self.pending)
+            if not batch:
+                return
+
+            by_session: Dict[str, List[Dict[str, Any]]] = {}
+            for _, pending_session_id, result in batch:
+                by_session.setdefault(pending_session_id, []).append(result)
+
+            started = time.perf_counter()
+            await self.collection.bulk_write(
+                [self._session_update(sid, results) for sid, results in by_session.items()],
+                ordered=False
+            )
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.flushed_results += len(batch)
+
+            # Appends made while the bulk write was in flight stay pending
+            self.pending = self.pending[len(batch):]
+            for sid, results in by_session.items():
+                remaining = self._pending_by_session[sid][len(results):]
+                if remaining:
+                    self._pending_by_session[sid] = remaining
+                else:
+                    del self._pending_by_session[sid]
+            if self.journal is not None:
+                self.journal.commit(max(entry[0] for entry in batch), drained=not self.pending)
+
+    def stats(self) -> dict:
+        return {
+            "durability": self.durability,
+            "pending": len(self.pending),
+            "flushes": self.flushes,
+            "flushedResults": self.flushed_results,
+            "refused": self.refused,
+            "lastFlushMs": self.last_flush_ms
+        }
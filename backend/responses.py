@@ -0,0 +1,37 @@
+import orjson
+from typing import Any, Dict, Type
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+class TrustedJSONResponse(Response):
+    """
+    JSON response for payloads built from documents we wrote ourselves.
+
+    Returning a Response instance bypasses FastAPI's response_model validation,
+    and orjson handles datetimes natively, so read-heavy list endpoints skip both
+    per-item pydantic construction and the revalidation pass. The endpoint's
+    response_model is still used for the OpenAPI schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+class TrustedModelShape:
+    """
+    Field list and defaults of a pydantic model, computed once, for shaping
+    trusted MongoDB documents into that model's response payload without validation.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.fields = tuple(model.model_fields)
+        self.defaults = {
+            name: field.default
+            for name, field in model.model_fields.items()
+            if not field.is_required()
+        }
+
+    def payload(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the model's fields, filling in model defaults for missing ones"""
+        defaults = self.defaults
+        return {field: document.get(field, defaults.get(field)) for field in self.fields}
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Production entrypoint: gunicorn managing uvicorn workers for main:app.
+
+    python serve.py                      # settings from gunicorn.conf.py and the environment
+    WEB_CONCURRENCY=4 python serve.py
+
+SIGTERM (or SIGINT) drains gracefully: workers stop accepting connections,
+finish in-flight requests and run the lifespan shutdown. SIGHUP reloads the
+workers one generation at a time.
+"""
+import os
+import sys
+
+from uvicorn_worker import UvicornWorker
+
+# Event loop for each worker: uvloop, asyncio or auto (uvloop when installed)
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+# HTTP/1.1 parser for each worker: httptools, h11 or auto (httptools when installed)
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+
+class TunedUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": SERVER_LOOP, "http": SERVER_HTTP, "lifespan": "on"}
+
+def main():
+    from gunicorn.app.wsgiapp import run
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    config = os.path.join(backend_dir, "gunicorn.conf.py")
+    sys.argv = [sys.argv[0], "--config", config, "--chdir", backend_dir, *sys.argv[1:], "main:app"]
+    run()
+
+if __name__ == "__main__":
+    main()
@@ -93,9 +93,10 @@ async def simulate_user1_completion():
         
         # Now test the progress calculation
         from progress.logic import get_progress_analytics
+        from repositories.mongo import MongoRepositories
         
         print('\n=== TESTING PROGRESS CALCULATION ===')
-        progress = await get_progress_analytics(user_id, db)
+        progress = await get_progress_analytics(user_id, MongoRepositories(db))
         
         print(f'Total sessions: {progress.total_sessions}')
         print(f'Overall average score: {progress.overall_average_score}')
@@ -0,0 +1,382 @@
+import os
+import base64
+import asyncio
+from datetime import datetime, timedelta
+
+# Run the whole API against the in-memory repositories; no MongoDB needed
+os.environ["REPOSITORY_BACKEND"] = "memory"
+
+from fastapi.testclient import TestClient
+
+from main import app
+from repositories.memory import InMemoryRepositories
+from repositories.dependencies import get_repositories
+
+def make_client():
+    repos = InMemoryRepositories()
+    app.dependency_overrides[get_repositories] = lambda: repos
+    return TestClient(app), repos
+
+def signup(client, email="tester@example.com"):
+    response = client.post("/api/v1/auth/signup", json={
+        "name": "Tester",
+        "email": email,
+        "password": "correct horse battery staple",
+        "ageGroup": "65-74",
+        "reminderTime": "09:00",
+        "cognitiveAreas": ["memory", "attention"]
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_training_flow_without_database():
+    """Start, save results, complete and read progress entirely in memory"""
+    client, repos = make_client()
+    headers = signup(client)
+
+    assert client.get("/api/v1/check-user/tester@example.com").json() == {"exists": True}
+    assert client.post("/api/v1/auth/signup", json={
+        "name": "Tester", "email": "tester@example.com", "password": "x",
+        "ageGroup": "65-74", "reminderTime": "09:00"
+    }).status_code == 400
+
+    started = client.post("/api/v1/training/session", headers=headers, json={
+        "mood": "focused",
+        "focusAreas": ["memory", "attention"]
+    })
+    assert started.status_code == 200, started.text
+    session_id = started.json()["sessionId"]
+
+    saved = client.post(f"/api/v1/training/session/{session_id}/exercise", headers=headers, json={
+        "exerciseId": "memory_sequence", "score": 80, "timeSpent": 120
+    })
+    assert saved.status_code == 200, saved.text
+    assert saved.json()["totalExercisesCompleted"] == 1
+
+    completed = client.post(f"/api/v1/training/session/{session_id}/complete", headers=headers, json={
+        "exerciseResults": [
+            # Already saved: the stored result wins over the resubmitted one
+            {"exerciseId": "memory_sequence", "score": 10, "timeSpent": 120},
+            {"exerciseId": "divided_attention", "score": 60, "timeSpent": 90}
+        ]
+    })
+    assert completed.status_code == 200, completed.text
+    assert completed.json()["averageScore"] == 70.0
+    assert client.post(f"/api/v1/training/session/{session_id}/complete", headers=headers, json={
+        "exerciseResults": []
+    }).status_code == 400
+    assert completed.json()["totalSessions"] == 1
+    assert completed.json()["newStreak"] == 1
+
+    activity = client.get("/api/v1/users/me/activity?days=10", headers=headers).json()
+    assert activity["activeDays"] == 1 and activity["currentStreak"] == 1
+    # Today is the last of the 10 days: bit 1 of the second byte
+    assert base64.b64decode(activity["bitmap"]) == bytes([0, 0b10])
+
+    sessions = client.get("/api/v1/training/sessions", headers=headers).json()
+    assert len(sessions) == 1 and sessions[0]["isComplete"] is True
+
+    progress = client.get("/api/v1/progress/", headers=headers).json()
+    assert progress["total_sessions"] == 1
+    assert {area["area_name"] for area in progress["focus_areas_analytics"]} == {"memory", "attention"}
+
+    app.dependency_overrides.clear()
+
+def test_progress_after_a_save_includes_buffered_results():
+    """A write-behind save must not leave progress computed without the new result"""
+    from repositories.base import UnavailableError
+    from repositories.memory import InMemoryExerciseResultRepository
+
+    class BufferedResults(InMemoryExerciseResultRepository):
+        def __init__(self, sessions):
+            super().__init__(sessions)
+            self.pending = []
+
+        async def append(self, session_id, result, persisted=None):
+            self.pending.append((session_id, result))
+            return list(persisted or []) + [result]
+
+        async def flush(self, session_id=None):
+            pending, self.pending = self.pending, []
+            for pending_session_id, result in pending:
+                await super().append(pending_session_id, result)
+
+    client, repos = make_client()
+    repos.results = BufferedResults(repos.sessions)
+    headers = signup(client, email="buffered@example.com")
+    session_id = client.post("/api/v1/training/session", headers=headers, json={
+        "mood": "focused", "focusAreas": ["memory"]
+    }).json()["sessionId"]
+
+    saved = client.post(f"/api/v1/training/session/{session_id}/exercise", headers=headers, json={
+        "exerciseId": "memory_sequence", "score": 80, "timeSpent": 120
+    })
+    assert saved.status_code == 200, saved.text
+    assert len(repos.results.pending) == 1  # still buffered: the save does not wait for a flush
+    progress = client.get("/api/v1/progress/", headers=headers).json()
+    assert progress["total_time_spent"] == 120
+
+    # A full buffer refuses the save with a retryable status
+    async def refuse(session_id, result, persisted=None):
+        raise UnavailableError("buffer full")
+    repos.results.append = refuse
+    refused = client.post(f"/api/v1/training/session/{session_id}/exercise", headers=headers, json={
+        "exerciseId": "word_pairs", "score": 70, "timeSpent": 60
+    })
+    assert refused.status_code == 503 and refused.headers["Retry-After"]
+
+    app.dependency_overrides.clear()
+
+def test_history_pages_merge_raw_and_compacted_sessions_by_date():
+    """An old abandoned raw session sorts between compacted ones instead of ahead of them"""
+    from bson import ObjectId
+    from progress.compaction import expand_compacted_session
+
+    client, repos = make_client()
+    headers = signup(client, email="history@example.com")
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+    now = datetime.utcnow()
+
+    def days_ago(days):
+        return now - timedelta(days=days)
+
+    for days, complete in ((25, False), (1, True)):
+        asyncio.run(repos.sessions.create({
+            "userId": user_id, "mood": "calm", "focusAreas": ["memory"], "exercises": [],
+            "exerciseResults": [], "isComplete": complete, "createdAt": days_ago(days)
+        }))
+
+    async def iter_compacted(compacted_user_id, newest_first=False):
+        for days in (20, 30) if newest_first else (30, 20):
+            yield expand_compacted_session({
+                "sessionId": ObjectId(), "mood": "calm", "focusAreas": ["memory"],
+                "results": [("memory_sequence", 70, 60)], "averageScore": 70,
+                "createdAt": days_ago(days), "completedAt": days_ago(days)
+            }, compacted_user_id)
+
+    repos.sessions.iter_compacted = iter_compacted
+
+    def page(skip, limit):
+        response = client.get(f"/api/v1/training/sessions?skip={skip}&limit={limit}", headers=headers)
+        assert response.status_code == 200, response.text
+        return [datetime.fromisoformat(session["createdAt"]) for session in response.json()]
+
+    assert page(0, 10) == [days_ago(days) for days in (1, 20, 25, 30)]
+    assert page(1, 2) == [days_ago(20), days_ago(25)]
+    assert page(3, 2) == [days_ago(30)]
+
+    app.dependency_overrides.clear()
+
+def test_memory_notes_without_database():
+    client, repos = make_client()
+    headers = signup(client, "notes@example.com")
+
+    created = client.post("/api/v1/memory-notes/", headers=headers, json={"title": "Pharmacy", "content": "Call at 3pm"})
+    assert created.status_code == 201, created.text
+    note_id = created.json()["id"]
+
+    updated = client.put(f"/api/v1/memory-notes/{note_id}", headers=headers, json={"content": "Call at 4pm"})
+    assert updated.json()["content"] == "Call at 4pm"
+    assert [note["id"] for note in client.get("/api/v1/memory-notes/", headers=headers).json()] == [note_id]
+
+    assert client.delete(f"/api/v1/memory-notes/{note_id}", headers=headers).status_code == 204
+    assert client.get(f"/api/v1/memory-notes/{note_id}", headers=headers).status_code == 404
+
+    app.dependency_overrides.clear()
+
+def test_refresh_tokens_rotate_and_detect_reuse():
+    client, repos = make_client()
+    signed_up = client.post("/api/v1/auth/signup", json={
+        "name": "Tester", "email": "refresh@example.com", "password": "correct horse battery staple",
+        "ageGroup": "65-74", "reminderTime": "09:00"
+    }).json()
+    first = signed_up["refresh_token"]
+
+    refreshed = client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert refreshed.status_code == 200, refreshed.text
+    second = refreshed.json()["refresh_token"]
+    assert second != first
+    headers = {"Authorization": f"Bearer {refreshed.json()['access_token']}"}
+    assert client.get("/api/v1/users/me", headers=headers).json()["email"] == "refresh@example.com"
+
+    # Replaying a used token revokes the whole chain, including the newest token
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": first}).status_code == 401
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": second}).status_code == 401
+
+    # Only hashes are stored
+    assert first not in repos.refresh_tokens.tokens and second not in repos.refresh_tokens.tokens
+
+    logged_in = client.post("/api/v1/auth/login", data={
+        "username": "refresh@example.com", "password": "correct horse battery staple"
+    }).json()
+    assert client.post("/api/v1/auth/logout", json={"refresh_token": logged_in["refresh_token"]}).status_code == 204
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": logged_in["refresh_token"]}).status_code == 401
+
+    app.dependency_overrides.clear()
+
+def test_outdated_password_hashes_are_upgraded_on_login():
+    from passlib.hash import argon2
+    from auth.security import get_pwd_context
+
+    client, repos = make_client()
+    signup(client, email="rehash@example.com")
+    user_id = repos.users.ids_by_email["rehash@example.com"]
+    # A hash from before the parameters were raised
+    weak_hash = argon2.using(time_cost=1, memory_cost=8192, parallelism=1).hash("correct horse battery staple")
+    repos.users.users_by_id[user_id]["hashed_password"] = weak_hash
+
+    response = client.post("/api/v1/auth/login", data={
+        "username": "rehash@example.com", "password": "correct horse battery staple"
+    })
+    assert response.status_code == 200, response.text
+    upgraded = repos.users.users_by_id[user_id]["hashed_password"]
+    assert upgraded != weak_hash and not get_pwd_context().needs_update(upgraded)
+
+    # A wrong password never rewrites the hash
+    response = client.post("/api/v1/auth/login", data={"username": "rehash@example.com", "password": "wrong"})
+    assert response.status_code == 401
+    assert repos.users.users_by_id[user_id]["hashed_password"] == upgraded
+
+    app.dependency_overrides.clear()
+
+def test_bulk_provisioning_reports_failed_rows():
+    import auth.router
+
+    client, repos = make_client()
+    headers = signup(client, email="staff@example.com")
+    upload = (
+        "name,email,password,ageGroup,reminderTime,cognitiveAreas\n"
+        "Ann,ann@example.com,pw-ann-1234,65-74,09:00,memory;attention\n"
+        "Bob,not-an-email,pw-bob-1234,65-74,09:00,\n"
+        "Cat,staff@example.com,pw-cat-1234,75+,10:00,\n"
+        "Dan,dan@example.com,pw-dan-1234,55-64,08:00,\n"
+    )
+    bulk_headers = {**headers, "Content-Type": "text/csv"}
+    assert client.post("/api/v1/users/bulk", content=upload, headers=bulk_headers).status_code == 403
+
+    auth.router.ADMIN_EMAILS.add("staff@example.com")
+    try:
+        response = client.post("/api/v1/users/bulk", content=upload, headers=bulk_headers)
+        latin1 = client.post("/api/v1/users/bulk", content=upload.replace("Ann", "Ánn").encode("latin-1"), headers=bulk_headers)
+    finally:
+        auth.router.ADMIN_EMAILS.discard("staff@example.com")
+    assert latin1.status_code == 400 and latin1.json()["detail"] == "Upload must be UTF-8 encoded"
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["total"], report["created"]) == (4, 2)
+    assert [(f["row"], f["email"]) for f in report["failed"]] == [(2, "not-an-email"), (3, "staff@example.com")]
+    assert "already registered" in report["failed"][1]["error"]
+
+    # Provisioned users can log in and keep their list fields
+    logged_in = client.post("/api/v1/auth/login", data={"username": "ann@example.com", "password": "pw-ann-1234"})
+    assert logged_in.status_code == 200, logged_in.text
+    ann = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {logged_in.json()['access_token']}"})
+    assert ann.json()["cognitiveAreas"] == ["memory", "attention"]
+
+    app.dependency_overrides.clear()
+
+def test_profile_endpoint_is_admin_only_and_returns_collapsed_stacks():
+    import auth.router
+
+    client, repos = make_client()
+    headers = signup(client, email="oncall@example.com")
+    assert client.get("/api/v1/admin/profile?seconds=0.2", headers=headers).status_code == 403
+    assert client.get("/api/v1/admin/stalls", headers=headers).status_code == 403
+
+    auth.router.ADMIN_EMAILS.add("oncall@example.com")
+    try:
+        response = client.get("/api/v1/admin/profile?seconds=0.3&include_idle=true", headers=headers)
+        stalls = client.get("/api/v1/admin/stalls", headers=headers)
+    finally:
+        auth.router.ADMIN_EMAILS.discard("oncall@example.com")
+    assert response.status_code == 200, response.text
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+    assert stalls.status_code == 200 and isinstance(stalls.json()["recentStalls"], list)
+
+    app.dependency_overrides.clear()
+
+def test_x_profile_header_profiles_admin_requests_only():
+    import pstats
+    import tempfile
+    import auth.router
+    import monitoring.request_profile
+
+    monitoring.request_profile.PROFILE_REPORT_DIR = tempfile.mkdtemp()
+    client, repos = make_client()
+    headers = signup(client, email="perf@example.com")
+    profiled = {**headers, "X-Profile": "1"}
+    assert "X-Profile-Report" not in client.get("/api/v1/users/me", headers=profiled).headers
+
+    auth.router.ADMIN_EMAILS.add("perf@example.com")
+    try:
+        response = client.get("/api/v1/progress/", headers=profiled)
+        assert response.status_code == 200, response.text
+        assert "mongo commands" in response.headers["X-Profile-Summary"]
+        report_url = f"/api/v1/admin/profiles/{response.headers['X-Profile-Report']}"
+        report = client.get(report_url, headers=headers).json()
+        raw_profile = client.get(f"{report_url}/pstats", headers=headers).content
+        assert client.get("/api/v1/admin/profiles/not-a-report", headers=headers).status_code == 404
+    finally:
+        auth.router.ADMIN_EMAILS.discard("perf@example.com")
+    assert (report["method"], report["path"], report["status"]) == ("GET", "/api/v1/progress/", 200)
+    assert report["appFunctions"] and all("site-packages" not in f["function"] for f in report["appFunctions"])
+    profile_path = os.path.join(monitoring.request_profile.PROFILE_REPORT_DIR, "downloaded.prof")
+    with open(profile_path, "wb") as profile_file:
+        profile_file.write(raw_profile)
+    profiled_functions = {name for _, _, name in pstats.Stats(profile_path).stats}
+    assert "get_progress_analytics" in profiled_functions
+    assert report["mongo"]["count"] == 0  # in-memory repositories
+
+    app.dependency_overrides.clear()
+
+def test_streak_follows_consecutive_days():
+    """Same-day sessions keep the streak, the next day extends it, a gap restarts it"""
+    async def run():
+        users = InMemoryRepositories().users
+        user_id = await users.create({"email": "streak@example.com", "streak": 0, "totalSessions": 0, "lastActiveDay": None})
+        monday = datetime(2025, 3, 3, 9, 0)
+
+        def stats(streak, longest, total):
+            return {"streak": streak, "longestStreak": longest, "totalSessions": total}
+
+        assert await users.record_session_completion(user_id, monday) == stats(1, 1, 1)
+        assert await users.record_session_completion(user_id, monday + timedelta(hours=8)) == stats(1, 1, 2)
+        assert await users.record_session_completion(user_id, monday + timedelta(days=1)) == stats(2, 2, 3)
+        assert await users.record_session_completion(user_id, monday + timedelta(days=4)) == stats(1, 2, 4)
+
+        # Accounts created before lastActiveDay existed keep their streak
+        legacy_id = await users.create({"email": "legacy@example.com", "streak": 5, "totalSessions": 9})
+        assert await users.record_session_completion(legacy_id, monday) == stats(6, 6, 10)
+        assert await users.record_session_completion("missing", monday) is None
+
+    asyncio.run(run())
+
+def test_activity_heatmap_tolerates_null_streaks():
+    """Accounts created before longestStreak existed may hold an explicit null for it"""
+    from auth.security import create_access_token
+
+    client, repos = make_client()
+    asyncio.run(repos.users.create({
+        "email": "nulls@example.com", "name": "Nulls", "hashed_password": "-", "ageGroup": "65-74",
+        "reminderTime": "09:00", "totalSessions": 0, "createdAt": datetime.utcnow(),
+        "streak": 3, "longestStreak": None, "lastActiveDay": None
+    }))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'nulls@example.com'})}"}
+
+    response = client.get("/api/v1/users/me/activity?days=10", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["currentStreak"] == 3 and response.json()["longestStreak"] == 3
+
+if __name__ == "__main__":
+    test_training_flow_without_database()
+    test_memory_notes_without_database()
+    test_refresh_tokens_rotate_and_detect_reuse()
+    test_outdated_password_hashes_are_upgraded_on_login()
+    test_bulk_provisioning_reports_failed_rows()
+    test_profile_endpoint_is_admin_only_and_returns_collapsed_stacks()
+    test_x_profile_header_profiles_admin_requests_only()
+    test_streak_follows_consecutive_days()
+    test_activity_heatmap_tolerates_null_streaks()
+    print("✅ In-memory API flows passed")
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from training.archival import ARCHIVE_COLLECTION, sweep_abandoned_sessions
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def limit(self, count):
+        return FakeCursor(self.documents[:count])
+
+    async def to_list(self, length=None):
+        return [dict(document) for document in self.documents]
+
+class FakeHotCollection:
+    def __init__(self, sessions):
+        self.sessions = {session["_id"]: session for session in sessions}
+
+    def find(self, query):
+        return FakeCursor(list(self.sessions.values()))
+
+    async def delete_many(self, query):
+        ids = [session_id for session_id in query["_id"]["$in"] if session_id in self.sessions]
+        for session_id in ids:
+            del self.sessions[session_id]
+        return type("DeleteResult", (), {"deleted_count": len(ids)})()
+
+    async def distinct(self, field, query):
+        return [session_id for session_id in query["_id"]["$in"] if session_id in self.sessions]
+
+class FailingArchive:
+    """Rejects every insert with the given write error code"""
+
+    def __init__(self, code):
+        self.code = code
+
+    async def insert_many(self, documents, ordered=True):
+        raise BulkWriteError({
+            "nInserted": 0,
+            "writeErrors": [{"index": i, "code": self.code, "errmsg": "rejected"} for i in range(len(documents))]
+        })
+
+class FakeDatabase:
+    def __init__(self, sessions, archive):
+        self.training_sessions = FakeHotCollection(sessions)
+        self.archive = archive
+
+    def __getitem__(self, name):
+        assert name == ARCHIVE_COLLECTION
+        return self.archive
+
+def abandoned_sessions(count):
+    created_at = datetime.utcnow() - timedelta(days=7)
+    return [
+        {"_id": ObjectId(), "userId": "user-1", "isComplete": False, "exerciseResults": [], "createdAt": created_at}
+        for _ in range(count)
+    ]
+
+def test_failed_archive_insert_keeps_sessions():
+    db = FakeDatabase(abandoned_sessions(3), FailingArchive(code=121))  # document validation failure
+    try:
+        asyncio.run(sweep_abandoned_sessions(db, policy="archive"))
+        raise AssertionError("the sweep should fail when sessions cannot be archived")
+    except BulkWriteError:
+        pass
+    assert len(db.training_sessions.sessions) == 3
+
+def test_already_archived_sessions_are_removed():
+    db = FakeDatabase(abandoned_sessions(3), FailingArchive(code=11000))
+    stats = asyncio.run(sweep_abandoned_sessions(db, policy="archive"))
+    assert stats == {"sessions_archived": 0, "sessions_removed": 3}
+    assert not db.training_sessions.sessions
+
+if __name__ == "__main__":
+    test_failed_archive_insert_keeps_sessions()
+    test_already_archived_sessions_are_removed()
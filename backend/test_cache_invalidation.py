@@ -0,0 +1,177 @@
+import os
+import time
+import asyncio
+import pytest
+from bson import ObjectId, Timestamp
+
+from cache.backends import LRUCacheBackend
+from cache.invalidation import InvalidationBus, user_id_key, user_email_key, progress_key
+from repositories.caching import CachingUserRepository
+from repositories.memory import InMemoryUserRepository
+
+def test_lru_evicts_least_recently_used_and_expired():
+    async def run():
+        cache = LRUCacheBackend(max_entries=2, default_ttl=60)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        assert await cache.get("a") == 1  # "b" is now least recently used
+        await cache.set("c", 3)
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+
+        await cache.set("short", 4, ttl=-1)
+        assert await cache.get("short") is None
+
+        await cache.set("progress:u1", 5)
+        await cache.delete_prefix("progress:")
+        assert await cache.get("progress:u1") is None
+
+    asyncio.run(run())
+
+def test_events_evict_affected_keys():
+    async def run():
+        cache = LRUCacheBackend()
+        bus = InvalidationBus(db=None, cache=cache)
+        user_id = ObjectId()
+
+        await cache.set(user_id_key(str(user_id)), {"name": "Tester"})
+        await cache.set(progress_key(str(user_id)), "summary")
+        await cache.set(progress_key("someone-else"), "other summary")
+
+        # Profile update: the user document and the streak shown in progress go stale
+        await bus.handle_event({
+            "operationType": "update",
+            "ns": {"db": "mindbloom", "coll": "users"},
+            "documentKey": {"_id": user_id},
+            "clusterTime": Timestamp(int(time.time()), 1)
+        })
+        assert await cache.get(user_id_key(str(user_id))) is None
+        assert await cache.get(progress_key(str(user_id))) is None
+        assert await cache.get(progress_key("someone-else")) == "other summary"
+        assert bus.last_event_lag_ms is not None
+
+        # A new session evicts only that user's progress
+        await cache.set(progress_key(str(user_id)), "summary")
+        await bus.handle_event({
+            "operationType": "insert",
+            "ns": {"db": "mindbloom", "coll": "training_sessions"},
+            "documentKey": {"_id": ObjectId()},
+            "fullDocument": {"userId": str(user_id)}
+        })
+        assert await cache.get(progress_key(str(user_id))) is None
+        assert await cache.get(progress_key("someone-else")) == "other summary"
+
+        await bus.handle_event({"operationType": "dropDatabase", "ns": {"db": "mindbloom"}})
+        assert cache.stats()["entries"] == 0
+
+    asyncio.run(run())
+
+def test_deletes_evict_the_owner_or_one_prefix_per_batch():
+    async def run():
+        cache = LRUCacheBackend()
+        bus = InvalidationBus(db=None, cache=cache)
+        session_id = ObjectId()
+        sessions = {"db": "mindbloom", "coll": "training_sessions"}
+
+        # The insert carries the owner; the later delete only carries the _id
+        await bus.handle_event({
+            "operationType": "insert", "ns": sessions,
+            "documentKey": {"_id": session_id}, "fullDocument": {"userId": "u1"}
+        })
+        await cache.set(progress_key("u1"), "summary")
+        await cache.set(progress_key("u2"), "other summary")
+        await bus.handle_event({"operationType": "delete", "ns": sessions, "documentKey": {"_id": session_id}})
+        assert await cache.get(progress_key("u1")) is None
+        assert await cache.get(progress_key("u2")) == "other summary"
+        assert not bus.owners
+
+        # Deletes of sessions this worker never saw, e.g. a compaction pass, scan the cache once per batch
+        for _ in range(500):
+            await bus.handle_event({"operationType": "delete", "ns": sessions, "documentKey": {"_id": ObjectId()}})
+        assert await cache.get(progress_key("u2")) == "other summary"
+        await bus.flush_pending()
+        assert await cache.get(progress_key("u2")) is None
+        assert bus.prefix_evictions == 1
+
+    asyncio.run(run())
+
+def test_caching_repository_reads_through_and_evicts_on_write():
+    async def run():
+        cache = LRUCacheBackend()
+        inner = InMemoryUserRepository()
+        users = CachingUserRepository(inner, cache)
+        user_id = await users.create({"email": "tester@example.com", "name": "Tester"})
+
+        assert (await users.get_by_email("tester@example.com"))["name"] == "Tester"
+        assert await cache.get(user_email_key("tester@example.com")) == user_id
+
+        # Served from the cache: a write that bypasses this worker is not seen...
+        inner.users_by_id[user_id]["name"] = "Changed elsewhere"
+        assert (await users.get_by_email("tester@example.com"))["name"] == "Tester"
+
+        # ...until the key is evicted, here by a local write
+        await users.update_by_email("tester@example.com", {"name": "Renamed"})
+        assert (await users.get_by_email("tester@example.com"))["name"] == "Renamed"
+        assert (await users.get_by_id(user_id))["name"] == "Renamed"
+
+    asyncio.run(run())
+
+@pytest.mark.skipif(not os.getenv("MONGODB_TEST_URI"), reason="MONGODB_TEST_URI is not set")
+def test_two_workers_stay_coherent():
+    """
+    Two workers, each with its own client, cache and invalidation bus. Needs a
+    local single-node replica set, e.g.:
+
+        mongod --replSet rs0 --dbpath /tmp/rs0 && mongosh --eval "rs.initiate()"
+        MONGODB_TEST_URI="mongodb://localhost:27017/?replicaSet=rs0" python test_cache_invalidation.py
+    """
+    mongodb_uri = os.getenv("MONGODB_TEST_URI")
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from repositories.mongo import MongoUserRepository
+
+    async def run():
+        workers = []
+        for _ in range(2):
+            client = AsyncIOMotorClient(mongodb_uri)
+            db = client.mindbloom_cache_test
+            cache = LRUCacheBackend()
+            bus = InvalidationBus(db, cache)
+            bus.start()
+            await bus.wait_until_ready()
+            workers.append((client, cache, bus, CachingUserRepository(MongoUserRepository(db), cache)))
+
+        (client_a, _, bus_a, users_a), (client_b, cache_b, bus_b, users_b) = workers
+        try:
+            await client_a.mindbloom_cache_test.users.delete_many({})
+            await users_a.create({"email": "tester@example.com", "name": "Tester"})
+
+            # Worker B caches the user, then worker A updates the profile
+            user = await users_b.get_by_email("tester@example.com")
+            assert user["name"] == "Tester"
+            await users_a.update_by_email("tester@example.com", {"name": "Renamed"})
+
+            started = time.perf_counter()
+            while await cache_b.get(user_id_key(str(user["_id"]))) is not None:
+                assert time.perf_counter() - started < 2, "worker B was never invalidated"
+                await asyncio.sleep(0.005)
+            print(f"Worker B invalidated after {(time.perf_counter() - started) * 1000:.1f} ms "
+                  f"(stream lag {bus_b.last_event_lag_ms:.1f} ms)")
+
+            assert (await users_b.get_by_email("tester@example.com"))["name"] == "Renamed"
+        finally:
+            await bus_a.stop()
+            await bus_b.stop()
+            await client_a.drop_database("mindbloom_cache_test")
+            client_a.close()
+            client_b.close()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_lru_evicts_least_recently_used_and_expired()
+    test_events_evict_affected_keys()
+    test_deletes_evict_the_owner_or_one_prefix_per_batch()
+    test_caching_repository_reads_through_and_evicts_on_write()
+    if os.getenv("MONGODB_TEST_URI"):
+        test_two_workers_stay_coherent()
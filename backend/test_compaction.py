@@ -0,0 +1,188 @@
+import asyncio
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+from progress.compaction import BUCKET_COLLECTION, compact_sessions
+from progress.logic import get_progress_analytics
+from repositories.mongo import MongoRepositories
+
+def evaluate(expression, document):
+    """The few aggregation expressions the bucket projection uses"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return document.get(expression[1:])
+    if isinstance(expression, dict):
+        (operator, args), = expression.items()
+        values = [evaluate(arg, document) for arg in args]
+        if operator == "$or":
+            return any(values)
+        if operator == "$ne":
+            return values[0] != values[1]
+        if operator == "$gte":
+            return values[0] is not None and values[0] >= values[1]
+        raise NotImplementedError(operator)
+    return expression
+
+def matches(document, query):
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(document, option) for option in condition):
+                return False
+        elif field == "exerciseResults.0":
+            if bool(document.get("exerciseResults")) != condition["$exists"]:
+                return False
+        elif isinstance(condition, dict):
+            value = document.get(field)
+            if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif document.get(field) != condition:
+            return False
+    return True
+
+def project(document, projection):
+    if not projection or all(value == 0 for value in projection.values()):
+        return {key: value for key, value in document.items() if (projection or {}).get(key, 1)}
+    projected = {"_id": document["_id"]}
+    for field, rule in projection.items():
+        if isinstance(rule, dict):
+            condition, then, _ = rule["$cond"]
+            if evaluate(condition, document):
+                projected[field] = evaluate(then, document)
+        elif field.split(".")[0] in document:
+            projected[field.split(".")[0]] = document[field.split(".")[0]]
+    return projected
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, field_direction in reversed(keys):
+            self.documents.sort(key=lambda document: document[field], reverse=field_direction == -1)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+    def __aiter__(self):
+        return self._iterate()
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = {}
+        self.projections = []
+
+    def find(self, query=None, projection=None, session=None):
+        self.projections.append(projection)
+        return FakeCursor([project(doc, projection) for doc in self.documents.values() if matches(doc, query or {})])
+
+    async def find_one(self, query=None, projection=None, session=None):
+        for document in self.documents.values():
+            if matches(document, query or {}):
+                return dict(document)
+        return None
+
+    async def insert_one(self, document):
+        self.documents[document["_id"]] = dict(document)
+
+    async def update_one(self, query, update):
+        matched = [doc for doc in self.documents.values() if matches(doc, query)]
+        for document in matched:
+            document.update(update.get("$set", {}))
+            for field in update.get("$unset", {}):
+                document.pop(field, None)
+        return type("UpdateResult", (), {"matched_count": len(matched)})()
+
+    async def delete_many(self, query):
+        for document in [doc for doc in self.documents.values() if matches(doc, query)]:
+            del self.documents[document["_id"]]
+
+class FakeDatabase:
+    def __init__(self):
+        self.training_sessions = FakeCollection()
+        self.users = FakeCollection()
+        self.memory_notes = FakeCollection()
+        self.refresh_tokens = FakeCollection()
+        self.buckets = FakeCollection()
+
+    def __getitem__(self, name):
+        return self.buckets if name == BUCKET_COLLECTION else getattr(self, name)
+
+def add_history(db, days, now=None):
+    """One session a day for `days` days, plus an old session that was abandoned after one result"""
+    now = now or datetime.utcnow()
+    db.users.documents["user-1"] = {"_id": "user-1", "streak": 0}
+    for day in range(days, 0, -1):
+        session_id = ObjectId()
+        db.training_sessions.documents[session_id] = {
+            "_id": session_id,
+            "userId": "user-1",
+            "focusAreas": ["memory", "attention"] if day % 3 else ["language"],
+            "averageScore": 40 + (day * 7) % 60,
+            "isComplete": True,
+            "createdAt": now - timedelta(days=day, hours=1),
+            "exerciseResults": [
+                {"exerciseId": "memory_sequence", "score": 30 + (day * 11) % 70, "timeSpent": 120},
+                {"exerciseId": "divided_attention", "score": 20 + (day * 13) % 80, "timeSpent": 90}
+            ]
+        }
+    session_id = ObjectId()
+    db.training_sessions.documents[session_id] = {
+        "_id": session_id, "userId": "user-1", "focusAreas": ["memory"], "isComplete": False,
+        "createdAt": now - timedelta(days=200), "exerciseResults": [{"exerciseId": "word_pairs", "score": 55, "timeSpent": 60}]
+    }
+
+def summary_of(db):
+    summary = asyncio.run(get_progress_analytics("user-1", MongoRepositories(db)))
+    return summary.model_dump(exclude={"generated_at"})
+
+def test_analytics_read_month_aggregates_after_compaction():
+    db = FakeDatabase()
+    add_history(db, days=400)
+    before = summary_of(db)
+
+    stats = asyncio.run(compact_sessions(db, older_than_days=90))
+    assert stats["sessions_compacted"] > 250
+    assert all(not bucket["aggregates"]["areas"] or "area" in bucket["aggregates"]["areas"][0]
+               for bucket in db.buckets.documents.values())
+
+    db.buckets.projections.clear()
+    after = summary_of(db)
+    assert after == before
+    # Months outside the 30-day trend window are read as aggregates, without their sessions
+    assert not any(isinstance(projection.get("sessions"), int) for projection in db.buckets.projections)
+
+def test_folding_more_sessions_into_a_month_keeps_aggregates_exact():
+    db = FakeDatabase()
+    now = datetime.utcnow()
+    add_history(db, days=200, now=now)
+    asyncio.run(compact_sessions(db, older_than_days=90, batch_size=40))
+    asyncio.run(compact_sessions(db, older_than_days=90))
+    folded = asyncio.run(compact_sessions(db, older_than_days=90))
+    assert folded["sessions_compacted"] == 0
+
+    reference = FakeDatabase()
+    add_history(reference, days=200, now=now)
+    assert summary_of(db)["focus_areas_analytics"] == summary_of(reference)["focus_areas_analytics"]
+
+def test_area_names_are_stored_as_values():
+    db = FakeDatabase()
+    add_history(db, days=120)
+    for session in db.training_sessions.documents.values():
+        session["focusAreas"] = ["$where", "a.b"]
+    stats = asyncio.run(compact_sessions(db, older_than_days=90))
+    assert stats["sessions_compacted"] > 0
+    areas = {area["area"] for bucket in db.buckets.documents.values() for area in bucket["aggregates"]["areas"]}
+    assert areas == {"$where", "a.b"}
+
+if __name__ == "__main__":
+    test_analytics_read_month_aggregates_after_compaction()
+    test_folding_more_sessions_into_a_month_keeps_aggregates_exact()
+    test_area_names_are_stored_as_values()
@@ -0,0 +1,140 @@
+import asyncio
+from datetime import timedelta
+
+from pymongo import monitoring, _csot
+from pymongo.errors import AutoReconnect, NetworkTimeout
+from motor.frameworks.asyncio import run_on_executor
+
+from db.resilience import (
+    CircuitBreaker,
+    DatabaseHealthListener,
+    database_deadline,
+    remaining_seconds,
+    retry_idempotent_read,
+    CLOSED, OPEN, HALF_OPEN
+)
+from middleware.deadlines import DeadlineMiddleware, request_deadline
+
+ADDRESS = ("localhost", 27017)
+
+def succeeded(ms):
+    return monitoring.CommandSucceededEvent(timedelta(milliseconds=ms), {"ok": 1}, "find", 1, ADDRESS, 1)
+
+def failed(failure):
+    return monitoring.CommandFailedEvent(timedelta(milliseconds=1), failure, "find", 1, ADDRESS, 1)
+
+def test_routes_map_to_deadlines():
+    assert request_deadline("GET", "/api/v1/progress/quick") == "progress"
+    assert request_deadline("GET", "/api/v1/training/sessions") == "history"
+    assert request_deadline("POST", "/api/v1/training/session/abc/exercise") == "training"
+    assert request_deadline("GET", "/api/v1/memory-notes/") == "default"
+    assert request_deadline("GET", "/healthz") is None
+
+def test_breaker_opens_on_failure_rate_and_closes_after_probes():
+    breaker = CircuitBreaker(failure_rate=0.5, window=10, min_calls=4, open_seconds=5, half_open_successes=2)
+    for success in (True, False, True):
+        breaker.record(success, now=0.0)
+    assert breaker.state(0.0) == CLOSED  # not enough calls yet
+    breaker.record(False, now=0.0)
+    assert breaker.state(0.0) == OPEN
+    assert not breaker.allow(now=1.0)
+    assert breaker.retry_after(now=1.0) == 4.0
+
+    # After the open period one failure reopens it, a run of successes closes it
+    assert breaker.state(5.0) == HALF_OPEN
+    breaker.record(False, now=5.0)
+    assert breaker.state(6.0) == OPEN
+    breaker.record(True, now=10.0)
+    breaker.record(True, now=10.0)
+    assert breaker.state(10.0) == CLOSED
+    assert breaker.stats()["timesOpened"] == 2
+    assert breaker.stats()["fastFailures"] == 1
+
+def test_slow_and_timed_out_commands_count_as_failures():
+    breaker = CircuitBreaker(failure_rate=0.5, window=10, min_calls=10)
+    listener = DatabaseHealthListener(breaker, slow_call_ms=100)
+    listener.succeeded(succeeded(5))
+    listener.succeeded(succeeded(150))
+    listener.failed(failed({"code": 11000, "errmsg": "E11000 duplicate key"}))
+    listener.failed(failed({"code": 50, "errmsg": "operation exceeded time limit"}))
+    listener.failed(failed({"errmsg": "connection closed", "errtype": "AutoReconnect"}))
+    listener.failed(monitoring.ServerHeartbeatFailedEvent(0.1, AutoReconnect("down"), ADDRESS))
+    assert breaker.stats()["recentCalls"] == 6
+    assert breaker.stats()["recentFailures"] == 4
+
+def test_reads_retry_transient_errors_only():
+    async def run():
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise AutoReconnect("primary stepped down")
+            return "ok"
+
+        assert await retry_idempotent_read(flaky, attempts=3, base_delay=0.001) == "ok"
+        assert len(calls) == 3
+
+        calls.clear()
+
+        async def timing_out():
+            calls.append(1)
+            raise NetworkTimeout("timed out")
+
+        try:
+            await retry_idempotent_read(timing_out, attempts=3, base_delay=0.001)
+            assert False, "timeouts are not retried"
+        except NetworkTimeout:
+            assert len(calls) == 1
+
+    asyncio.run(run())
+
+def test_middleware_sets_deadline_and_fast_fails_non_critical_reads():
+    async def run():
+        seen = {}
+
+        async def app(scope, receive, send):
+            seen[scope["path"]] = remaining_seconds()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        breaker = CircuitBreaker(min_calls=1, open_seconds=7)
+        middleware = DeadlineMiddleware(app, breaker, {"default": 5000, "progress": 3000, "training": 4000})
+        responses = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                responses.append((message["status"], dict(message["headers"]).get(b"retry-after")))
+
+        def request(method, path):
+            return middleware({"type": "http", "method": method, "path": path}, None, send)
+
+        await request("GET", "/api/v1/progress/")
+        assert 2.9 < seen["/api/v1/progress/"] <= 3.0
+        assert remaining_seconds() is None  # reset once the request is done
+
+        breaker.record(False)
+        await request("GET", "/api/v1/progress/quick")
+        await request("POST", "/api/v1/training/session")  # critical writes still go through
+        assert responses == [(200, None), (503, b"7"), (200, None)]
+        assert "/api/v1/progress/quick" not in seen
+
+    asyncio.run(run())
+
+def test_deadline_reaches_the_driver_on_its_threads():
+    async def run():
+        loop = asyncio.get_running_loop()
+        with database_deadline(2.0):
+            # How Motor hands every operation to pymongo on its thread pool
+            return await run_on_executor(loop, _csot.remaining)
+
+    assert 1.9 < asyncio.run(run()) <= 2.0
+    assert _csot.get_timeout() is None
+
+if __name__ == "__main__":
+    test_routes_map_to_deadlines()
+    test_breaker_opens_on_failure_rate_and_closes_after_probes()
+    test_slow_and_timed_out_commands_count_as_failures()
+    test_reads_retry_transient_errors_only()
+    test_middleware_sets_deadline_and_fast_fails_non_critical_reads()
+    test_deadline_reaches_the_driver_on_its_threads()
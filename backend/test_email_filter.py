@@ -0,0 +1,58 @@
+import asyncio
+
+from cache.bloom import BloomFilter
+from repositories.caching import BloomFilteredUserRepository
+from repositories.memory import InMemoryUserRepository
+
+class CountingUserRepository(InMemoryUserRepository):
+    def __init__(self):
+        super().__init__()
+        self.exists_calls = 0
+
+    async def exists(self, email: str) -> bool:
+        self.exists_calls += 1
+        return await super().exists(email)
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(expected_items=10000, false_positive_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"user{i}@example.com")
+
+    assert all(f"user{i}@example.com" in bloom for i in range(10000))
+    false_positives = sum(f"someone{i}@example.org" in bloom for i in range(10000))
+    assert false_positives < 200  # ~1% expected
+    assert abs(bloom.estimated_false_positive_rate() - 0.01) < 0.005
+    assert len(bloom.bits) < 12 * 1024
+
+def test_unregistered_emails_skip_the_database():
+    async def run():
+        inner = CountingUserRepository()
+        await inner.create({"email": "existing@example.com"})
+        users = BloomFilteredUserRepository(inner, false_positive_rate=0.01, expected_users=1000)
+        await users.rebuild()
+
+        for i in range(200):
+            assert await users.exists(f"new{i}@example.com") is False
+        assert inner.exists_calls == users.false_positives
+        assert await users.exists("existing@example.com") is True
+
+        # Signups through this worker and, via the bus, through other workers
+        await users.create({"email": "signup@example.com"})
+        assert await users.exists("signup@example.com") is True
+        await inner.create({"email": "elsewhere@example.com"})
+        await users.handle_change({
+            "operationType": "insert",
+            "ns": {"coll": "users"},
+            "fullDocument": {"email": "elsewhere@example.com"}
+        })
+        assert await users.exists("elsewhere@example.com") is True
+
+        stats = users.stats()
+        assert stats["definiteNegatives"] + stats["falsePositives"] == 200
+        assert stats["observedFalsePositiveRate"] < 0.05
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_bloom_filter_has_no_false_negatives_and_bounded_false_positives()
+    test_unregistered_emails_skip_the_database()
@@ -0,0 +1,39 @@
+import os
+import pytest
+
+from import_budget import parse_importtime, imported_by, measure, load_budget, check
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     passlib.utils
+import time:       200 |        300 |   passlib
+import time:       400 |        400 |   fastapi
+import time:        50 |        750 | main
+import time:        80 |         80 | unrelated
+"""
+
+def test_importtime_output_is_parsed_into_a_tree():
+    modules = parse_importtime(SAMPLE)
+    assert modules[0] == ("passlib.utils", 2, 100)
+    assert imported_by(modules, "main") == {"main": 750, "fastapi": 400, "passlib": 300, "passlib.utils": 100}
+
+    budget = {"lazy": ["passlib"], "modules": {"main": 0.5}}
+    problems = check({name: us / 1000 for name, us in imported_by(modules, "main").items()}, budget)
+    assert len(problems) == 2 and "main took" in problems[0] and "passlib should load lazily" in problems[1]
+
+def test_lazy_modules_are_not_imported_by_main():
+    # Which modules get imported does not depend on the machine, so this always runs
+    problems = check(measure(runs=1), {"lazy": load_budget()["lazy"], "modules": {}})
+    assert not problems, problems
+
+@pytest.mark.skipif(
+    os.getenv("IMPORT_BUDGET_CHECK", "false").lower() != "true",
+    reason="Import times depend on the machine; set IMPORT_BUDGET_CHECK=true to compare them with the budget"
+)
+def test_main_imports_within_budget():
+    problems = check(measure(runs=3), load_budget())
+    assert not problems, problems
+
+if __name__ == "__main__":
+    test_importtime_output_is_parsed_into_a_tree()
+    test_lazy_modules_are_not_imported_by_main()
+    test_main_imports_within_budget()
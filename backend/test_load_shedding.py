@@ -0,0 +1,101 @@
+import asyncio
+
+from middleware.load_shedding import (
+    AIMDLimiter,
+    LoadShedder,
+    LoadSheddingMiddleware,
+    latency_sampled,
+    request_priority,
+    HIGH, MEDIUM, LOW
+)
+
+def test_routes_map_to_priority_classes():
+    assert request_priority("POST", "/api/v1/training/session/abc/exercise") == HIGH
+    assert request_priority("GET", "/api/v1/progress/") == MEDIUM
+    assert request_priority("GET", "/api/v1/memory-notes/") == MEDIUM
+    assert request_priority("GET", "/api/v1/training/sessions") == LOW
+    assert request_priority("GET", "/healthz") is None
+
+def test_limit_backs_off_on_latency_and_recovers():
+    limiter = AIMDLimiter(initial_limit=100, min_limit=10, max_limit=200, target_latency=0.5,
+                          backoff=0.5, decrease_interval=1.0)
+    limiter.on_sample(2.0, inflight=100, now=0.0)
+    limiter.on_sample(2.0, inflight=100, now=0.5)  # same interval: no second cut
+    assert limiter.limit == 50
+    limiter.on_sample(2.0, inflight=100, now=1.0)
+    assert limiter.limit == 25
+
+    # Fast responses grow the limit, but only while it is being used
+    limiter.on_sample(0.01, inflight=1, now=2.0)
+    assert limiter.limit == 25
+    for _ in range(100):
+        limiter.on_sample(0.01, inflight=25, now=2.0)
+    assert 27 < limiter.limit < 29
+
+def test_low_priority_is_shed_before_training_writes():
+    shedder = LoadShedder(AIMDLimiter(initial_limit=10))
+    for _ in range(5):
+        assert shedder.try_acquire(LOW)
+    assert not shedder.try_acquire(LOW)
+    for _ in range(3):
+        assert shedder.try_acquire(MEDIUM)
+    assert not shedder.try_acquire(MEDIUM)
+    assert shedder.try_acquire(HIGH) and shedder.try_acquire(HIGH)
+    assert not shedder.try_acquire(HIGH)
+    assert shedder.stats()["admitted"] == {HIGH: 2, MEDIUM: 3, LOW: 5}
+    assert shedder.stats()["rejected"] == {HIGH: 1, MEDIUM: 1, LOW: 1}
+
+def test_slow_by_design_routes_do_not_cut_the_limit():
+    shedder = LoadShedder(AIMDLimiter(initial_limit=64, target_latency=0.5))
+    for _ in range(20):
+        assert shedder.try_acquire(MEDIUM)
+    for _ in range(20):
+        # Argon2 logins take longer than the target without the server being overloaded
+        shedder.release(1.2, sampled=latency_sampled("POST", "/api/v1/auth/login"))
+    assert shedder.limiter.limit == 64
+    assert shedder.inflight == 0
+
+    assert not latency_sampled("POST", "/api/v1/users/bulk")
+    assert latency_sampled("POST", "/api/v1/auth/refresh")
+    assert latency_sampled("GET", "/api/v1/progress/")
+
+def test_middleware_rejects_with_503_and_releases_slots():
+    async def run():
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        shedder = LoadShedder(AIMDLimiter(initial_limit=2))
+        middleware = LoadSheddingMiddleware(app, shedder)
+        responses = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                responses.append(message["status"])
+
+        def request(method, path):
+            return middleware({"type": "http", "method": method, "path": path}, None, send)
+
+        history = asyncio.create_task(request("GET", "/api/v1/training/sessions"))
+        await asyncio.sleep(0)
+        await request("GET", "/api/v1/training/sessions")  # low share of 2 is 1 slot
+        assert responses == [503]
+
+        save = asyncio.create_task(request("POST", "/api/v1/training/session/abc/exercise"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(history, save)
+        assert sorted(responses) == [200, 200, 503]
+        assert shedder.inflight == 0
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_routes_map_to_priority_classes()
+    test_limit_backs_off_on_latency_and_recovers()
+    test_low_priority_is_shed_before_training_writes()
+    test_slow_by_design_routes_do_not_cut_the_limit()
+    test_middleware_rejects_with_503_and_releases_slots()
@@ -0,0 +1,41 @@
+import time
+import asyncio
+
+from monitoring.loop_watchdog import LagHistogram, LoopWatchdog
+
+def hash_password_on_the_loop():
+    time.sleep(0.3)  # stands in for Argon2 or a CPU-bound loop inside an async handler
+
+def test_histogram_buckets_lag_samples():
+    histogram = LagHistogram(buckets=(1, 10, 100))
+    for lag_ms in (0.5, 3, 3, 40, 2000):
+        histogram.observe(lag_ms)
+    stats = histogram.stats()
+    assert stats["bucketsMs"] == {"1": 1, "10": 2, "100": 1, "+Inf": 1}
+    assert stats["maxMs"] == 2000 and stats["samples"] == 5
+
+def test_stall_is_recorded_with_the_blocking_stack():
+    async def run():
+        watchdog = LoopWatchdog(interval=0.01, threshold=0.1)
+        task = asyncio.create_task(watchdog.run())
+        await asyncio.sleep(0.05)
+        hash_password_on_the_loop()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return watchdog
+
+    watchdog = asyncio.run(run())
+    assert len(watchdog.stalls) == 1
+    stall = watchdog.stalls[0]
+    assert 250 <= stall["durationMs"] < 1000
+    assert any("hash_password_on_the_loop (test_loop_watchdog.py:" in frame for frame in stall["stack"])
+    stats = watchdog.stats()
+    assert "recentStalls" not in stats  # stacks stay out of the unauthenticated /healthz
+    assert watchdog.recent_stalls() == [stall]
+    assert stats["stalls"]["samples"] == 1
+    assert stats["lag"]["samples"] > stats["stalls"]["samples"]
+
+if __name__ == "__main__":
+    test_histogram_buckets_lag_samples()
+    test_stall_is_recorded_with_the_blocking_stack()
@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from datetime import datetime
 from bson import ObjectId
 from progress.logic import recalculate_user_progress
+from repositories.mongo import MongoRepositories
 
 # Load environment variables
 load_dotenv()
@@ -103,7 +104,7 @@ async def create_test_session_memory_attention_general():
         
         # Now test the progress calculation
         print('\n=== TESTING PROGRESS CALCULATION ===')
-        progress = await recalculate_user_progress(user_id, db)
+        progress = await recalculate_user_progress(user_id, MongoRepositories(db))
         
         print(f'Progress calculation results:')
         print(f'  Improvement Areas: {progress["improvement_areas"]}')
@@ -0,0 +1,91 @@
+import asyncio
+import tracemalloc
+from datetime import datetime, timedelta
+
+from progress.logic import get_progress_analytics
+from repositories.mongo import MongoRepositories
+
+class FakeCursor:
+    """Async cursor that generates session documents lazily, like a Motor cursor streaming batches"""
+
+    def __init__(self, count):
+        self.count = count
+        self.projection = None
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def __aiter__(self):
+        return self._generate()
+
+    async def _generate(self):
+        start = datetime.utcnow() - timedelta(days=self.count)
+        for i in range(self.count):
+            yield {
+                "_id": f"session-{i}",
+                "createdAt": start + timedelta(days=i),
+                "focusAreas": ["memory", "attention"],
+                "averageScore": 50 + (i % 50),
+                "isComplete": True,
+                "exerciseResults": [
+                    {"exerciseId": "memory_sequence", "score": 60 + (i % 40), "timeSpent": 120},
+                    {"exerciseId": "divided_attention", "score": 40 + (i % 60), "timeSpent": 90}
+                ]
+            }
+
+class FakeCollection:
+    def __init__(self, count=0):
+        self.count = count
+        self.last_filter = None
+        self.last_projection = None
+
+    def find(self, filter=None, projection=None, session=None):
+        self.last_filter = filter
+        self.last_projection = projection
+        return FakeCursor(self.count)
+
+    async def find_one(self, filter=None, projection=None, session=None):
+        return {"streak": 3}
+
+class FakeDatabase:
+    def __init__(self, session_count):
+        self.training_sessions = FakeCollection(session_count)
+        self.session_buckets = FakeCollection(0)
+        self.users = FakeCollection(0)
+        self.memory_notes = FakeCollection(0)
+        self.refresh_tokens = FakeCollection(0)
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+def _peak_memory_for(session_count):
+    db = FakeDatabase(session_count)
+    tracemalloc.start()
+    summary = asyncio.run(get_progress_analytics("user-1", MongoRepositories(db)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert summary.total_sessions == session_count
+    return peak, db
+
+def test_analytics_pushes_filter_and_projection():
+    """Analytics should ask Mongo for the predicate and only the fields it reads"""
+    _, db = _peak_memory_for(10)
+    session_filter = db.training_sessions.last_filter
+    projection = db.training_sessions.last_projection
+
+    assert session_filter["userId"] == "user-1"
+    assert {"isComplete": True} in session_filter["$or"]
+    assert "exercises" not in projection
+    assert projection["exerciseResults.score"] == 1
+
+def test_analytics_peak_memory_is_constant():
+    """Peak memory for 20x the history should stay close to the small-history peak"""
+    small_peak, _ = _peak_memory_for(500)
+    large_peak, _ = _peak_memory_for(10000)
+
+    print(f"Peak memory: 500 sessions = {small_peak / 1024:.1f} KiB, 10000 sessions = {large_peak / 1024:.1f} KiB")
+    assert large_peak < small_peak * 1.5 + 64 * 1024
+
+if __name__ == "__main__":
+    test_analytics_pushes_filter_and_projection()
+    test_analytics_peak_memory_is_constant()
@@ -0,0 +1,87 @@
+import time
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import middleware.rate_limit as rate_limit
+from middleware.rate_limit import TokenBucketLimiter, RateLimitMiddleware
+
+def test_bucket_refills_and_reports_retry_after():
+    limiter = TokenBucketLimiter(capacity=3, period=30)  # one token every 10 s
+    assert [limiter.acquire("1.2.3.4", now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("1.2.3.4", now=100.0) == 10.0
+    assert limiter.acquire("1.2.3.4", now=105.0) == 5.0
+    assert limiter.acquire("1.2.3.4", now=110.0) == 0.0
+    # Other clients have their own bucket
+    assert limiter.acquire("5.6.7.8", now=110.0) == 0.0
+
+def test_tracked_keys_are_bounded():
+    limiter = TokenBucketLimiter(capacity=1, period=60, max_keys=100)
+    for i in range(1000):
+        limiter.acquire(f"10.0.{i // 256}.{i % 256}", now=0.0)
+    assert limiter.stats()["keys"] == 100
+
+def test_limited_route_returns_429_with_retry_after():
+    app = FastAPI()
+
+    @app.get("/api/v1/check-user/{email}")
+    async def check(email: str):
+        return {"exists": False}
+
+    @app.get("/healthz")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(RateLimitMiddleware)
+    original = rate_limit.limiters
+    rate_limit.limiters = {"check_user": TokenBucketLimiter(capacity=2, period=60)}
+    try:
+        client = TestClient(app)
+        assert client.get("/api/v1/check-user/a@example.com").status_code == 200
+        assert client.get("/api/v1/check-user/b@example.com").status_code == 200
+        limited = client.get("/api/v1/check-user/c@example.com")
+        assert limited.status_code == 429
+        assert limited.headers["retry-after"] == "30"
+        # Unlimited routes are untouched
+        assert all(client.get("/healthz").status_code == 200 for _ in range(10))
+    finally:
+        rate_limit.limiters = original
+
+def test_allowed_request_overhead():
+    """Time spent in the middleware itself on an allowed, limited route"""
+    async def app(scope, receive, send):
+        pass
+
+    middleware = RateLimitMiddleware(app)
+    original = rate_limit.limiters
+    rate_limit.limiters = {"check_user": TokenBucketLimiter(capacity=1e12, period=1)}
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/v1/check-user/a@example.com",
+        "headers": [], "client": ("203.0.113.7", 50000)
+    }
+
+    async def timed(handler, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            await handler(scope, None, None)
+        return time.perf_counter() - started
+
+    async def run(count, repeats):
+        # Warm up caches and the limiter's bucket, then keep the least-disturbed run
+        await timed(middleware, count)
+        limited = min([await timed(middleware, count) for _ in range(repeats)])
+        bare = min([await timed(app, count) for _ in range(repeats)])
+        return (limited - bare) / count
+
+    try:
+        overhead = asyncio.run(run(20000, repeats=5))
+    finally:
+        rate_limit.limiters = original
+    print(f"Rate limiter overhead: {overhead * 1e6:.2f} µs per allowed request")
+    assert overhead < 5e-6
+
+if __name__ == "__main__":
+    test_bucket_refills_and_reports_retry_after()
+    test_tracked_keys_are_bounded()
+    test_limited_route_returns_429_with_retry_after()
+    test_allowed_request_overhead()
@@ -0,0 +1,130 @@
+import os
+import asyncio
+
+from bson import Timestamp
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from db.routing import (
+    ANALYTICS_READS,
+    PRIMARY_READS,
+    apply_read_token,
+    encode_read_token,
+    read_scope,
+    request_read_policy
+)
+from db.settings import DatabaseSettings
+from middleware.read_routing import ReadRoutingMiddleware
+from repositories.mongo import MongoSessionRepository
+
+class FakeSession:
+    def __init__(self):
+        self.operation_time = None
+        self.cluster_time = None
+
+    def advance_cluster_time(self, cluster_time):
+        self.cluster_time = cluster_time
+
+    def advance_operation_time(self, operation_time):
+        self.operation_time = operation_time
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeClient:
+    def __init__(self):
+        self.sessions = []
+
+    async def start_session(self, causal_consistency=False):
+        assert causal_consistency
+        self.sessions.append(FakeSession())
+        return self.sessions[-1]
+
+def test_routes_map_to_read_policies():
+    assert request_read_policy("GET", "/api/v1/progress/") == ANALYTICS_READS
+    assert request_read_policy("GET", "/api/v1/training/sessions") == ANALYTICS_READS
+    assert request_read_policy("POST", "/api/v1/training/session/abc/exercise") == PRIMARY_READS
+    assert request_read_policy("GET", "/healthz") is None
+
+def test_analytics_read_preference_from_settings():
+    preference = DatabaseSettings().analytics_read_preference()
+    assert preference.mongos_mode == "secondaryPreferred" and preference.max_staleness == 90
+    assert DatabaseSettings(analytics_read_mode="primary").analytics_read_preference().mongos_mode == "primary"
+
+    os.environ["MONGODB_ANALYTICS_MAX_STALENESS_SECONDS"] = "30"
+    try:
+        DatabaseSettings.from_env()
+        assert False, "the driver rejects bounds under 90 seconds"
+    except ValueError:
+        pass
+    finally:
+        del os.environ["MONGODB_ANALYTICS_MAX_STALENESS_SECONDS"]
+
+def test_only_analytics_requests_read_from_secondaries():
+    client = AsyncIOMotorClient("mongodb://localhost:1", connect=False)
+    repository = MongoSessionRepository(client.mindbloom, DatabaseSettings().analytics_read_preference())
+    assert repository._reads().read_preference.mongos_mode == "primary"
+    with read_scope(ANALYTICS_READS):
+        assert repository._reads().read_preference.mongos_mode == "secondaryPreferred"
+    assert repository._reads() is repository.collection
+
+def test_read_tokens_round_trip_and_reject_garbage():
+    writer = FakeSession()
+    assert encode_read_token(writer) is None
+    writer.operation_time = Timestamp(1700000000, 3)
+    writer.cluster_time = {"clusterTime": Timestamp(1700000000, 4)}
+
+    reader = FakeSession()
+    assert apply_read_token(reader, encode_read_token(writer))
+    assert reader.operation_time == writer.operation_time
+    assert reader.cluster_time == writer.cluster_time
+    assert not apply_read_token(FakeSession(), "not-a-token")
+
+def test_middleware_hands_out_and_honours_read_tokens():
+    async def run():
+        client = FakeClient()
+        seen = []
+
+        async def app(scope, receive, send):
+            from db.routing import analytics_reads, current_session
+            session = current_session()
+            seen.append((analytics_reads(), session))
+            if session is not None and scope["method"] == "POST":
+                session.operation_time = Timestamp(1700000000, 1)
+                session.cluster_time = {"clusterTime": Timestamp(1700000000, 1)}
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = ReadRoutingMiddleware(app, lambda: client)
+        headers = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                headers.append(dict(message["headers"]))
+
+        def request(method, path, request_headers=()):
+            scope = {"type": "http", "method": method, "path": path, "headers": list(request_headers)}
+            return middleware(scope, None, send)
+
+        await request("POST", "/api/v1/training/session/abc/complete")
+        token = headers[0][b"x-read-after"]
+
+        # Without a token analytics reads need no explicit session
+        await request("GET", "/api/v1/progress/")
+        assert seen[1] == (True, None)
+
+        await request("GET", "/api/v1/progress/", [(b"x-read-after", token)])
+        assert seen[2][0] and seen[2][1].operation_time == Timestamp(1700000000, 1)
+        assert b"x-read-after" not in headers[2]
+        assert len(client.sessions) == 2
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_routes_map_to_read_policies()
+    test_analytics_read_preference_from_settings()
+    test_only_analytics_requests_read_from_secondaries()
+    test_read_tokens_round_trip_and_reject_garbage()
+    test_middleware_hands_out_and_honours_read_tokens()
@@ -0,0 +1,43 @@
+import asyncio
+from datetime import timedelta
+
+from motor.frameworks.asyncio import run_on_executor
+from pymongo import monitoring
+
+from monitoring.request_profile import RequestCommandListener, command_summary, recording_commands
+
+ADDRESS = ("localhost", 27017)
+
+def run_command(listener, name, collection, request_id, ms, ok=True):
+    command = {name: collection}
+    listener.started(monitoring.CommandStartedEvent(command, "mindbloom", request_id, ADDRESS, request_id))
+    duration = timedelta(milliseconds=ms)
+    if ok:
+        listener.succeeded(monitoring.CommandSucceededEvent(duration, {"ok": 1}, name, request_id, ADDRESS, request_id))
+    else:
+        listener.failed(monitoring.CommandFailedEvent(duration, {"code": 50}, name, request_id, ADDRESS, request_id))
+
+def test_only_the_profiled_requests_commands_are_recorded():
+    listener = RequestCommandListener()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        run_command(listener, "find", "users", 1, 1.0)  # another request's command
+        with recording_commands() as commands:
+            # Issued from the driver's threads, as Motor does
+            await run_on_executor(loop, run_command, listener, "find", "training_sessions", 2, 12.5)
+            await run_on_executor(loop, run_command, listener, "getMore", 123, 3, 4.0)
+            await run_on_executor(loop, run_command, listener, "update", "users", 4, 2.0, False)
+        run_command(listener, "insert", "users", 5, 1.0)
+        return commands
+
+    commands = asyncio.run(run())
+    assert [(c["command"], c["durationMs"], c["ok"]) for c in commands] == [
+        ("find", 12.5, True), ("getMore", 4.0, True), ("update", 2.0, False)
+    ]
+    summary = command_summary(commands)
+    assert summary["count"] == 3 and summary["totalMs"] == 18.5
+    assert summary["byCommand"]["find training_sessions"] == {"count": 1, "totalMs": 12.5}
+
+if __name__ == "__main__":
+    test_only_the_profiled_requests_commands_are_recorded()
@@ -0,0 +1,57 @@
+import time
+import threading
+
+from types import SimpleNamespace
+
+from monitoring.sampler import StackSampler, _frame_name
+
+def busy_analytics_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+def test_sampler_collapses_busy_stacks_within_overhead_budget():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_analytics_loop, args=(stop,), name="worker")
+    worker.start()
+    sampler = StackSampler(interval=0.005, max_overhead=0.02)
+    sampler.start()
+    time.sleep(0.5)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    lines = sampler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("worker;") and "busy_analytics_loop (test_sampler.py)" in line]
+    assert busy, lines[:5]
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+    # Idle threads (this one, sleeping) are left out unless asked for
+    assert not any(line.startswith("MainThread;") and "sleep" in line for line in lines)
+
+    stats = sampler.stats()
+    assert stats["samples"] > 10
+    assert stats["overheadPercent"] <= 2.5  # the budget, plus timer slack
+
+def test_expensive_samples_stretch_the_interval():
+    sampler = StackSampler(interval=0.001, max_overhead=0.02)
+    original = sampler._sample
+
+    def slow_sample(own_id):
+        time.sleep(0.004)
+        original(own_id)
+
+    sampler._sample = slow_sample
+    sampler.start()
+    time.sleep(0.6)
+    sampler.stop()
+    # 4 ms per sample at 2% leaves room for about 3 samples in 0.6 s, not 600
+    assert sampler.stats()["samples"] <= 5
+
+def test_frame_names_fall_back_to_co_name_before_python_3_11():
+    code = SimpleNamespace(co_name="get_progress", co_filename="/elsewhere/progress/router.py")
+    assert _frame_name(code) == "get_progress (/elsewhere/progress/router.py)"
+
+if __name__ == "__main__":
+    test_sampler_collapses_busy_stacks_within_overhead_budget()
+    test_expensive_samples_stretch_the_interval()
+    test_frame_names_fall_back_to_co_name_before_python_3_11()
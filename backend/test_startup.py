@@ -0,0 +1,90 @@
+import os
+import asyncio
+from types import SimpleNamespace
+
+# Run the whole API against the in-memory repositories; no MongoDB needed
+os.environ["REPOSITORY_BACKEND"] = "memory"
+
+from fastapi.testclient import TestClient
+
+from main import app
+from db.pool import PoolMonitor, warm_connection_pool
+from db.settings import DatabaseSettings
+
+class FakeClient:
+    """Opens one pooled connection per tick after the first ping, like the driver's pool maintenance"""
+
+    def __init__(self, monitor, min_pool_size):
+        self.monitor = monitor
+        self.min_pool_size = min_pool_size
+        self.admin = SimpleNamespace(command=self.command)
+
+    async def command(self, name):
+        asyncio.get_running_loop().create_task(self.maintain_pool())
+
+    async def maintain_pool(self):
+        for _ in range(self.min_pool_size):
+            await asyncio.sleep(0.01)
+            self.monitor.connection_created(SimpleNamespace(address=("db", 27017)))
+            self.monitor.connection_ready(SimpleNamespace(address=("db", 27017)))
+
+def test_lifespan_reports_startup_phases():
+    with TestClient(app) as client:
+        startup = client.get("/healthz").json()["startup"]
+    assert {"imports", "preload", "email_filter", "total"} <= set(startup)
+    assert all(ms >= 0 for ms in startup.values())
+
+def test_pool_is_warmed_before_serving():
+    async def run():
+        monitor = PoolMonitor()
+        opened = await warm_connection_pool(FakeClient(monitor, 5), monitor, 5, timeout=5)
+        assert opened == 5 and monitor.stats()["open"] == {"db:27017": 5}
+
+        # A deployment that can't supply the connections doesn't block startup forever
+        monitor = PoolMonitor()
+        assert await warm_connection_pool(FakeClient(monitor, 2), monitor, 5, timeout=0.2) == 2
+
+    asyncio.run(run())
+
+def test_database_settings_from_environment():
+    overrides = {
+        "MONGODB_MAX_POOL_SIZE": "40",
+        "MONGODB_WAIT_QUEUE_TIMEOUT_MS": "off",
+        "MONGODB_COMPRESSORS": "zstd, zlib",
+        "MONGODB_ZLIB_COMPRESSION_LEVEL": "3",
+    }
+    previous = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        kwargs = DatabaseSettings.from_env().client_kwargs()
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name)
+            else:
+                os.environ[name] = value
+
+    assert kwargs["maxPoolSize"] == 40 and kwargs["minPoolSize"] == 10
+    assert "waitQueueTimeoutMS" not in kwargs
+    assert kwargs["compressors"] == "zstd,zlib" and kwargs["zlibCompressionLevel"] == 3
+    assert "compressors" not in DatabaseSettings(compressors=()).client_kwargs()
+
+def test_pool_monitor_reports_utilization_and_waits():
+    monitor = PoolMonitor(max_pool_size=4)
+    address = ("db", 27017)
+    for duration in (0.001, 0.003):
+        monitor.connection_checked_out(SimpleNamespace(address=address, duration=duration))
+    monitor.connection_checked_in(SimpleNamespace(address=address))
+    monitor.connection_check_out_failed(SimpleNamespace(address=address, reason="timeout", duration=2.0))
+
+    stats = monitor.stats()
+    assert stats["checkedOut"] == {"db:27017": 1} and stats["peakCheckedOut"] == 2
+    assert stats["utilization"] == 0.25
+    assert stats["checkoutFailures"] == {"timeout": 1}
+    assert stats["checkoutWaitMs"]["max"] == 2000.0
+
+if __name__ == "__main__":
+    test_lifespan_reports_startup_phases()
+    test_pool_is_warmed_before_serving()
+    test_database_settings_from_environment()
+    test_pool_monitor_reports_utilization_and_waits()
@@ -0,0 +1,152 @@
+import asyncio
+import shutil
+import tempfile
+from datetime import datetime
+from bson import ObjectId
+
+from repositories.base import UnavailableError
+from repositories.write_behind import WriteBehindResultRepository
+
+class FakeSessionCollection:
+    """Applies the write-behind bulk updates to in-memory session documents"""
+
+    def __init__(self):
+        self.sessions = {}
+        self.bulk_writes = 0
+
+    async def find_one(self, query, projection=None):
+        return self.sessions.get(query["_id"])
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_writes += 1
+        for operation in operations:
+            session = self.sessions.get(operation._filter["_id"])
+            if session is None:
+                continue
+            concat = operation._doc[0]["$set"]["exerciseResults"]["$concatArrays"]
+            incoming = concat[1]["$filter"]["input"]["$literal"]
+            existing = session.setdefault("exerciseResults", [])
+            known_ids = {result.get("resultId") for result in existing}
+            known_exercises = {result.get("exerciseId") for result in existing}
+            existing.extend(
+                result for result in incoming
+                if result["resultId"] not in known_ids
+                and not (session.get("isComplete") and result["exerciseId"] in known_exercises)
+            )
+            if session.get("isComplete"):
+                session["averageScore"] = sum(result["score"] for result in existing) / len(existing)
+
+def make_result(exercise_id, score):
+    return {"exerciseId": exercise_id, "score": score, "timeSpent": 60, "completedAt": datetime.utcnow()}
+
+def test_saves_are_acknowledged_then_group_committed():
+    async def run():
+        journal_dir = tempfile.mkdtemp()
+        try:
+            collection = FakeSessionCollection()
+            session_ids = [ObjectId() for _ in range(3)]
+            for session_id in session_ids:
+                collection.sessions[session_id] = {"_id": session_id, "exerciseResults": []}
+
+            results = WriteBehindResultRepository(collection, "fsync", journal_dir, flush_interval_ms=60000)
+            await results.start()
+
+            # Acknowledged with the full list, though nothing has reached the database yet
+            first = await results.append(str(session_ids[0]), make_result("memory_sequence", 80), persisted=[])
+            second = await results.append(str(session_ids[0]), make_result("word_pairs", 70), persisted=[])
+            assert [r["exerciseId"] for r in second] == ["memory_sequence", "word_pairs"]
+            assert len(first) == 1
+            await asyncio.gather(*[
+                results.append(str(session_id), make_result("focused_attention", 60), persisted=[])
+                for session_id in session_ids
+            ])
+            assert collection.sessions[session_ids[0]]["exerciseResults"] == []
+
+            await results.flush()
+            assert collection.bulk_writes == 1
+            assert len(collection.sessions[session_ids[0]]["exerciseResults"]) == 3
+            assert len(collection.sessions[session_ids[2]]["exerciseResults"]) == 1
+            assert results.stats()["pending"] == 0
+            await results.stop()
+        finally:
+            shutil.rmtree(journal_dir)
+
+    asyncio.run(run())
+
+def test_journal_is_replayed_after_a_crash():
+    async def run():
+        journal_dir = tempfile.mkdtemp()
+        try:
+            collection = FakeSessionCollection()
+            session_id = ObjectId()
+            collection.sessions[session_id] = {"_id": session_id, "exerciseResults": []}
+
+            crashed = WriteBehindResultRepository(collection, "fsync", journal_dir, flush_interval_ms=60000)
+            await crashed.start()
+            await crashed.append(str(session_id), make_result("memory_sequence", 80), persisted=[])
+            await crashed.append(str(session_id), make_result("word_pairs", 70), persisted=[])
+            with open(crashed.journal.path, "rb") as journal_file:
+                unflushed_journal = journal_file.read()
+
+            # The flush reaches the database but the process dies before the journal is truncated
+            await crashed.flush()
+            with open(crashed.journal.path, "wb") as journal_file:
+                journal_file.write(unflushed_journal + b'{"sessionId": "torn')
+            crashed._task.cancel()
+            crashed.journal.close()
+
+            restarted = WriteBehindResultRepository(collection, "fsync", journal_dir, flush_interval_ms=60000)
+            await restarted.start()
+            exercise_ids = [r["exerciseId"] for r in collection.sessions[session_id]["exerciseResults"]]
+            assert exercise_ids == ["memory_sequence", "word_pairs"]
+            assert restarted.stats()["pending"] == 0
+            await restarted.stop()
+        finally:
+            shutil.rmtree(journal_dir)
+
+    asyncio.run(run())
+
+def test_late_results_reach_sessions_completed_by_another_worker():
+    async def run():
+        collection = FakeSessionCollection()
+        session_id = ObjectId()
+        collection.sessions[session_id] = {"_id": session_id, "exerciseResults": []}
+
+        results = WriteBehindResultRepository(collection, "memory", flush_interval_ms=60000)
+        await results.start()
+        await results.append(str(session_id), make_result("memory_sequence", 80), persisted=[])
+        await results.append(str(session_id), make_result("word_pairs", 40), persisted=[])
+        # Another worker completes the session; its payload only carried memory_sequence
+        collection.sessions[session_id].update({
+            "isComplete": True, "averageScore": 90.0,
+            "exerciseResults": [dict(make_result("memory_sequence", 90), resultId="completion")]
+        })
+        await results.flush()
+        session = collection.sessions[session_id]
+        assert [(r["exerciseId"], r["score"]) for r in session["exerciseResults"]] == [("memory_sequence", 90), ("word_pairs", 40)]
+        assert session["averageScore"] == 65.0
+        await results.stop()
+
+    asyncio.run(run())
+
+def test_saves_are_refused_once_the_buffer_is_full():
+    async def run():
+        collection = FakeSessionCollection()
+        session_id = str(ObjectId())
+        results = WriteBehindResultRepository(collection, "memory", flush_interval_ms=60000, max_pending=2)
+        for exercise_id in ("memory_sequence", "word_pairs"):
+            await results.append(session_id, make_result(exercise_id, 80), persisted=[])
+        try:
+            await results.append(session_id, make_result("visual_recall", 80), persisted=[])
+            raise AssertionError("the third save should be refused")
+        except UnavailableError:
+            pass
+        assert results.stats()["pending"] == 2 and results.stats()["refused"] == 1
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_saves_are_acknowledged_then_group_committed()
+    test_journal_is_replayed_after_a_crash()
+    test_late_results_reach_sessions_completed_by_another_worker()
+    test_saves_are_refused_once_the_buffer_is_full()
@@ -0,0 +1,122 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Any
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+
+# Incomplete sessions with no exercise results older than this are considered abandoned
+ABANDONED_SESSION_AGE_HOURS = int(os.getenv("ABANDONED_SESSION_AGE_HOURS", 48))
+# "archive" moves abandoned sessions to the cold collection, "expire" deletes them outright
+ABANDONED_SESSION_POLICY = os.getenv("ABANDONED_SESSION_POLICY", "archive").lower()
+# How long archived sessions are kept before the TTL index removes them (days)
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", 180))
+# How often the sweeper wakes up (seconds)
+ARCHIVAL_INTERVAL_SECONDS = int(os.getenv("ARCHIVAL_INTERVAL_SECONDS", 3600))
+# Upper bound on sessions moved per batch
+ARCHIVAL_BATCH_SIZE = int(os.getenv("ARCHIVAL_BATCH_SIZE", 1000))
+
+ARCHIVE_COLLECTION = "training_sessions_archive"
+
+def abandoned_session_filter(cutoff: datetime) -> Dict[str, Any]:
+    """Query matching incomplete sessions started before `cutoff` that never recorded a result"""
+    return {
+        # isComplete must stay in the filter so the partial index is eligible
+        "isComplete": False,
+        "createdAt": {"$lt": cutoff},
+        "$or": [
+            {"exerciseResults": {"$size": 0}},
+            {"exerciseResults": None}
+        ]
+    }
+
+async def ensure_archival_indexes(db: AsyncIOMotorDatabase):
+    """Create the partial index on open sessions and the TTL index on the archive"""
+    await db.training_sessions.create_index(
+        [("createdAt", 1)],
+        name="open_sessions_by_created",
+        partialFilterExpression={"isComplete": False}
+    )
+    await db[ARCHIVE_COLLECTION].create_index(
+        "archivedAt",
+        expireAfterSeconds=ARCHIVE_RETENTION_DAYS * 24 * 3600
+    )
+    await db[ARCHIVE_COLLECTION].create_index([("userId", 1), ("createdAt", -1)])
+
+async def sweep_abandoned_sessions(
+    db: AsyncIOMotorDatabase,
+    older_than_hours: int = ABANDONED_SESSION_AGE_HOURS,
+    policy: str = ABANDONED_SESSION_POLICY,
+    batch_size: int = ARCHIVAL_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    Move (or delete) abandoned empty sessions out of the hot training_sessions collection.
+
+    Args:
+        db: MongoDB database connection
+        older_than_hours: Minimum age of an incomplete, empty session before it is swept
+        policy: "archive" to copy into the cold collection first, "expire" to delete only
+        batch_size: Maximum number of sessions handled per batch
+
+    Returns:
+        Dict with the number of sessions archived and removed
+    """
+    if policy not in ("archive", "expire"):
+        raise ValueError(f"Unknown abandoned session policy: {policy}")
+
+    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    query = abandoned_session_filter(cutoff)
+    archived = 0
+    removed = 0
+
+    while True:
+        batch = await db.training_sessions.find(query).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        session_ids = [session["_id"] for session in batch]
+
+        if policy == "archive":
+            archived_at = datetime.utcnow()
+            for session in batch:
+                session["archivedAt"] = archived_at
+                session["archiveReason"] = "abandoned"
+            try:
+                result = await db[ARCHIVE_COLLECTION].insert_many(batch, ordered=False)
+                archived += len(result.inserted_ids)
+            except BulkWriteError as e:
+                # Duplicates mean an earlier, interrupted sweep already copied these sessions;
+                # any other error leaves sessions uncopied, so none of the batch may be deleted
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+                archived += e.details.get("nInserted", 0)
+
+        # Re-check the predicate on delete so a session that received a result
+        # in the meantime stays in the hot collection
+        delete_result = await db.training_sessions.delete_many({"_id": {"$in": session_ids}, **query})
+        removed += delete_result.deleted_count
+
+        if policy == "archive" and delete_result.deleted_count < len(session_ids):
+            still_live = await db.training_sessions.distinct("_id", {"_id": {"$in": session_ids}})
+            if still_live:
+                await db[ARCHIVE_COLLECTION].delete_many({"_id": {"$in": still_live}})
+                archived -= len(still_live)
+
+        if len(batch) < batch_size:
+            break
+
+    return {"sessions_archived": archived, "sessions_removed": removed}
+
+async def run_archival_loop(db: AsyncIOMotorDatabase, interval_seconds: int = ARCHIVAL_INTERVAL_SECONDS):
+    """Background task: periodically sweep abandoned sessions until cancelled"""
+    await ensure_archival_indexes(db)
+    while True:
+        try:
+            stats = await sweep_abandoned_sessions(db)
+            if stats["sessions_removed"]:
+                print(f"Abandoned session sweep: {stats}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warning: Abandoned session sweep failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
@@ -1,22 +1,26 @@
 import random
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
 
-def select_exercises(focus_areas: List[str], mood: str, priority_areas: Optional[List[str]] = None, session_duration_minutes: float = 0.0) -> List[dict]:
+# Mood-based difficulty adjustments
+MOOD_ADJUSTMENTS = {
+    "energetic": {"prefer_difficulty": ["medium", "hard"], "max_exercises": 5},
+    "calm": {"prefer_difficulty": ["easy", "medium"], "max_exercises": 4},
+    "focused": {"prefer_difficulty": ["medium", "hard"], "max_exercises": 4},
+    "tired": {"prefer_difficulty": ["easy"], "max_exercises": 3},
+    "stressed": {"prefer_difficulty": ["easy", "medium"], "max_exercises": 3},
+    "motivated": {"prefer_difficulty": ["medium", "hard"], "max_exercises": 5}
+}
+
+@lru_cache(maxsize=None)
+def get_exercise_catalog() -> Dict[str, List[dict]]:
     """
-    Select 3-5 exercises based on user's focus areas and mood.
-    
-    Args:
-        focus_areas: List of cognitive areas the user wants to focus on
-        mood: User's current mood state
-        priority_areas: Optional list of areas that should be prioritized (areas yet to practice)
-        session_duration_minutes: Current session duration in minutes (for 10-minute limit logic)
-        
-    Returns:
-        List of exercise objects to be performed in the session
+    Predefined exercise map with focus areas and mood considerations.
+
+    Built once per process (and preloaded at startup); callers get copies of
+    the exercises they select, so the shared entries are never mutated.
     """
-    
-    # Predefined exercise map with focus areas and mood considerations
-    exercise_pool = {
+    return {
         "memory": [
             {
                 "id": "memory_sequence",
@@ -315,19 +319,25 @@ def select_exercises(focus_areas: List[str], mood: str, priority_areas: Optional
             }
         ]
     }
+
+def select_exercises(focus_areas: List[str], mood: str, priority_areas: Optional[List[str]] = None, session_duration_minutes: float = 0.0) -> List[dict]:
+    """
+    Select 3-5 exercises based on user's focus areas and mood.
     
-    # Mood-based difficulty adjustments
-    mood_adjustments = {
-        "energetic": {"prefer_difficulty": ["medium", "hard"], "max_exercises": 5},
-        "calm": {"prefer_difficulty": ["easy", "medium"], "max_exercises": 4},
-        "focused": {"prefer_difficulty": ["medium", "hard"], "max_exercises": 4},
-        "tired": {"prefer_difficulty": ["easy"], "max_exercises": 3},
-        "stressed": {"prefer_difficulty": ["easy", "medium"], "max_exercises": 3},
-        "motivated": {"prefer_difficulty": ["medium", "hard"], "max_exercises": 5}
-    }
+    Args:
+        focus_areas: List of cognitive areas the user wants to focus on
+        mood: User's current mood state
+        priority_areas: Optional list of areas that should be prioritized (areas yet to practice)
+        session_duration_minutes: Current session duration in minutes (for 10-minute limit logic)
+        
+    Returns:
+        List of exercise objects to be performed in the session
+    """
+    
+    exercise_pool = get_exercise_catalog()
     
     # Get mood preferences or use defaults
-    mood_prefs = mood_adjustments.get(mood.lower(), {
+    mood_prefs = MOOD_ADJUSTMENTS.get(mood.lower(), {
         "prefer_difficulty": ["easy", "medium"], 
         "max_exercises": 4
     })
@@ -417,4 +427,4 @@ def select_exercises(focus_areas: List[str], mood: str, priority_areas: Optional
             additional = random.sample(remaining, min(additional_needed, len(remaining)))
             selected_exercises.extend(additional)
     
-    return selected_exercises
\ No newline at end of file
+    return [dict(exercise) for exercise in selected_exercises]
\ No newline at end of file
@@ -1,6 +1,5 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List
 from bson import ObjectId
 
@@ -11,9 +10,15 @@ from models.training import (
     ExerciseResult
 )
 from models.user import User
-from auth.router import get_current_user, get_database
+from auth.router import get_current_user
 from training.logic import select_exercises
-from progress.logic import recalculate_user_progress
+from progress.logic import recalculate_user_progress, merge_sessions_by_created_at
+from responses import TrustedJSONResponse, TrustedModelShape
+from repositories.base import Repositories, UnavailableError
+from repositories.dependencies import get_repositories
+from cache.backends import CacheBackend
+from cache.dependencies import get_cache
+from db.resilience import retry_idempotent_read
 
 router = APIRouter()
 
@@ -21,7 +26,7 @@ router = APIRouter()
 async def start_training_session(
     session_data: TrainingSessionCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repos: Repositories = Depends(get_repositories)
 ):
     """
     Start a new training session for the authenticated user.
@@ -62,8 +67,7 @@ async def start_training_session(
         print("Session Doc: ", session_doc)
         
         # Insert session into database
-        result = await db.training_sessions.insert_one(session_doc)
-        session_id = str(result.inserted_id)
+        session_id = await repos.sessions.create(session_doc)
         
         return {
             "sessionId": session_id,
@@ -82,7 +86,8 @@ async def save_exercise_result(
     session_id: str,
     exercise_result: ExerciseResult,
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repos: Repositories = Depends(get_repositories),
+    cache: CacheBackend = Depends(get_cache)
 ):
     """
     Save individual exercise result to the training session.
@@ -97,10 +102,7 @@ async def save_exercise_result(
             )
         
         # Find the training session
-        session_doc = await db.training_sessions.find_one({
-            "_id": ObjectId(session_id),
-            "userId": current_user.id
-        })
+        session_doc = await repos.sessions.get_for_user(session_id, current_user.id)
         
         if not session_doc:
             raise HTTPException(
@@ -122,18 +124,13 @@ async def save_exercise_result(
             "completedAt": datetime.utcnow()
         }
         
-        # Add the exercise result to the session
-        await db.training_sessions.update_one(
-            {"_id": ObjectId(session_id)},
-            {
-                "$push": {"exerciseResults": exercise_result_dict}
-            }
+        # Add the exercise result to the session and get the updated results to calculate current progress
+        exercise_results = await repos.results.append(
+            session_id,
+            exercise_result_dict,
+            persisted=session_doc.get("exerciseResults", [])
         )
         
-        # Get updated session to calculate current progress
-        updated_session = await db.training_sessions.find_one({"_id": ObjectId(session_id)})
-        exercise_results = updated_session.get("exerciseResults", [])
-        
         # Calculate completed areas based on exercise results
         completed_areas = []
         remaining_areas = list(session_doc.get("focusAreas", []))
@@ -194,7 +191,14 @@ async def save_exercise_result(
         
         # Recalculate user progress immediately after each exercise
         try:
-            updated_progress = await recalculate_user_progress(current_user.id, db)
+            # With write-behind the new result may still be buffered, so progress is computed
+            # from the result list append() returned rather than the stored session
+            updated_progress = await recalculate_user_progress(
+                current_user.id,
+                repos,
+                cache,
+                pending_session={**session_doc, "exerciseResults": exercise_results}
+            )
             print(f"Progress recalculated for user {current_user.id} after exercise completion")
         except Exception as progress_error:
             print(f"Warning: Failed to recalculate progress for user {current_user.id}: {str(progress_error)}")
@@ -209,6 +213,13 @@ async def save_exercise_result(
         
     except HTTPException:
         raise
+    except UnavailableError as e:
+        print(f"Warning: Refused exercise result: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Temporarily unavailable, please retry",
+            headers={"Retry-After": "5"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -220,7 +231,8 @@ async def complete_training_session(
     session_id: str,
     completion_data: TrainingSessionComplete,
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repos: Repositories = Depends(get_repositories),
+    cache: CacheBackend = Depends(get_cache)
 ):
     """
     Complete a training session by submitting exercise results.
@@ -234,88 +246,50 @@ async def complete_training_session(
                 detail="Invalid session ID format"
             )
         
-        # Find the training session
-        session_doc = await db.training_sessions.find_one({
-            "_id": ObjectId(session_id),
-            "userId": current_user.id
-        })
-        
-        if not session_doc:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Training session not found"
-            )
+        # Write out any buffered exercise results so they are part of the session
+        await repos.results.flush(session_id)
         
-        if session_doc.get("isComplete", False):
+        submitted_results = [
+            {
+                "exerciseId": result.exerciseId,
+                "score": result.score,
+                "timeSpent": result.timeSpent,
+                "completedAt": datetime.utcnow()
+            }
+            for result in completion_data.exerciseResults
+        ]
+        
+        # Merge results not already saved, compute the average and flag the session complete atomically
+        summary = await repos.sessions.complete(session_id, current_user.id, submitted_results, datetime.utcnow())
+        
+        if summary is None:
+            # Only the failure path pays for a read, to report why
+            session_doc = await repos.sessions.get_for_user(session_id, current_user.id)
+            if not session_doc:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Training session not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Training session already completed"
             )
         
-        # Get existing exercise results from the session
-        existing_results = session_doc.get("exerciseResults", [])
-        
-        # Add any new exercise results from completion_data that aren't already saved
-        existing_exercise_ids = {result.get("exerciseId") for result in existing_results}
-        
-        for result in completion_data.exerciseResults:
-            if result.exerciseId not in existing_exercise_ids:
-                exercise_result_dict = {
-                    "exerciseId": result.exerciseId,
-                    "score": result.score,
-                    "timeSpent": result.timeSpent,
-                    "completedAt": datetime.utcnow()
-                }
-                existing_results.append(exercise_result_dict)
+        average_score = summary["averageScore"]
         
-        # Calculate average score from all results
-        scores = [result.get("score", 0) for result in existing_results if result.get("score") is not None]
-        average_score = sum(scores) / len(scores) if scores else 0.0
-        
-        # Update training session as complete
-        await db.training_sessions.update_one(
-            {"_id": ObjectId(session_id)},
-            {
-                "$set": {
-                    "exerciseResults": existing_results,
-                    "averageScore": average_score,
-                    "isComplete": True,
-                    "completedAt": datetime.utcnow()
-                }
-            }
-        )
-        
-        # Update user statistics
-        # Get current user data
-        user_doc = await db.users.find_one({"_id": ObjectId(current_user.id)})
-        if not user_doc:
+        # Count the session and advance the daily streak in a single atomic update
+        user_stats = await repos.users.record_session_completion(current_user.id, datetime.utcnow())
+        if not user_stats:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        
-        # Calculate new streak and total sessions
-        current_streak = user_doc.get("streak", 0)
-        total_sessions = user_doc.get("totalSessions", 0)
-        
-        # For simplicity, increment streak by 1 (in a real app, you'd check if it's consecutive days)
-        new_streak = current_streak + 1
-        new_total_sessions = total_sessions + 1
-        
-        # Update user document
-        await db.users.update_one(
-            {"_id": ObjectId(current_user.id)},
-            {
-                "$set": {
-                    "streak": new_streak,
-                    "totalSessions": new_total_sessions
-                }
-            }
-        )
+        new_streak = user_stats["streak"]
+        new_total_sessions = user_stats["totalSessions"]
         
         # Recalculate user progress immediately after session completion
         try:
-            updated_progress = await recalculate_user_progress(current_user.id, db)
+            updated_progress = await recalculate_user_progress(current_user.id, repos, cache)
             print(f"Progress recalculated for user {current_user.id}: {updated_progress}")
         except Exception as progress_error:
             # Don't fail the session completion if progress calculation fails
@@ -339,7 +313,7 @@ async def complete_training_session(
 @router.get("/sessions", response_model=List[TrainingSession])
 async def get_user_training_sessions(
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    repos: Repositories = Depends(get_repositories),
     limit: int = 10,
     skip: int = 0
 ):
@@ -347,29 +321,52 @@ async def get_user_training_sessions(
     Get training sessions for the authenticated user.
     """
     try:
-        # Find user's training sessions
-        cursor = db.training_sessions.find(
-            {"userId": current_user.id}
-        ).sort("createdAt", -1).skip(skip).limit(limit)
+        # Older completed sessions have been compacted into monthly buckets. Both streams
+        # are merged newest first, so pages stay in createdAt order across the boundary;
+        # no page can need more than skip + limit raw sessions
+        raw_docs = await retry_idempotent_read(
+            lambda: repos.sessions.list_for_user(current_user.id, skip=0, limit=skip + limit)
+        )
+        merged = merge_sessions_by_created_at(
+            repos.sessions.iter_compacted(current_user.id, newest_first=True),
+            _iterate(raw_docs),
+            newest_first=True
+        )
         
         sessions = []
-        async for session_doc in cursor:
-            # Convert MongoDB document to TrainingSession model
-            session_doc["id"] = str(session_doc["_id"])
-            del session_doc["_id"]
-            
-            # Convert exercise results back to ExerciseResult objects if they exist
-            if session_doc.get("exerciseResults"):
-                session_doc["exerciseResults"] = [
-                    ExerciseResult(**result) for result in session_doc["exerciseResults"]
-                ]
-            
-            sessions.append(TrainingSession(**session_doc))
+        async for session_doc in merged:
+            if len(sessions) >= limit:
+                break
+            if skip > 0:
+                skip -= 1
+                continue
+            sessions.append(_session_payload(session_doc))
         
-        return sessions
+        # Documents come from our own writes, so skip response_model revalidation
+        return TrustedJSONResponse(content=sessions)
         
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve training sessions: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def _iterate(documents: List[dict]):
+    for document in documents:
+        yield document
+
+_SESSION_SHAPE = TrustedModelShape(TrainingSession)
+_RESULT_SHAPE = TrustedModelShape(ExerciseResult)
+
+def _session_payload(session_doc: dict) -> dict:
+    """Shape a MongoDB (or compacted bucket) document as a TrainingSession response item"""
+    session_doc["id"] = str(session_doc["_id"])
+    payload = _SESSION_SHAPE.payload(session_doc)
+    
+    # Drop storage-only fields (e.g. completedAt) from the exercise results
+    if payload.get("exerciseResults"):
+        payload["exerciseResults"] = [
+            _RESULT_SHAPE.payload(result) for result in payload["exerciseResults"]
+        ]
+    
+    return payload
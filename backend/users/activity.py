@@ -0,0 +1,81 @@
+import base64
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Optional
+
+# Days a user completed a session are kept in the user document as one 31-bit
+# mask per month, e.g. {"activity": {"2025-03": 0b101}} for March 1st and 3rd.
+# A year of activity costs well under 200 bytes and every query below touches
+# at most one mask per month.
+ACTIVITY_FIELD = "activity"
+
+def month_key(day: date) -> str:
+    return day.strftime("%Y-%m")
+
+def day_bit(day: date) -> int:
+    return 1 << (day.day - 1)
+
+def activity_mask_update(day: date) -> Dict[str, Any]:
+    """
+    Update-pipeline $set fields that mark `day` active.
+
+    Pipelines have no portable bitwise OR, so the bit is added only when the
+    mask does not already have it.
+    """
+    path = f"{ACTIVITY_FIELD}.{month_key(day)}"
+    bit = day_bit(day)
+    mask = {"$ifNull": [f"${path}", 0]}
+    bit_is_set = {"$eq": [{"$mod": [{"$floor": {"$divide": [mask, bit]}}, 2]}, 1]}
+    return {path: {"$add": [mask, {"$cond": [bit_is_set, 0, bit]}]}}
+
+def mark_active(activity: Dict[str, int], day: date):
+    """In-process equivalent of activity_mask_update"""
+    activity[month_key(day)] = activity.get(month_key(day), 0) | day_bit(day)
+
+def is_active(activity: Dict[str, int], day: date) -> bool:
+    return bool(activity.get(month_key(day), 0) & day_bit(day))
+
+def _month_starts(start: date, end: date):
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month = (month + timedelta(days=32)).replace(day=1)
+
+def days_active(activity: Dict[str, int], start: date, end: date) -> int:
+    """Number of active days between start and end, inclusive"""
+    total = 0
+    for month in _month_starts(start, end):
+        mask = activity.get(month_key(month), 0)
+        if month.year == start.year and month.month == start.month:
+            mask &= ~((1 << (start.day - 1)) - 1)
+        if month.year == end.year and month.month == end.month:
+            mask &= (1 << end.day) - 1
+        total += bin(mask).count("1")
+    return total
+
+def heatmap(activity: Dict[str, int], start: date, end: date) -> str:
+    """
+    Base64 bitmap of the days from start to end, inclusive.
+
+    Bit i (least significant bit first within each byte) is day start + i, so a
+    year encodes to 46 bytes, or 64 characters.
+    """
+    day_count = (end - start).days + 1
+    bitmap = bytearray((day_count + 7) // 8)
+    for offset in range(day_count):
+        if is_active(activity, start + timedelta(days=offset)):
+            bitmap[offset // 8] |= 1 << (offset % 8)
+    return base64.b64encode(bytes(bitmap)).decode()
+
+def current_streak(user_doc: Optional[Dict[str, Any]], now: datetime) -> int:
+    """
+    The streak as of today.
+
+    The stored streak is as of lastActiveDay; it still counts while the user
+    can extend it today, and is broken once a whole day has been missed.
+    """
+    if not user_doc or not user_doc.get("lastActiveDay"):
+        return (user_doc.get("streak") or 0) if user_doc else 0
+    last_active_day = datetime.strptime(user_doc["lastActiveDay"], "%Y-%m-%d").date()
+    if (now.date() - last_active_day).days > 1:
+        return 0
+    return user_doc.get("streak") or 0
@@ -1,27 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from datetime import datetime, timedelta
 from typing import Dict, Any
 
-from models.user import User, UserUpdate
-from auth.router import get_current_user
+from models.user import User, UserUpdate, ActivityHeatmap, BulkProvisionReport
+from users.activity import days_active, heatmap, current_streak
+from auth.router import get_current_user, get_admin_user
+from auth.bulk import provision_users, BULK_MAX_USERS
+from repositories.base import UserRepository
+from repositories.dependencies import get_user_repository
 
 router = APIRouter()
 
-# Database dependency - will be injected from main.py
-async def get_database() -> AsyncIOMotorDatabase:
-    from main import db
-    return db
-
 @router.get("/me", response_model=User)
 async def get_user_profile(current_user: User = Depends(get_current_user)):
     """Get the current user's profile"""
     return current_user
 
+@router.get("/me/activity", response_model=ActivityHeatmap)
+async def get_activity_heatmap(
+    days: int = Query(365, ge=1, le=3660),
+    current_user: User = Depends(get_current_user),
+    users: UserRepository = Depends(get_user_repository)
+):
+    """Get the days the current user trained, ending today, for a calendar heatmap"""
+    user_doc = await users.get_by_id(current_user.id)
+    if not user_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    now = datetime.utcnow()
+    end = now.date()
+    start = end - timedelta(days=days - 1)
+    activity = user_doc.get("activity") or {}
+    
+    return ActivityHeatmap(
+        start=start,
+        end=end,
+        bitmap=heatmap(activity, start, end),
+        activeDays=days_active(activity, start, end),
+        currentStreak=current_streak(user_doc, now),
+        longestStreak=max(user_doc.get("longestStreak") or 0, user_doc.get("streak") or 0)
+    )
+
 @router.put("/me", response_model=User)
 async def update_user_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    users: UserRepository = Depends(get_user_repository)
 ):
     """Update the current user's profile settings (email is not updatable)"""
     try:
@@ -49,24 +76,12 @@ async def update_user_profile(
         if not update_doc:
             return current_user
         
-        # Update user in database
-        result = await db.users.update_one(
-            {"email": current_user.email},
-            {"$set": update_doc}
-        )
-        
-        if result.matched_count == 0:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        # Fetch and return updated user
-        updated_user_doc = await db.users.find_one({"email": current_user.email})
+        # Update user in database and fetch the updated document
+        updated_user_doc = await users.update_by_email(current_user.email, update_doc)
         if not updated_user_doc:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found after update"
+                detail="User not found"
             )
         
         # Convert MongoDB document to User model
@@ -82,4 +97,47 @@ async def update_user_profile(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update user profile"
-        )
\ No newline at end of file
+        )
+
+# Upload content types accepted by the bulk provisioning endpoint
+BULK_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson"
+}
+
+@router.post("/bulk", response_model=BulkProvisionReport)
+async def bulk_provision_users(
+    request: Request,
+    admin: User = Depends(get_admin_user),
+    users: UserRepository = Depends(get_user_repository)
+):
+    """Register many users from a CSV or NDJSON upload, reporting rows that failed"""
+    format = BULK_CONTENT_TYPES.get(request.headers.get("content-type", "").split(";")[0].strip().lower())
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload users as text/csv or application/x-ndjson"
+        )
+
+    try:
+        content = (await request.body()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload must be UTF-8 encoded"
+        )
+    rows = sum(1 for line in content.splitlines() if line.strip()) - (1 if format == "csv" else 0)
+    if rows > BULK_MAX_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_USERS} users per upload"
+        )
+
+    try:
+        return await provision_users(users, content, format)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to provision users: {str(e)}"
+        )
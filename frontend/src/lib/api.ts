@@ -1,22 +1,94 @@
 // API service layer for backend communication
 const API_BASE_URL = 'http://localhost:8000/api/v1';
 
+// Causal token from our latest write. Sent back with every request so progress and
+// history reads, which the server may answer from a replica, include that write.
+const READ_AFTER_HEADER = 'X-Read-After';
+let readAfterToken: string | null = null;
+
 // Helper function to get auth headers
 const getAuthHeaders = (): HeadersInit => {
   const token = localStorage.getItem('mindbloom-token');
   return {
     'Content-Type': 'application/json',
-    ...(token && { 'Authorization': `Bearer ${token}` })
+    ...(token && { 'Authorization': `Bearer ${token}` }),
+    ...(readAfterToken && { [READ_AFTER_HEADER]: readAfterToken })
   };
 };
 
+// Exchange the stored refresh token for a new access token, without re-entering the password.
+// Concurrent callers share one request: refresh tokens are single-use, and presenting a used
+// one again makes the server revoke the whole login.
+let refreshInFlight: Promise<boolean> | null = null;
+
+const refreshAccessToken = (): Promise<boolean> => {
+  const refreshToken = localStorage.getItem('mindbloom-refresh-token');
+  if (!refreshToken) {
+    return Promise.resolve(false);
+  }
+  if (!refreshInFlight) {
+    refreshInFlight = fetch(`${API_BASE_URL}/auth/refresh`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token: refreshToken })
+    })
+      .then(async (response) => {
+        if (!response.ok) {
+          localStorage.removeItem('mindbloom-refresh-token');
+          return false;
+        }
+        const tokenData = await response.json();
+        localStorage.setItem('mindbloom-token', tokenData.access_token);
+        localStorage.setItem('mindbloom-refresh-token', tokenData.refresh_token);
+        return true;
+      })
+      .catch(() => false)
+      .finally(() => {
+        refreshInFlight = null;
+      });
+  }
+  return refreshInFlight;
+};
+
+const rememberReadToken = (response: Response): Response => {
+  const token = response.headers.get(READ_AFTER_HEADER);
+  if (token) {
+    readAfterToken = token;
+  }
+  return response;
+};
+
+// fetch with the current access token, refreshing it once if it has expired
+const authorizedFetch = async (url: string, init: RequestInit = {}): Promise<Response> => {
+  const response = rememberReadToken(await fetch(url, { ...init, headers: getAuthHeaders() }));
+  if (response.status !== 401 || !(await refreshAccessToken())) {
+    return response;
+  }
+  return rememberReadToken(await fetch(url, { ...init, headers: getAuthHeaders() }));
+};
+
+// Revoke the stored refresh token on sign out (best effort)
+export const revokeRefreshToken = async (): Promise<void> => {
+  const refreshToken = localStorage.getItem('mindbloom-refresh-token');
+  localStorage.removeItem('mindbloom-refresh-token');
+  if (!refreshToken) {
+    return;
+  }
+  await fetch(`${API_BASE_URL}/auth/logout`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ refresh_token: refreshToken })
+  }).catch(() => undefined);
+};
+
 // Helper function to handle API responses
 const handleResponse = async (response: Response) => {
   if (!response.ok) {
-    // Handle 401 Unauthorized specifically
+    // Handle 401 Unauthorized specifically (the refresh token has already been tried)
     if (response.status === 401) {
       console.log('🔐 API: 401 Unauthorized - clearing token and redirecting to signin');
       localStorage.removeItem('mindbloom-token');
+      localStorage.removeItem('mindbloom-refresh-token');
       localStorage.removeItem('mindbloom-user');
       // Don't redirect immediately, let the calling component handle it
       throw new Error('Not authenticated');
@@ -65,7 +137,7 @@ export const trainingAPI = {
     exercises: any[];
     message: string;
   }> {
-    const response = await fetch(`${API_BASE_URL}/training/session`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/training/session`, {
       method: 'POST',
       headers: getAuthHeaders(),
       body: JSON.stringify(sessionData)
@@ -81,7 +153,7 @@ export const trainingAPI = {
     currentAverage: number;
     totalExercisesCompleted: number;
   }> {
-    const response = await fetch(`${API_BASE_URL}/training/session/${sessionId}/exercise`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/training/session/${sessionId}/exercise`, {
       method: 'POST',
       headers: getAuthHeaders(),
       body: JSON.stringify(exerciseResult)
@@ -96,7 +168,7 @@ export const trainingAPI = {
     newStreak: number;
     totalSessions: number;
   }> {
-    const response = await fetch(`${API_BASE_URL}/training/session/${sessionId}/complete`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/training/session/${sessionId}/complete`, {
       method: 'POST',
       headers: getAuthHeaders(),
       body: JSON.stringify(completionData)
@@ -106,7 +178,7 @@ export const trainingAPI = {
 
   // Get user's training sessions
   async getUserSessions(limit: number = 50, skip: number = 0): Promise<TrainingSession[]> {
-    const response = await fetch(`${API_BASE_URL}/training/sessions?limit=${limit}&skip=${skip}`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/training/sessions?limit=${limit}&skip=${skip}`, {
       method: 'GET',
       headers: getAuthHeaders()
     });
@@ -156,7 +228,7 @@ export interface QuickProgressSummary {
 export const progressAPI = {
   // Get comprehensive progress analytics
   async getProgressSummary(): Promise<ProgressSummary> {
-    const response = await fetch(`${API_BASE_URL}/progress/`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/progress/`, {
       method: 'GET',
       headers: getAuthHeaders()
     });
@@ -165,7 +237,7 @@ export const progressAPI = {
 
   // Get quick progress summary with cached data
   async getQuickProgressSummary(): Promise<QuickProgressSummary> {
-    const response = await fetch(`${API_BASE_URL}/progress/quick`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/progress/quick`, {
       method: 'GET',
       headers: getAuthHeaders()
     });
@@ -184,7 +256,7 @@ export const progressAPI = {
     sessionsCount?: number;
     message?: string;
   }> {
-    const response = await fetch(`${API_BASE_URL}/progress/today`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/progress/today`, {
       method: 'GET',
       headers: getAuthHeaders()
     });
@@ -223,7 +295,7 @@ export interface UserUpdate {
 export const userAPI = {
   // Get current user profile
   async getCurrentUser(): Promise<User> {
-    const response = await fetch(`${API_BASE_URL}/users/me`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/users/me`, {
       method: 'GET',
       headers: getAuthHeaders()
     });
@@ -232,7 +304,7 @@ export const userAPI = {
 
   // Update user profile
   async updateUser(userData: UserUpdate): Promise<User> {
-    const response = await fetch(`${API_BASE_URL}/users/me`, {
+    const response = await authorizedFetch(`${API_BASE_URL}/users/me`, {
       method: 'PUT',
       headers: getAuthHeaders(),
       body: JSON.stringify(userData)
@@ -304,6 +376,7 @@ export const isAuthenticated = (): boolean => {
 export const handleAuthError = (error: any) => {
   if (error.message?.includes('401') || error.message?.includes('Unauthorized')) {
     localStorage.removeItem('mindbloom-token');
+    localStorage.removeItem('mindbloom-refresh-token');
     localStorage.removeItem('mindbloom-user');
     window.location.href = '/signin';
   }
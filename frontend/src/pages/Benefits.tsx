@@ -4,6 +4,7 @@ import { Card, CardContent } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { Brain, ArrowLeft, ExternalLink } from "lucide-react";
 import { useNavigate } from "react-router-dom";
+import { revokeRefreshToken } from "@/lib/api";
 
 const Benefits = () => {
   const navigate = useNavigate();
@@ -35,6 +36,7 @@ const Benefits = () => {
   const handleSignInOut = () => {
     if (loggedInUser) {
       // Sign out
+      revokeRefreshToken();
       localStorage.removeItem('mindbloom-user');
       localStorage.removeItem('mindbloom-token');
       localStorage.removeItem('mindbloom-today-mood');
@@ -128,6 +128,7 @@ const Registration = () => {
 
       // Store token and user data in localStorage
       localStorage.setItem('mindbloom-token', tokenData.access_token);
+      localStorage.setItem('mindbloom-refresh-token', tokenData.refresh_token);
       localStorage.setItem('mindbloom-user', JSON.stringify(userData));
       
       // Clean up temporary registration data
@@ -110,6 +110,7 @@ const SignIn = () => {
 
       // Store token and user data in localStorage
       localStorage.setItem('mindbloom-token', tokenData.access_token);
+      localStorage.setItem('mindbloom-refresh-token', tokenData.refresh_token);
       localStorage.setItem('mindbloom-user', JSON.stringify(userData));
       
       // Clear any existing mood and focus data to force mood check for the new day
@@ -6,6 +6,7 @@ sys.path.append('./backend')
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from progress.logic import recalculate_user_progress
+from repositories.mongo import MongoRepositories
 
 load_dotenv('./backend/.env')
 
@@ -27,7 +28,7 @@ async def recalculate_mbuser2():
         
         # Recalculate progress
         print("🔄 Recalculating progress...")
-        progress_data = await recalculate_user_progress(user_id, db)
+        progress_data = await recalculate_user_progress(user_id, MongoRepositories(db))
         
         print(f"✅ Progress recalculated successfully!")
         print(f"📈 Strengths: {progress_data.get('strengths', [])}")
@@ -12,6 +12,7 @@ sys.path.append('backend')
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from backend.progress.logic import get_progress_analytics
+from repositories.mongo import MongoRepositories
 
 load_dotenv('backend/.env')
 
@@ -37,7 +38,7 @@ async def test_session_fix():
         
         # Test the FIXED progress calculation
         print(f'\n🔧 Testing FIXED progress calculation...')
-        progress_summary = await get_progress_analytics(user_id, db)
+        progress_summary = await get_progress_analytics(user_id, MongoRepositories(db))
         
         print(f'\n📊 RESULTS:')
         print(f'   Total Sessions: {progress_summary.total_sessions}')